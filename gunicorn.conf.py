@@ -0,0 +1,15 @@
+# Gunicorn settings (procfile: gunicorn --config gunicorn.conf.py).
+#
+# preload_app imports the app in the master, so Django, DRF and luna_app are
+# loaded and warmed up (luna_project/wsgi.py) once, and each worker forks
+# with all of it in place, shared copy-on-write, instead of importing it
+# again. A worker then only connects to the database before it takes its
+# first request, so a respawned worker is ready at once too.
+
+preload_app = True
+
+
+def post_worker_init(worker):
+    from luna_app.warmup import connect
+
+    connect()
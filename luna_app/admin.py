@@ -1,17 +1,180 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Content, Like, Comment, CosmicEvent, UserProfile
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from . import facets
+from .caching import bump_content_generation
+from .models import Content, FacetCount, Like, Comment, CosmicEvent, UserProfile
+from .purge import schedule_purge, soft_delete_comments, soft_delete_contents, soft_delete_user
+from .tasks import in_batches, run_in_background
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that doesn't COUNT(*) a large table on every page
+    view. Unfiltered PostgreSQL tables use the planner's row estimate; other
+    counts are cached for a minute per query.
+    """
+    cache_timeout = 60
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                    [self.object_list.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return row[0]
+
+        try:
+            sql = str(query)
+        except Exception:
+            return super().count
+        key = 'admin-count:' + hashlib.md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.cache_timeout)
+        return count
+
+
+class BatchActionsMixin:
+    def run_in_batches(self, request, queryset, operation, verb):
+        """Apply operation to the selection batch by batch, in the background if it is large"""
+        total = queryset.count()
+        if total > settings.ADMIN_BACKGROUND_THRESHOLD:
+            run_in_background(apply_in_batches, queryset, operation)
+            self.message_user(request, f'{verb} {total} rows in the background.')
+        else:
+            apply_in_batches(queryset, operation)
+            self.message_user(request, f'{verb} {total} rows.')
+
+
+class ScalableAdmin(BatchActionsMixin, admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_actions(self, request):
+        # The stock delete action loads every selected row and its relations
+        # to build a confirmation page; delete_in_batches replaces it.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Delete selected rows (in batches)')
+    def delete_in_batches(self, request, queryset):
+        self.run_in_batches(request, queryset, delete_rows, 'Deleting')
+
+
+def apply_in_batches(queryset, operation):
+    for batch in in_batches(queryset):
+        operation(batch)
+    bump_content_generation()
+
+
+def delete_rows(batch):
+    batch.delete()
+
+
+def soft_delete_content_rows(batch):
+    soft_delete_contents(batch)
+    schedule_purge()
+
+
+def soft_delete_user_rows(batch):
+    for user in batch:
+        soft_delete_user(user)
+    schedule_purge()
+
+
+def soft_delete_comment_rows(batch):
+    soft_delete_comments(batch.values_list('pk', flat=True))
+    schedule_purge()
+
+
+def hide_rows(batch):
+    with facets.tracking(batch):
+        batch.update(is_hidden=True)
+
+
+def unhide_rows(batch):
+    with facets.tracking(batch):
+        batch.update(is_hidden=False)
+
+
+def reverify_rows(batch):
+    from .views import verify_astro_photo
+
+    # Known duplicates keep their verdict from perceptual.check_duplicate
+    contents = list(batch.filter(duplicate_of__isnull=True).only('id', 'category', 'location', 'created_at'))
+    for content in contents:
+        result = verify_astro_photo(content.category, content.location, content.created_at)
+        content.ai_verified = result['verified']
+        content.ai_confidence = result['confidence']
+        content.ai_reason = result['reason']
+    with facets.tracking(batch):
+        Content.objects.bulk_update(contents, ['ai_verified', 'ai_confidence', 'ai_reason'])
+
 
 @admin.register(Content)
-class ContentAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'content_type', 'category', 'created_at']
-    list_filter = ['content_type', 'category', 'ai_verified']
+class ContentAdmin(ScalableAdmin):
+    list_display = ['title', 'author', 'content_type', 'category', 'ai_verified', 'is_hidden', 'created_at']
+    list_filter = ['content_type', 'category', 'ai_verified', 'is_hidden', 'flagged']
+    list_select_related = ['author']
     search_fields = ['title', 'description', 'author__username']
+    autocomplete_fields = ['author']
+    raw_id_fields = ['duplicate_of']
+    actions = ['hide_content', 'unhide_content', 'reverify_content', 'delete_content']
+
+    @admin.action(description='Hide selected content')
+    def hide_content(self, request, queryset):
+        self.run_in_batches(request, queryset, hide_rows, 'Hiding')
+
+    @admin.action(description='Unhide selected content')
+    def unhide_content(self, request, queryset):
+        self.run_in_batches(request, queryset, unhide_rows, 'Unhiding')
+
+    @admin.action(description='Re-run AI verification')
+    def reverify_content(self, request, queryset):
+        self.run_in_batches(request, queryset, reverify_rows, 'Re-verifying')
+    
+    @admin.action(description='Delete selected content')
+    def delete_content(self, request, queryset):
+        self.run_in_batches(request, queryset, soft_delete_content_rows, 'Deleting')
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ['user', 'content', 'created_at']
-    list_filter = ['created_at']
+class CommentAdmin(ScalableAdmin):
+    list_display = ['user', 'content', 'flagged', 'created_at']
+    list_filter = ['flagged', 'created_at']
+    list_select_related = ['user', 'content']
     search_fields = ['text', 'user__username']
+    autocomplete_fields = ['user']
+    raw_id_fields = ['content', 'parent']
+    actions = ['delete_comments']
+    
+    @admin.action(description='Delete selected comments')
+    def delete_comments(self, request, queryset):
+        self.run_in_batches(request, queryset, soft_delete_comment_rows, 'Deleting')
+
+@admin.register(FacetCount)
+class FacetCountAdmin(admin.ModelAdmin):
+    list_display = ['facet', 'value', 'count']
+    list_filter = ['facet']
+    
+    def has_add_permission(self, request):
+        # Maintained by facets.py; the rebuild_facets command recounts them
+        return False
 
 @admin.register(CosmicEvent)
 class CosmicEventAdmin(admin.ModelAdmin):
@@ -19,7 +182,34 @@ class CosmicEventAdmin(admin.ModelAdmin):
     list_filter = ['event_type', 'event_date']
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ScalableAdmin):
     list_display = ['user', 'location', 'join_date']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
+
+@admin.register(Like)
+class LikeAdmin(ScalableAdmin):
+    list_display = ['user', 'content', 'created_at']
+    list_select_related = ['user', 'content']
+    autocomplete_fields = ['user']
+    raw_id_fields = ['content']
+    actions = ['delete_in_batches']
+
+admin.site.unregister(User)
 
-admin.site.register(Like)
\ No newline at end of file
+@admin.register(User)
+class LunaUserAdmin(BatchActionsMixin, UserAdmin):
+    actions = ['delete_accounts']
+    
+    def get_actions(self, request):
+        # Deleting a user row cascades through everything they posted at once
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    @admin.action(description='Delete selected accounts (deactivate now, purge in the background)')
+    def delete_accounts(self, request, queryset):
+        self.run_in_batches(request, queryset, soft_delete_user_rows, 'Deleting')
@@ -0,0 +1,265 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum, Value
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from .models import ActivityEvent, ActivityRollup, Comment, Content, CosmicEvent, Like
+from .tasks import BatchBuffer, run_in_background
+
+# Engagement over time. Views record() posts, likes and comments into an
+# in-process BatchBuffer that lands in the append-only ActivityEvent log in
+# batches. roll_up() turns the log into ActivityRollup rows (events per kind
+# and category per hour, then per day), and range queries read only those:
+# a year of daily counts is a few thousand rows whatever the traffic was.
+#
+# Counting is vectorized: each chunk of events becomes an integer key per
+# row (hour * labels + label) counted with np.unique, so rolling up or
+# backfilling millions of rows costs a few numpy passes, not a Python loop
+# per row over a Counter. numpy is imported there, not at the top, so
+# record() (called from views) doesn't load it into every web worker.
+
+HOUR = 3600
+CHUNK_SIZE = 20000
+ROLLUP_LOCK_ID = 0x6c756e61  # pg_advisory_xact_lock key, any constant unique to this app
+
+_roll_lock = threading.Lock()
+_rolled_at = 0.0
+
+
+def record(kind, content, user=None):
+    """Log that user did kind ('post', 'like' or 'comment') on content"""
+    if not settings.ANALYTICS_ENABLED:
+        return
+    _buffer.add(ActivityEvent(
+        kind=kind, category=content.category or '', content_type=content.content_type or '',
+        content_id=content.pk, user_id=getattr(user, 'pk', None), created_at=timezone.now(),
+    ))
+
+
+def _write(events):
+    ActivityEvent.objects.bulk_create(events, batch_size=settings.ANALYTICS_BATCH_SIZE)
+    roll_up_if_due()
+
+
+_buffer = BatchBuffer(_write, 'ANALYTICS_BATCH_SIZE', 'ANALYTICS_FLUSH_SECONDS')
+
+
+def flush():
+    return _buffer.flush()
+
+
+def floor_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _from_epoch_hour(hour):
+    return datetime.fromtimestamp(int(hour) * HOUR, tz=dt_timezone.utc)
+
+
+def count_hours(rows):
+    """
+    Counter of (hour start, kind, category) -> events for rows of
+    (created_at, kind, category), aggregated with numpy a chunk at a time
+    """
+    totals = Counter()
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            _count_chunk(chunk, totals)
+            chunk = []
+    _count_chunk(chunk, totals)
+    return totals
+
+
+def _count_chunk(chunk, totals):
+    import numpy as np
+
+    if not chunk:
+        return
+    times = np.fromiter((row[0].timestamp() for row in chunk), dtype=np.float64, count=len(chunk))
+    hours = (times // HOUR).astype(np.int64)
+    labels, codes = np.unique(
+        np.array([f'{kind}\t{category or ""}' for _, kind, category in chunk]), return_inverse=True
+    )
+    keys, counts = np.unique(hours * len(labels) + codes, return_counts=True)
+    for hour, code, count in zip((keys // len(labels)).tolist(), (keys % len(labels)).tolist(), counts.tolist()):
+        kind, category = labels[code].split('\t')
+        totals[_from_epoch_hour(hour), kind, category] += count
+
+
+def _first_event():
+    return ActivityEvent.objects.order_by('created_at').values_list('created_at', flat=True).first()
+
+
+def _sources():
+    """The content tables, as rows of (created_at, kind, category)"""
+    return [
+        Content.all_objects.annotate(kind=Value('post')).values_list('created_at', 'kind', 'category'),
+        Like.objects.annotate(kind=Value('like')).values_list('created_at', 'kind', 'content__category'),
+        Comment.all_objects.annotate(kind=Value('comment')).values_list('created_at', 'kind', 'content__category'),
+    ]
+
+
+def _count(start, end, log_start):
+    """
+    Hourly counts for [start, end): from the content tables before
+    log_start (the first logged event) and from the log after it, so the
+    hour the log starts in holds both halves
+    """
+    split = end if log_start is None else min(max(log_start, start), end)
+    hourly = Counter()
+    if start < split:
+        for queryset in _sources():
+            rows = queryset.filter(created_at__gte=start, created_at__lt=split).order_by()
+            hourly.update(count_hours(rows.iterator(chunk_size=CHUNK_SIZE)))
+    if split < end:
+        events = (ActivityEvent.objects.filter(created_at__gte=split, created_at__lt=end).order_by()
+                  .values_list('created_at', 'kind', 'category').iterator(chunk_size=CHUNK_SIZE))
+        hourly.update(count_hours(events))
+    return hourly
+
+
+def _lock_rollups():
+    """
+    Serialize rollup writers until the transaction ends. Every worker may
+    roll up (see roll_up_if_due), and two delete-then-insert swaps of the
+    same hours would otherwise collide on the unique bucket rows. SQLite's
+    IMMEDIATE transactions already queue writers; PostgreSQL takes an
+    advisory lock.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [ROLLUP_LOCK_ID])
+
+
+def _replace(start, end, hourly):
+    """Swap in new hourly rows for [start, end) and recount the days they touch"""
+    day_start = start.replace(hour=0)
+    day_end = end.replace(hour=0) + timedelta(days=1) if end.hour else end
+    with transaction.atomic():
+        _lock_rollups()
+        ActivityRollup.objects.filter(period='hour', bucket__gte=start, bucket__lt=end).delete()
+        ActivityRollup.objects.bulk_create(
+            [ActivityRollup(period='hour', bucket=bucket, kind=kind, category=category, count=count)
+             for (bucket, kind, category), count in hourly.items()],
+            batch_size=1000
+        )
+        days = (ActivityRollup.objects.filter(period='hour', bucket__gte=day_start, bucket__lt=day_end)
+                .annotate(day=TruncDay('bucket', tzinfo=dt_timezone.utc))
+                .values('day', 'kind', 'category').annotate(total=Sum('count')).order_by())
+        ActivityRollup.objects.filter(period='day', bucket__gte=day_start, bucket__lt=day_end).delete()
+        ActivityRollup.objects.bulk_create(
+            [ActivityRollup(period='day', bucket=row['day'], kind=row['kind'],
+                            category=row['category'], count=row['total']) for row in days],
+            batch_size=1000
+        )
+
+
+def roll_up(since=None):
+    """
+    Recount the hourly and daily rollups from the activity log, from since
+    (by default the hour before the newest hourly rollup, so events
+    flushed late still land in their hour) up to now. Never recounts from
+    before the first logged event: earlier hours are backfill()'s. Returns
+    the start.
+    """
+    first_event = _first_event()
+    if first_event is None:
+        return None
+    if since is None:
+        newest = ActivityRollup.objects.filter(period='hour').order_by('-bucket').values_list('bucket', flat=True).first()
+        since = newest - timedelta(hours=1) if newest is not None else first_event
+    start = floor_hour(max(since, first_event))
+    end = floor_hour(timezone.now()) + timedelta(hours=1)
+    _replace(start, end, _count(start, end, first_event))
+    return start
+
+
+def roll_up_if_due():
+    """roll_up() at most every ANALYTICS_ROLLUP_SECONDS per process"""
+    global _rolled_at
+    with _roll_lock:
+        if time.monotonic() - _rolled_at < settings.ANALYTICS_ROLLUP_SECONDS:
+            return
+        _rolled_at = time.monotonic()
+    run_in_background(roll_up)
+
+
+def backfill(start=None, end=None):
+    """
+    Rollups for the time before the activity log existed, counted from the
+    posts, likes and comments tables up to end, by default the first
+    logged event (the rest of its hour comes from the log). Returns the
+    number of events counted.
+    """
+    first_event = _first_event()
+    if end is None:
+        end = first_event or timezone.now()
+    if end != floor_hour(end):
+        end = floor_hour(end) + timedelta(hours=1)
+    if start is None:
+        firsts = [queryset.order_by('created_at').values_list('created_at', flat=True).first()
+                  for queryset in _sources()]
+        firsts = [first for first in firsts if first is not None]
+        if not firsts:
+            return 0
+        start = min(firsts)
+    start = floor_hour(start)
+
+    hourly = _count(start, end, first_event)
+    _replace(start, end, hourly)
+    return sum(hourly.values())
+
+
+def series(kind, period, start, end, categories=None, by_category=False):
+    """[{bucket, count}] (with category if by_category) for [start, end), from the rollups"""
+    rows = ActivityRollup.objects.filter(period=period, kind=kind, bucket__gte=start, bucket__lt=end)
+    if categories:
+        rows = rows.filter(category__in=categories)
+    group = ['bucket', 'category'] if by_category else ['bucket']
+    return list(rows.values(*group).annotate(count=Sum('count')).order_by(*group))
+
+
+def cosmic_event_impact(start, end, days=3):
+    """
+    For each CosmicEvent in [start, end): posts, likes and comments within
+    days of it, next to the same-length window just before, from the
+    hourly rollups.
+    """
+    import numpy as np
+
+    events = list(CosmicEvent.objects.filter(event_date__gte=start, event_date__lt=end).order_by('event_date'))
+    if not events:
+        return []
+    window = timedelta(days=days)
+    rows = list(ActivityRollup.objects.filter(
+        period='hour', bucket__gte=events[0].event_date - 2 * window, bucket__lt=events[-1].event_date + window
+    ).values_list('bucket', 'kind', 'count'))
+    times = np.array([bucket.timestamp() for bucket, _, _ in rows], dtype=np.float64)
+    kinds = np.array([kind for _, kind, _ in rows], dtype=object)
+    counts = np.array([count for _, _, count in rows], dtype=np.int64)
+
+    results = []
+    for event in events:
+        at, span = event.event_date.timestamp(), window.total_seconds()
+        during = (times >= at - span) & (times < at + span)
+        before = (times >= at - 3 * span) & (times < at - span)
+        stats = {}
+        for kind, label in ActivityEvent.KINDS:
+            of_kind = kinds == kind
+            stats[kind] = {
+                'during': int(counts[during & of_kind].sum()),
+                'before': int(counts[before & of_kind].sum()),
+            }
+        results.append({
+            'id': event.pk, 'title': event.title, 'event_type': event.event_type,
+            'event_date': event.event_date, 'window_days': days, **stats,
+        })
+    return results
@@ -0,0 +1,72 @@
+import math
+import re
+
+from django.utils.html import urlize
+from django.utils.text import Truncator
+
+# Articles are written as plain text in a textarea. They are rendered once,
+# when saved, into safe HTML: everything is escaped, then a small subset of
+# Markdown is applied -- blank-line paragraphs, "#" headings, "-" lists,
+# **bold**, *italic* -- and bare URLs become nofollow links.
+
+EXCERPT_WORDS = 45
+EXCERPT_MAX_LENGTH = 500
+WORDS_PER_MINUTE = 200
+
+_paragraph_break = re.compile(r'\n\s*\n')
+_heading = re.compile(r'^(#{1,3})\s+(.+)$')
+_bullet = re.compile(r'^\s*[-*]\s+')
+_bold = re.compile(r'\*\*([^*<>\n]+)\*\*')
+_italic = re.compile(r'(?<![\w*])\*([^*<>\n]+)\*(?![\w*])')
+_link = re.compile(r'(<a\s[^>]*>.*?</a>)')
+_markup = re.compile(r'^\s*(#{1,3}|[-*])\s+|\*\*|(?<![\w*])\*(?=\S)|(?<=\S)\*(?![\w*])', re.MULTILINE)
+
+
+def _emphasis(html):
+    html = _bold.sub(r'<strong>\1</strong>', html)
+    return _italic.sub(r'<em>\1</em>', html)
+
+
+def _inline(text):
+    # Links from urlize are left as they are: asterisks in a URL are part of it
+    parts = _link.split(urlize(text, nofollow=True, autoescape=True))
+    return ''.join(part if i % 2 else _emphasis(part) for i, part in enumerate(parts))
+
+
+def render_html(text):
+    """Safe HTML for an article body"""
+    blocks = []
+    for block in _paragraph_break.split((text or '').replace('\r\n', '\n').strip()):
+        lines = [line for line in block.split('\n') if line.strip()]
+        if not lines:
+            continue
+        heading = _heading.match(lines[0])
+        if heading:
+            level = len(heading.group(1)) + 1  # the post title is the page's h1
+            blocks.append(f'<h{level}>{_inline(heading.group(2))}</h{level}>')
+            lines = lines[1:]
+        if not lines:
+            continue
+        if all(_bullet.match(line) for line in lines):
+            items = ''.join(f'<li>{_inline(_bullet.sub("", line))}</li>' for line in lines)
+            blocks.append(f'<ul>{items}</ul>')
+        else:
+            blocks.append('<p>' + '<br>'.join(_inline(line) for line in lines) + '</p>')
+    return '\n'.join(blocks)
+
+
+def plain_text(text):
+    """The article body without markup, on one line"""
+    return ' '.join(_markup.sub('', text or '').split())
+
+
+def render(text):
+    """Everything stored for an article body: html, excerpt, word_count, reading_time"""
+    plain = plain_text(text)
+    words = len(plain.split())
+    return {
+        'content_html': render_html(text),
+        'excerpt': Truncator(plain).words(EXCERPT_WORDS, truncate='…')[:EXCERPT_MAX_LENGTH],
+        'word_count': words,
+        'reading_time': math.ceil(words / WORDS_PER_MINUTE),
+    }
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def token_cache():
+    return caches[getattr(settings, 'TOKEN_CACHE_ALIAS', 'tokens')]
+
+
+def _cache_key(key):
+    return f'auth-token:{key}'
+
+
+def issue_token(user):
+    """Return the API token for a user, creating one if needed"""
+    token, created = Token.objects.get_or_create(user=user)
+    return token
+
+
+def revoke_token(user):
+    """Delete a user's API token and evict it from the token cache"""
+    forget_user(user)
+    Token.objects.filter(user=user).delete()
+
+
+def forget_user(user):
+    """Evict the user's token from the token cache, e.g. after the user changed"""
+    cache = token_cache()
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        cache.delete(_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that keeps recently used token keys, with their
+    user, in the token cache, so repeat API calls skip the database. The
+    cache is shared by the workers on a host, and entries are evicted when
+    the token is revoked or the user is saved or deleted (see signals.py),
+    so neither is honoured past the change.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = token_cache()
+        user = cache.get(_cache_key(key))
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(_cache_key(key), user)
+            return (user, token)
+        return (user, Token(key=key, user=user))
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import acheck_password, amake_password, check_password, make_password
+
+
+def _needs_upgrade(encoded):
+    return hashers.identify_hasher(encoded).must_update(encoded)
+
+
+class PoolHashingBackend(ModelBackend):
+    """
+    ModelBackend that checks passwords in the hashing pool. Logins still go
+    through authenticate(), so other backends and the user_login_failed
+    signal work as usual; only the hashing leaves the request thread.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            make_password(password)
+            return None
+        if not check_password(password, user.password) or not self.user_can_authenticate(user):
+            return None
+        if _needs_upgrade(user.password):
+            user.password = make_password(password)
+            user.save(update_fields=['password'])
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await amake_password(password)
+            return None
+        if not await acheck_password(password, user.password) or not self.user_can_authenticate(user):
+            return None
+        if _needs_upgrade(user.password):
+            user.password = await amake_password(password)
+            await user.asave(update_fields=['password'])
+        return user
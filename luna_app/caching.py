@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Generation counters for cached pages and data. Cache keys include the
+# current generation, and signals bump it on every change, so stale entries
+# are simply never read again and expire on their own.
+#
+# The counters live in the GENERATION_CACHE_ALIAS cache, which all workers
+# share (files on the host by default), while what they key stays in each
+# worker's own default cache. A bump therefore invalidates every worker's
+# copies at once. The non-atomic incr() of the file cache may merge two
+# concurrent bumps into one, which still changes the generation.
+
+GENERATION_KEY = 'content:generation'
+EVENT_GENERATION_KEY = 'events:generation'
+
+
+def generation_cache():
+    return caches[getattr(settings, 'GENERATION_CACHE_ALIAS', 'default')]
+
+
+def _generation(key):
+    cache = generation_cache()
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so a reset counter never reuses an old key
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(key):
+    try:
+        generation_cache().incr(key)
+    except ValueError:
+        _generation(key)
+
+
+def content_generation():
+    """
+    Counter that changes whenever posts, likes, comments or profiles change.
+    Page fragments include it in their cache key, so a bump invalidates them all.
+    """
+    return _generation(GENERATION_KEY)
+
+
+def bump_content_generation():
+    _bump(GENERATION_KEY)
+
+
+def event_generation():
+    """Like content_generation(), for cosmic events; keys the cached calendar feeds"""
+    return _generation(EVENT_GENERATION_KEY)
+
+
+def bump_event_generation():
+    _bump(EVENT_GENERATION_KEY)
@@ -0,0 +1,220 @@
+import re
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+# Near-duplicate text detection. Text is normalized and cut into overlapping
+# 5-byte shingles; a MinHash signature (64 hash minimums) estimates the
+# Jaccard similarity of two texts' shingle sets. Signatures are split into
+# 8 bands of 8 values for locality-sensitive hashing: two texts become
+# candidates when any band matches exactly, which happens with high
+# probability above ~0.75 similarity and rarely below ~0.5.
+
+SHINGLE = 5
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+MIN_LENGTH = 20  # "Wow!" and "Amazing shot" are allowed to repeat
+PRIME = (1 << 31) - 1
+
+# Fixed seed: persisted signatures must stay comparable across restarts
+_rng = np.random.RandomState(0x10A4)
+_A = _rng.randint(1, PRIME, NUM_PERM).astype(np.uint64)[:, None]
+_B = _rng.randint(0, PRIME, NUM_PERM).astype(np.uint64)[:, None]
+_POWERS = 257 ** np.arange(SHINGLE - 1, -1, -1, dtype=np.uint64)
+
+_non_word = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    return _non_word.sub(' ', text.lower()).strip().encode()
+
+
+def _permute_min(hashes, starts):
+    """Per-text minimum of every hash permutation: (NUM_PERM, len(starts))"""
+    permuted = (_A * hashes + _B) % PRIME
+    return np.minimum.reduceat(permuted, starts, axis=1).astype(np.uint32)
+
+
+def signature(text):
+    """MinHash signature of text, or None if it is too short to judge"""
+    data = normalize(text or '')
+    if len(data) < MIN_LENGTH:
+        return None
+    windows = sliding_window_view(np.frombuffer(data, dtype=np.uint8), SHINGLE)
+    hashes = np.unique(windows.astype(np.uint64) @ _POWERS % PRIME)
+    return _permute_min(hashes, [0])[:, 0]
+
+
+def signatures(texts, chunk_size=500):
+    """
+    signature() for many texts at once. Each chunk of texts is hashed as one
+    concatenated buffer, discarding shingles that span two texts.
+    """
+    result = []
+    for offset in range(0, len(texts), chunk_size):
+        encoded = [normalize(text or '') for text in texts[offset:offset + chunk_size]]
+        keep = [i for i, data in enumerate(encoded) if len(data) >= MIN_LENGTH]
+        chunk = [None] * len(encoded)
+        if keep:
+            buffer = np.frombuffer(b''.join(encoded[i] for i in keep), dtype=np.uint8)
+            lengths = np.array([len(encoded[i]) for i in keep])
+            text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+            hashes = sliding_window_view(buffer, SHINGLE).astype(np.uint64) @ _POWERS % PRIME
+            owner = np.repeat(np.arange(len(keep)), lengths)[:len(hashes)]
+            valid = np.arange(len(hashes)) + SHINGLE <= (text_starts + lengths)[owner]
+            counts = lengths - SHINGLE + 1
+            minima = _permute_min(hashes[valid], np.concatenate(([0], np.cumsum(counts)[:-1])))
+            for column, i in enumerate(keep):
+                chunk[i] = minima[:, column]
+        result.extend(chunk)
+    return result
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class DuplicateIndex:
+    """In-memory LSH index of signatures keyed by ('comment'|'content', id)"""
+
+    def __init__(self):
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        self.signatures = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.signatures)
+
+    @staticmethod
+    def _bands(sig):
+        raw = sig.tobytes()
+        step = ROWS * sig.itemsize
+        return [raw[i * step:(i + 1) * step] for i in range(BANDS)]
+
+    def add(self, key, sig):
+        with self.lock:
+            if key in self.signatures:
+                return
+            self.signatures[key] = sig
+            for band, value in zip(self.buckets, self._bands(sig)):
+                band[value].append(key)
+
+    def remove(self, key):
+        with self.lock:
+            sig = self.signatures.pop(key, None)
+            if sig is None:
+                return
+            for band, value in zip(self.buckets, self._bands(sig)):
+                keys = band[value]
+                keys.remove(key)
+                if not keys:
+                    del band[value]
+
+    def query(self, sig, threshold):
+        """Keys whose estimated similarity to sig is at least threshold"""
+        candidates = set()
+        for band, value in zip(self.buckets, self._bands(sig)):
+            candidates.update(band.get(value, ()))
+        return [key for key in candidates if similarity(sig, self.signatures[key]) >= threshold]
+
+
+_index = None
+_loaded_id = 0
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _key(row):
+    return ('comment', row.comment_id) if row.comment_id else ('content', row.content_id)
+
+
+def get_index():
+    """
+    The process-wide index. The first call (warm_up(), in a server) loads
+    every persisted signature; later calls pick up rows written by other
+    workers at most every DUPLICATE_TEXT_REFRESH seconds. Rows deleted
+    elsewhere are only noticed when they match, see _live().
+    """
+    global _index, _loaded_id, _loaded_at
+    from .models import TextSignature
+
+    with _lock:
+        if _index is None:
+            _index = DuplicateIndex()
+        elif time.monotonic() - _loaded_at < getattr(settings, 'DUPLICATE_TEXT_REFRESH', 5):
+            return _index
+        rows = (TextSignature.objects.filter(pk__gt=_loaded_id).order_by('pk')
+                .only('pk', 'comment_id', 'content_id', 'signature'))
+        for row in rows.iterator(chunk_size=5000):
+            _index.add(_key(row), np.frombuffer(bytes(row.signature), dtype=np.uint32))
+            _loaded_id = row.pk
+        _loaded_at = time.monotonic()
+        return _index
+
+
+def reset():
+    """Drop the in-memory index; it is reloaded from the database on next use"""
+    global _index, _loaded_id, _loaded_at
+    with _lock:
+        _index, _loaded_id, _loaded_at = None, 0, 0.0
+
+
+def _live(keys):
+    """
+    The keys whose text is still there. Other workers' purges and rescores
+    delete signatures this index still holds; those are dropped from it.
+    """
+    from django.db.models import Q
+    from .models import TextSignature
+
+    if not keys:
+        return []
+    comments = [pk for kind, pk in keys if kind == 'comment']
+    contents = [pk for kind, pk in keys if kind == 'content']
+    rows = TextSignature.objects.filter(
+        Q(comment_id__in=comments, comment__deleted_at__isnull=True)
+        | Q(content_id__in=contents, content__deleted_at__isnull=True)
+    ).values_list('comment_id', 'content_id')
+    live = {
+        ('comment', comment_id) if comment_id else ('content', content_id)
+        for comment_id, content_id in rows
+    }
+    index = get_index()
+    for key in set(keys) - live:
+        index.remove(key)
+    return [key for key in keys if key in live]
+
+
+def screen_text(text, field='text'):
+    """
+    Signature of a comment or description about to be saved, and whether it
+    near-duplicates existing text. With DUPLICATE_TEXT_ACTION = 'reject'
+    duplicates raise a ValidationError (400) on field instead.
+    """
+    sig = signature(text)
+    if sig is None:
+        return None, False
+    threshold = getattr(settings, 'DUPLICATE_TEXT_THRESHOLD', 0.8)
+    duplicate = bool(_live(get_index().query(sig, threshold)))
+    if duplicate and getattr(settings, 'DUPLICATE_TEXT_ACTION', 'flag') == 'reject':
+        raise ValidationError({field: 'This looks like a copy of an existing post or comment.'})
+    return sig, duplicate
+
+
+def remember(sig, comment=None, content=None):
+    """Persist the signature of a saved comment or post and add it to the index"""
+    from .models import TextSignature
+
+    if sig is None:
+        return
+    TextSignature.objects.create(comment=comment, content=content, signature=sig.tobytes())
+    key = ('comment', comment.pk) if comment is not None else ('content', content.pk)
+    get_index().add(key, sig)
@@ -0,0 +1,153 @@
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from .caching import event_generation
+from .models import CosmicEvent
+from .renderers import dumps
+from .serializers import CosmicEventSerializer
+
+# Calendar feeds of cosmic events: an iCalendar (RFC 5545) feed for calendar
+# apps to subscribe to, and JSON by month range for the site, both optionally
+# limited to some event types. Calendar apps poll their subscriptions every
+# few minutes, so each feed is built once per change to the events (signals
+# bump event_generation()) and cached as (body, ETag, Last-Modified). The
+# ETag is a hash of the body, so every worker building the same feed gives
+# the same one; Last-Modified is the newest event change. A poll with the
+# current ETag gets a 304 straight from the cache, without a query.
+#
+# Feeds are cached per worker, but the generation is shared (caching.py),
+# so a change made in any worker is in every feed at once. Deleting an
+# event changes the ETag but not Last-Modified; clients that only send
+# If-Modified-Since see the deletion with the next change.
+
+PRODID = '-//Luna//Cosmic Events//EN'
+
+
+def parse_types(value):
+    """Sorted event types from a comma-separated ?type= (empty: all). Raises ValueError on unknown ones."""
+    types = sorted({name for name in value.split(',') if name})
+    unknown = set(types) - set(dict(CosmicEvent.EVENT_TYPES))
+    if unknown:
+        raise ValueError(f"Unknown event type: {', '.join(sorted(unknown))}")
+    return types
+
+
+def parse_month(value):
+    """The start of month 'YYYY-MM', in the current time zone. Raises ValueError."""
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m'))
+    except ValueError:
+        raise ValueError(f'{value!r} is not a month (YYYY-MM)') from None
+
+
+def next_month(moment):
+    return moment.replace(year=moment.year + moment.month // 12, month=moment.month % 12 + 1)
+
+
+def _events(types):
+    events = CosmicEvent.objects.order_by('event_date', 'pk')
+    if types:
+        events = events.filter(event_type__in=types)
+    return events
+
+
+def _cached(name, build):
+    """(body, etag, last modified) of the named feed, built by build() on a miss"""
+    key = f'events:feed:{event_generation()}:{name}'
+    feed = cache.get(key)
+    if feed is None:
+        body = build()
+        last_modified = CosmicEvent.objects.aggregate(newest=Max('updated_at'))['newest']
+        feed = (body, '"%s"' % hashlib.sha256(body).hexdigest()[:32], last_modified)
+        cache.set(key, feed, settings.EVENT_FEED_TIMEOUT)
+    return feed
+
+
+def month_feed(types, start, end):
+    """JSON feed of the events in [start, end)"""
+    def build():
+        events = _events(types).filter(event_date__gte=start, event_date__lt=end)
+        return dumps({
+            'start': start,
+            'end': end,
+            'types': types or [name for name, label in CosmicEvent.EVENT_TYPES],
+            'events': CosmicEventSerializer(events, many=True).data,
+        })
+
+    return _cached(f"json:{start:%Y-%m}:{end:%Y-%m}:{','.join(types)}", build)
+
+
+def ics_feed(types):
+    """iCalendar feed of every event from EVENT_FEED_PAST_DAYS ago on"""
+    def build():
+        since = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        since -= timedelta(days=settings.EVENT_FEED_PAST_DAYS)
+        return ics(_events(types).filter(event_date__gte=since), types)
+
+    return _cached(f"ics:{','.join(types)}", build)
+
+
+def _ics_text(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _ics_time(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _fold(line):
+    """Split a content line into pieces of at most 75 octets, as RFC 5545 requires"""
+    if len(line.encode()) <= 75:
+        return line
+    pieces, piece, size, limit = [], [], 0, 75
+    for char in line:
+        width = len(char.encode())
+        if size + width > limit:
+            pieces.append(''.join(piece))
+            # Continuation lines start with a space, which counts
+            piece, size, limit = [], 0, 74
+        piece.append(char)
+        size += width
+    pieces.append(''.join(piece))
+    return '\r\n '.join(pieces)
+
+
+def ics(events, types=()):
+    """A VCALENDAR of events, as bytes"""
+    labels = dict(CosmicEvent.EVENT_TYPES)
+    name = 'Luna cosmic events'
+    if types:
+        name += ': ' + ', '.join(labels[event_type] for event_type in types)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_ics_text(name)}',
+        'X-WR-TIMEZONE:UTC',
+        'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+        'X-PUBLISHED-TTL:PT1H',
+    ]
+    for event in events:
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{event.pk}@luna',
+            f'DTSTAMP:{_ics_time(event.updated_at)}',
+            f'CREATED:{_ics_time(event.created_at)}',
+            f'LAST-MODIFIED:{_ics_time(event.updated_at)}',
+            f'DTSTART:{_ics_time(event.event_date)}',
+            f'SUMMARY:{_ics_text(event.title)}',
+            f'DESCRIPTION:{_ics_text(event.description)}',
+            f'CATEGORIES:{_ics_text(labels.get(event.event_type, event.event_type))}',
+            'TRANSP:TRANSPARENT',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines).encode()
@@ -0,0 +1,148 @@
+import io
+import os
+import zipfile
+
+from .models import Comment, Content, Like, UserProfile
+from .renderers import dumps
+from .storage import is_blob_name, media_storage
+
+EXPORT_CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+CONTENT_FIELDS = [
+    'id', 'author_id', 'content_type', 'title', 'description', 'content', 'image',
+    'image_url', 'location', 'category', 'ai_verified', 'ai_confidence', 'ai_reason',
+    'created_at', 'updated_at',
+]
+COMMENT_FIELDS = ['id', 'user_id', 'content_id', 'parent_id', 'text', 'created_at', 'updated_at']
+LIKE_FIELDS = ['id', 'user_id', 'content_id', 'created_at']
+
+
+def _querysets(user=None):
+    contents = Content.objects.order_by()
+    comments = Comment.objects.order_by()
+    # Likes of soft-deleted posts are gone as far as users can tell
+    likes = Like.objects.filter(content__deleted_at__isnull=True).order_by()
+    profiles = UserProfile.objects.filter(deleted_at__isnull=True).order_by()
+    if user is not None:
+        contents = contents.filter(author=user)
+        comments = comments.filter(user=user)
+        likes = likes.filter(user=user)
+        profiles = profiles.filter(user=user)
+    return contents, comments, likes, profiles
+
+
+def export_sections(user=None):
+    """
+    (name, rows) pairs for a user's data, or the whole site when user is None.
+    Rows come from server-side iterators, so memory stays flat however many
+    there are.
+    """
+    contents, comments, likes, profiles = _querysets(user)
+    return [
+        ('content', contents.values(*CONTENT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('comments', comments.values(*COMMENT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('likes', likes.values(*LIKE_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('media', media_manifest(contents, profiles)),
+    ]
+
+
+def media_manifest(contents, profiles):
+    """One row per media file referenced by the exported content and profiles"""
+    storage = media_storage()
+    files = (
+        contents.exclude(image='').exclude(image__isnull=True)
+        .values_list('id', 'image').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    avatars = (
+        profiles.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        .values_list('user_id', 'profile_picture').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for owner, name, kind in _tagged(files, 'content_image', avatars, 'profile_picture'):
+        path = storage.path(name)
+        yield {
+            'kind': kind,
+            'owner_id': owner,
+            'name': name,
+            'url': storage.url(name),
+            'size': os.path.getsize(path) if os.path.exists(path) else None,
+            'sha256': os.path.splitext(os.path.basename(name))[0] if is_blob_name(name) else None,
+        }
+
+
+def _tagged(first, first_kind, second, second_kind):
+    for owner, name in first:
+        yield owner, name, first_kind
+    for owner, name in second:
+        yield owner, name, second_kind
+
+
+def iter_ndjson(user=None):
+    """Stream every section as NDJSON, one {"type": ..., ...} object per line"""
+    buffer = []
+    size = 0
+    for name, rows in export_sections(user):
+        for row in rows:
+            line = dumps({'type': name, **row}) + b'\n'
+            buffer.append(line)
+            size += len(line)
+            if size >= FLUSH_BYTES:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that zipfile streams into"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def iter_zip(user=None, include_media=False):
+    """
+    Stream a zip archive with one NDJSON file per section and, optionally,
+    the media files themselves under media/.
+    """
+    buffer = _StreamBuffer()
+    storage = media_storage()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, rows in export_sections(user):
+            with archive.open(f'{name}.ndjson', 'w', force_zip64=True) as member:
+                for row in rows:
+                    member.write(dumps(row) + b'\n')
+                    if buffer.size >= FLUSH_BYTES:
+                        yield buffer.pop()
+
+        if include_media:
+            contents, comments, likes, profiles = _querysets(user)
+            # Blobs are shared between posts and profiles; store each once
+            written = set()
+            for row in media_manifest(contents, profiles):
+                path = storage.path(row['name'])
+                if row['size'] is None or row['name'] in written:
+                    continue
+                written.add(row['name'])
+                # Images are already compressed, store them as-is
+                info = zipfile.ZipInfo(f"media/{row['name']}")
+                info.compress_type = zipfile.ZIP_STORED
+                with archive.open(info, 'w', force_zip64=True) as member, open(path, 'rb') as f:
+                    while chunk := f.read(FLUSH_BYTES):
+                        member.write(chunk)
+                        yield buffer.pop()
+    yield buffer.pop()
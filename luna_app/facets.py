@@ -0,0 +1,115 @@
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from .caching import content_generation
+from .models import Content, FacetCount
+
+# Posts per category, type and verification state. Counting them with
+# GROUP BY over the whole table on every page view gets slower as the table
+# grows, so FacetCount keeps one row per facet value and every write that
+# adds, removes, hides or re-verifies a post nudges those rows by the change.
+# Only public posts (not hidden, not deleted) are counted. rebuild() recounts
+# from scratch (the rebuild_facets command) if the rows ever drift.
+
+FACETS = ['category', 'content_type', 'ai_verified']
+FACET_CACHE_TIMEOUT = 300
+
+
+def counted(queryset):
+    """The rows of queryset that the facet counts include"""
+    return queryset.filter(is_hidden=False, deleted_at__isnull=True)
+
+
+def facet_value(facet, value):
+    if facet == 'ai_verified':
+        return 'true' if value else 'false'
+    return value
+
+
+def tally(queryset):
+    """Counter of (facet, value) -> counted rows in queryset, one GROUP BY per facet"""
+    totals = Counter()
+    for facet in FACETS:
+        rows = counted(queryset).order_by().values(facet).annotate(n=Count('pk'))
+        for row in rows:
+            totals[facet, facet_value(facet, row[facet])] += row['n']
+    return totals
+
+
+def post_values(post):
+    """The (facet, value) pairs a post counts towards, or none if it isn't counted"""
+    if post is None or post.is_hidden or post.deleted_at is not None:
+        return []
+    return [(facet, facet_value(facet, getattr(post, facet))) for facet in FACETS]
+
+
+def adjust(changes):
+    """Add each (facet, value) -> delta in changes to the stored counts"""
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    with transaction.atomic():
+        FacetCount.objects.bulk_create(
+            [FacetCount(facet=facet, value=value) for facet, value in changes],
+            ignore_conflicts=True
+        )
+        for (facet, value), delta in changes.items():
+            FacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+
+def adjust_between(before, after):
+    """Apply the difference between two tallies"""
+    changes = Counter(after)
+    changes.subtract(before)
+    adjust(changes)
+
+
+@contextmanager
+def tracking(queryset):
+    """
+    Keep the counts right across a bulk update() of queryset, which sends
+    no signals. Costs a GROUP BY per facet over the rows either side.
+    """
+    pks = list(queryset.values_list('pk', flat=True))
+    rows = Content.all_objects.filter(pk__in=pks)
+    before = tally(rows)
+    yield
+    adjust_between(before, tally(rows))
+
+
+def rebuild():
+    """Recount every facet from the content table"""
+    totals = tally(Content.all_objects.all())
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            FacetCount(facet=facet, value=value, count=count) for (facet, value), count in totals.items()
+        )
+    return totals
+
+
+def facet_counts():
+    """
+    Public post counts per facet value, including values with no posts,
+    from the FacetCount rows. Cached until content next changes.
+    """
+    key = f'facets:{content_generation()}'
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    data = {
+        'category': {value: 0 for value, label in Content.CATEGORIES},
+        'content_type': {value: 0 for value, label in Content.CONTENT_TYPES},
+        'ai_verified': {'true': 0, 'false': 0},
+    }
+    for facet, value, count in FacetCount.objects.values_list('facet', 'value', 'count'):
+        if facet in data:
+            data[facet][value] = count
+    data['total'] = sum(data['content_type'].values())
+    cache.set(key, data, FACET_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import Throttled
+
+# Password hashing (PBKDF2) is CPU bound. Running it on the request thread pins
+# every worker during signup/login bursts, so it is offloaded to a small
+# process pool. A bounded number of in-flight jobs keeps the queue from growing
+# without limit; callers over the limit get HashingBusy (a 429).
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class HashingBusy(Throttled):
+    default_detail = 'Too many login attempts in progress, please retry shortly.'
+
+    def __init__(self):
+        super().__init__(wait=getattr(settings, 'PASSWORD_HASHING_RETRY_AFTER', 2))
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'luna_project.settings')
+    import django
+    django.setup()
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(
+                getattr(settings, 'PASSWORD_HASHING_QUEUE_DEPTH', 32)
+            )
+        workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+        if _executor is None and workers > 0:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _executor, _slots
+
+
+def shutdown():
+    """Stop the hashing pool; it is recreated from settings on next use"""
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+        _slots = None
+
+
+def _discard(executor):
+    """Drop a broken pool; the next job starts a new one"""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def _submit(fn, *args):
+    """Start fn(*args). Returns (pool, future); the pool is None when hashing inline."""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    if executor is None:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        finally:
+            slots.release()
+        return None, future
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool as exc:
+        # Broken since its last job: fail like a job it lost
+        slots.release()
+        future = Future()
+        future.set_exception(exc)
+        return executor, future
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda f: slots.release())
+    return executor, future
+
+
+# A worker that dies (killed, out of memory) breaks the whole pool and fails
+# every job in it. Those jobs are retried once on a new pool.
+
+def _run(fn, *args):
+    executor, future = _submit(fn, *args)
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        _discard(executor)
+        return _submit(fn, *args)[1].result()
+
+
+async def _arun(fn, *args):
+    executor, future = _submit(fn, *args)
+    try:
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        _discard(executor)
+        return await asyncio.wrap_future(_submit(fn, *args)[1])
+
+
+def make_password(password):
+    return _run(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    return _run(hashers.check_password, password, encoded)
+
+
+async def amake_password(password):
+    return await _arun(hashers.make_password, password)
+
+
+async def acheck_password(password, encoded):
+    return await _arun(hashers.check_password, password, encoded)
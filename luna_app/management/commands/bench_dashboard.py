@@ -0,0 +1,89 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark loading the dashboard data: the sync endpoints one after '
+        'another through the WSGI handler vs /api/dashboard/ through the ASGI handler'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User to load (default: the one with most posts)')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        user = self._pick_user(options['username'])
+        self.wsgi_urls = [
+            '/api/profile/',
+            f'/api/content/?author={user.pk}&profile=card',
+            '/api/events/upcoming/',
+            '/api/notifications/unread_count/',
+        ]
+        self.stdout.write(f'user {user.username}, {options["requests"]} loads, concurrency {options["concurrency"]}')
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], RATELIMIT_ENABLED=False):
+            modes = [
+                ('wsgi', self._run_wsgi),
+                ('asgi', lambda *a: asyncio.run(self._run_asgi(*a))),
+            ]
+            for label, run in modes:
+                run(user, 3, 1)  # warm up connections, caches and the read pool
+                for concurrency in (1, options['concurrency']):
+                    latencies, elapsed = run(user, options['requests'], concurrency)
+                    self.stdout.write(
+                        f'{label:<6} x{concurrency:<3} {len(latencies) / elapsed:8.1f} loads/s  '
+                        f'p50 {statistics.median(latencies) * 1000:7.2f}ms  '
+                        f'p95 {statistics.quantiles(latencies, n=20)[-1] * 1000:7.2f}ms'
+                    )
+
+    def _pick_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            user = User.objects.annotate(posts=Count('contents')).order_by('-posts').first()
+        if user is None:
+            raise CommandError('No such user; create one or pass --username')
+        return user
+
+    def _run_wsgi(self, user, requests, concurrency):
+        session = Client()
+        session.force_login(user)
+
+        def load(_):
+            client = Client()
+            client.cookies = session.cookies
+            start = time.perf_counter()
+            for url in self.wsgi_urls:
+                assert client.get(url).status_code == 200, url
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(load, range(requests)))
+        return latencies, time.perf_counter() - start
+
+    async def _run_asgi(self, user, requests, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def load():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.get('/api/dashboard/')
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(load() for _ in range(requests)))
+        return latencies, time.perf_counter() - start
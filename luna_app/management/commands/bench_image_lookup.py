@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from luna_app.perceptual import HammingIndex
+
+
+class Command(BaseCommand):
+    help = 'Benchmark near-duplicate pHash lookup against a large synthetic index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--distance', type=int, default=8)
+
+    def handle(self, *args, **options):
+        size, queries, max_distance = options['size'], options['queries'], options['distance']
+        rng = np.random.default_rng(42)
+        hashes = rng.integers(-2**63, 2**63 - 1, size=size, dtype=np.int64)
+
+        # Half the queries are edited copies of indexed photos (a few bits
+        # flipped), the rest are new photos with no match
+        targets = rng.choice(size, queries // 2, replace=False)
+        flips = rng.integers(0, max_distance + 1, size=len(targets))
+        edited = hashes[targets].view(np.uint64).copy()
+        for row, count in enumerate(flips):
+            for bit in rng.choice(64, count, replace=False):
+                edited[row] ^= np.uint64(1) << np.uint64(bit)
+        fresh = rng.integers(-2**63, 2**63 - 1, size=queries - len(targets), dtype=np.int64)
+        probes = [int(v) for v in edited.view(np.int64)] + [int(v) for v in fresh]
+
+        start = time.perf_counter()
+        index = HammingIndex(np.arange(size), hashes)
+        build = time.perf_counter() - start
+        memory = index.hashes.nbytes + sum(values.nbytes + order.nbytes for values, order in index.tables)
+        self.stdout.write(f'Indexed {size:,} hashes in {build:.2f}s, {memory / 2**20:.0f} MiB')
+
+        timings, found = [], 0
+        for i, probe in enumerate(probes):
+            start = time.perf_counter()
+            matches = index.search(probe, max_distance)
+            timings.append(time.perf_counter() - start)
+            if i < len(targets) and any(pk == targets[i] for pk, distance in matches):
+                found += 1
+        timings = np.array(timings) * 1000
+        self.stdout.write(f'multi-index   p50 {np.percentile(timings, 50):6.3f} ms   '
+                          f'p99 {np.percentile(timings, 99):6.3f} ms   recall {found}/{len(targets)}')
+
+        unsigned = hashes.view(np.uint64)
+        timings = []
+        for probe in probes[:min(len(probes), 100)]:
+            start = time.perf_counter()
+            np.nonzero(np.bitwise_count(unsigned ^ np.int64(probe).view(np.uint64)) <= max_distance)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        self.stdout.write(f'linear scan   p50 {np.percentile(timings, 50):6.3f} ms   '
+                          f'p99 {np.percentile(timings, 99):6.3f} ms')
@@ -0,0 +1,95 @@
+import gzip
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from luna_app.renderers import FastJSONRenderer, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def feed_payload(posts, comments, likes):
+    """A paginated feed page shaped like ContentSerializer's full profile"""
+    def user(n):
+        return {
+            'id': n, 'username': f'stargazer{n}', 'email': f'stargazer{n}@example.com',
+            'first_name': 'Luna', 'last_name': 'Lovegood', 'date_joined': '2025-08-12T21:04:11.120000Z',
+        }
+
+    results = []
+    for i in range(posts):
+        results.append({
+            'id': str(uuid.uuid4()), 'author': user(i), 'content_type': 'photo',
+            'title': f'Andromeda over the ridge #{i}',
+            'description': 'Stacked 120 x 30s subs, Bortle 4, guided. ' * 3,
+            'content': 'Observation notes. ' * 60,
+            'image': f'/media/blobs/ab/cd/{uuid.uuid4().hex * 2}.jpg', 'image_url': None,
+            'location': 'Wadi Rum, Jordan', 'category': 'galaxy', 'ai_verified': True,
+            'ai_confidence': 0.93, 'ai_reason': 'Analyzed against astronomical database',
+            'created_at': '2025-10-21T02:00:00Z', 'updated_at': '2025-10-21T02:05:00Z',
+            'comments': [{
+                'id': str(uuid.uuid4()), 'user': user(c), 'text': 'Stunning detail in the dust lanes!',
+                'created_at': '2025-10-21T03:00:00Z', 'parent': None, 'replies': [],
+            } for c in range(comments)],
+            'likes': [{'id': str(uuid.uuid4()), 'user': user(l), 'created_at': '2025-10-21T03:00:00Z'}
+                      for l in range(likes)],
+            'likes_count': likes, 'comments_count': comments, 'is_liked': False,
+        })
+    return {'count': posts * 50, 'next': '/api/content/feed/?page=2', 'previous': None, 'results': results}
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON encode time and response size for feed payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=10)
+        parser.add_argument('--likes', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        payload = feed_payload(options['posts'], options['comments'], options['likes'])
+        repeat = options['repeat']
+
+        renderers = [('stdlib (DRF)', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        else:
+            self.stdout.write('orjson not installed; FastJSONRenderer uses the stdlib path')
+
+        self.stdout.write(f"{options['posts']} posts x {options['comments']} comments x {options['likes']} likes, "
+                          f'{repeat} renders each')
+        for label, renderer in renderers:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                body = renderer.render(payload)
+            per_render = (time.perf_counter() - start) / repeat * 1000
+            self.stdout.write(f'{label:<14} encode {per_render:7.3f} ms   {len(body):>9,} bytes')
+
+        parsed_start = time.perf_counter()
+        for _ in range(repeat):
+            json.loads(body)
+        stdlib_parse = (time.perf_counter() - parsed_start) / repeat * 1000
+        self.stdout.write(f'{"stdlib":<14} decode {stdlib_parse:7.3f} ms')
+        if orjson is not None:
+            parsed_start = time.perf_counter()
+            for _ in range(repeat):
+                orjson.loads(body)
+            self.stdout.write(f'{"orjson":<14} decode {(time.perf_counter() - parsed_start) / repeat * 1000:7.3f} ms')
+
+        codecs = [('gzip-6', lambda data: gzip.compress(data, 6))]
+        if brotli is not None:
+            codecs.append(('br-4', lambda data: brotli.compress(data, quality=4)))
+        for label, compress in codecs:
+            start = time.perf_counter()
+            for _ in range(max(repeat // 10, 1)):
+                compressed = compress(body)
+            per_call = (time.perf_counter() - start) / max(repeat // 10, 1) * 1000
+            self.stdout.write(f'{label:<14} compress {per_call:5.3f} ms  {len(compressed):>9,} bytes '
+                              f'({len(compressed) / len(body):.0%})')
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from luna_app import recommend
+
+
+class Command(BaseCommand):
+    help = 'Benchmark top-k related-post lookups over a large synthetic vector index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=6)
+
+    def handle(self, *args, **options):
+        posts, limit = options['posts'], options['limit']
+        rng = np.random.default_rng(7)
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = recommend.VectorStore(directory)
+            version, matrix = store.create(posts)
+            for offset in range(0, posts, 50_000):
+                block = rng.standard_normal((min(50_000, posts - offset), recommend.DIM), dtype=np.float32)
+                block /= np.linalg.norm(block, axis=1, keepdims=True)
+                matrix[offset:offset + len(block)] = block
+            matrix.flush()
+            ids = np.array([os.urandom(16).hex() for _ in range(posts)], dtype='S32')
+            store.commit(version, ids, np.zeros(recommend.DF_BUCKETS, np.int32), posts, timezone.now())
+            size = matrix.nbytes / 2**20
+            del matrix
+            self.stdout.write(f'{posts:,} posts x {recommend.DIM} float32 = {size:.0f} MiB memory-mapped')
+
+            keys = [key.decode() for key in ids[rng.choice(posts, options['queries'])]]
+            for label, vectors in (('memory-mapped', store.vectors), ('in memory', np.asarray(store.vectors[:posts]))):
+                store.vectors = vectors
+                timings = []
+                for key in keys:
+                    start = time.perf_counter()
+                    store.similar(np.asarray(vectors[store.rows[key]]), limit, exclude=key)
+                    timings.append(time.perf_counter() - start)
+                timings = np.array(timings) * 1000
+                self.stdout.write(f'{label:<14} top-{limit}  p50 {np.percentile(timings, 50):7.2f} ms   '
+                                  f'p99 {np.percentile(timings, 99):7.2f} ms')
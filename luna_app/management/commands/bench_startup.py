@@ -0,0 +1,94 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: import the WSGI app the way a server does (with
+# or without warm-up, per WARMUP_ENABLED), then time the first and second
+# request to each path. With "fork" the process forks once it is ready and
+# the child, like a preloaded gunicorn worker, connects and serves instead.
+SCRIPT = '''
+import json, os, sys, time
+spawned, fork, paths = float(sys.argv[1]), sys.argv[2] == 'fork', sys.argv[3:]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'luna_project.settings')
+from luna_project.wsgi import application
+from luna_app.warmup import connect, request
+
+def serve(origin):
+    if fork:
+        connect()
+    result = {'ready': time.time() - origin, 'first': [], 'second': [], 'status': []}
+    for key in ('first', 'second'):
+        for path in paths:
+            start = time.time()
+            status = request(application, path)
+            result[key].append(time.time() - start)
+            result['status'].append(status)
+    return result
+
+if not fork:
+    print(json.dumps(serve(spawned)))
+else:
+    read, write = os.pipe()
+    forked = time.time()
+    if os.fork() == 0:
+        os.write(write, json.dumps(serve(forked)).encode())
+        os._exit(0)
+    os.close(write)
+    with os.fdopen(read) as f:
+        result = json.loads(f.read())
+    os.wait()
+    result['boot'] = forked - spawned
+    print(json.dumps(result))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark time to first response of a fresh worker: cold, warmed up on '
+        'import, and forked from a warmed-up master (gunicorn preload_app)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=10)
+        parser.add_argument('paths', nargs='*', default=['/community/', '/api/content/feed/'])
+
+    def handle(self, *args, **options):
+        paths = options['paths']
+        modes = [('cold', False, 'spawn'), ('warm', True, 'spawn')]
+        if hasattr(os, 'fork'):
+            modes.append(('preforked', True, 'fork'))
+
+        self.stdout.write(f"{options['runs']} runs each; times are medians. 'ready' is process start to "
+                          f'accepting requests (from fork for preforked); first/second are request latencies.')
+        for label, warm, how in modes:
+            runs = [self._run(warm, how, paths) for _ in range(options['runs'])]
+            ready = statistics.median(run['ready'] for run in runs)
+            first = [statistics.median(run['first'][i] for run in runs) for i in range(len(paths))]
+            second = [statistics.median(run['second'][i] for run in runs) for i in range(len(paths))]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            if how == 'fork':
+                boot = statistics.median(run['boot'] for run in runs)
+                self.stdout.write(f"  {'master boot (once)':<24} {boot * 1000:8.1f}ms")
+            self.stdout.write(f"  {'ready':<24} {ready * 1000:8.1f}ms")
+            for path, first_s, second_s in zip(paths, first, second):
+                self.stdout.write(f'  {path:<24} {first_s * 1000:8.1f}ms first  {second_s * 1000:8.1f}ms second')
+            self.stdout.write(f"  {'time to first responses':<24} {(ready + sum(first)) * 1000:8.1f}ms")
+            failed = {status for run in runs for status in run['status'] if status >= 400}
+            if failed:
+                self.stdout.write(self.style.WARNING(f'  responses with status {sorted(failed)}'))
+
+    def _run(self, warm, how, paths):
+        env = {**os.environ, 'WARMUP_ENABLED': str(warm)}
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT, repr(time.time()), how, *paths],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        return json.loads(result.stdout.strip().splitlines()[-1])
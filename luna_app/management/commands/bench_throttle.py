@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from luna_app import ratelimit
+
+
+class PingView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response({'ok': True})
+
+
+class ThrottledPingView(PingView):
+    throttle_scope = 'bench'
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of the token-bucket rate limiter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=1000,
+                            help='distinct client IPs the requests are spread over')
+        parser.add_argument('--cache', default='default',
+                            help='cache alias to use as the shared bucket store')
+
+    def handle(self, *args, **options):
+        total, clients = options['requests'], options['clients']
+        # A rate nobody reaches, so every request takes the full (allowed) path
+        rates = {'bench': f'{total}/s'}
+
+        stores = [
+            ('in-process', ratelimit.RateLimiter(rates)),
+            (f"+ shared '{options['cache']}'",
+             ratelimit.RateLimiter(rates, shared=ratelimit.CacheBucketStore(options['cache']))),
+        ]
+        self.stdout.write(f'{total:,} checks over {clients:,} clients')
+        for label, limiter in stores:
+            start = time.perf_counter()
+            for i in range(total):
+                limiter.hit('bench', f'ip:10.0.{i % clients // 256}.{i % 256}')
+            per_check = (time.perf_counter() - start) / total * 1e6
+            self.stdout.write(f'{label:<24} {per_check:7.2f} us/check')
+
+        factory = APIRequestFactory()
+        requests = [factory.get('/ping/', REMOTE_ADDR=f'10.0.{i % clients // 256}.{i % 256}')
+                    for i in range(min(total, 5000))]
+        with override_settings(RATELIMIT_RATES=rates, RATELIMIT_CACHE=None):
+            ratelimit.reset()
+            for label, view in [('DRF view, no throttle', PingView.as_view()),
+                                ('DRF view, throttled', ThrottledPingView.as_view())]:
+                start = time.perf_counter()
+                for request in requests:
+                    view(request)
+                per_request = (time.perf_counter() - start) / len(requests) * 1e6
+                self.stdout.write(f'{label:<24} {per_request:7.2f} us/request')
+        ratelimit.reset()
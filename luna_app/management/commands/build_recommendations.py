@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from luna_app import recommend
+
+
+class Command(BaseCommand):
+    help = 'Build or refresh the "more like this" vectors for posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='rebuild everything (also recomputes term frequencies and drops deleted posts)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['full']:
+            count = recommend.build(options['batch_size'])
+            verb = 'Indexed'
+        else:
+            count = recommend.refresh(options['batch_size'])
+            verb = 'Refreshed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {count:,} posts in {time.perf_counter() - start:.1f}s'
+        ))
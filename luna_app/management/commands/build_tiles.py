@@ -0,0 +1,57 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from luna_app import tiles
+from luna_app.caching import bump_content_generation
+from luna_app.models import Content
+from luna_app.storage import media_storage
+
+
+class Command(BaseCommand):
+    help = 'Build deep-zoom tile pyramids for large posted photos that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='rebuild pyramids that already exist')
+        parser.add_argument('--workers', type=int, default=max(settings.TILE_WORKERS, 1))
+
+    def handle(self, *args, **options):
+        todo = Content.objects.exclude(Q(image='') | Q(image__isnull=True))
+        if not options['all']:
+            todo = todo.filter(has_tiles=False)
+        storage = media_storage()
+        names = sorted(set(todo.values_list('image', flat=True)))
+        large = [name for name in names if tiles.needs_tiles(storage.path(name))]
+        if options['all']:
+            for name in large:
+                tiles.remove_pyramid(name)
+
+        start, built, failed = time.perf_counter(), 0, 0
+        # A few big images at a time: each worker holds at most one in memory
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {
+                name: pool.submit(
+                    tiles.build_pyramid, storage.path(name), tiles.tile_root(), tiles.pyramid_key(name),
+                    settings.TILE_SIZE, settings.TILE_OVERLAP, settings.TILE_QUALITY, settings.TILE_MAX_PIXELS
+                )
+                for name in large
+            }
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f'Could not tile {name}: {exc}')
+                    continue
+                Content.all_objects.filter(image=name).update(has_tiles=True)
+                built += 1
+        if built:
+            bump_content_generation()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Tiled {built:,} of {len(names):,} photos in {elapsed:.1f}s '
+                          f'({len(names) - len(large):,} too small, {failed} failed)')
@@ -0,0 +1,46 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from luna_app.export import iter_ndjson, iter_zip
+
+
+class Command(BaseCommand):
+    help = "Export a user's (or the whole site's) content, comments, likes and media manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to export; omit for the whole site')
+        parser.add_argument('--output', choices=['ndjson', 'zip'], default='ndjson')
+        parser.add_argument('--media', action='store_true', help='Include media files (zip only)')
+        parser.add_argument('--file', help='Write here instead of stdout')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        if options['output'] == 'zip':
+            if not options['file']:
+                raise CommandError('--file is required for zip output')
+            chunks = iter_zip(user, options['media'])
+        else:
+            chunks = iter_ndjson(user)
+
+        out = open(options['file'], 'wb') if options['file'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['file']:
+                out.close()
+            else:
+                out.flush()
+
+        if options['file']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written:,} bytes to {options['file']}"))
@@ -0,0 +1,82 @@
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from luna_app.models import Content, MediaBlob, UserProfile
+from luna_app.storage import BLOB_DIR, is_blob_name, media_storage
+from luna_app.tiles import remove_pyramid
+
+
+class Command(BaseCommand):
+    help = 'Recount media blob references and delete blobs nothing references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report only, delete nothing')
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Keep unreferenced blobs younger than this (uploads still being saved)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        storage = media_storage()
+
+        # Mark: count live references from every field that uses the blob store
+        references = Counter()
+        for name in Content.objects.exclude(image='').values_list('image', flat=True).iterator(chunk_size=2000):
+            if is_blob_name(name):
+                references[name] += 1
+        for name in UserProfile.objects.exclude(profile_picture='').values_list(
+            'profile_picture', flat=True
+        ).iterator(chunk_size=2000):
+            if is_blob_name(name):
+                references[name] += 1
+
+        # Reconcile stored counts and sweep unreferenced blobs past the grace period
+        recounted = deleted = freed = 0
+        known = set()
+        for blob in MediaBlob.objects.iterator(chunk_size=2000):
+            known.add(blob.name)
+            count = references.get(blob.name, 0)
+            if count == 0 and blob.saved_at < cutoff:
+                deleted += 1
+                freed += blob.size
+                if not dry_run:
+                    self._remove(storage, blob.name)
+                    blob.delete()
+            elif count != blob.ref_count:
+                recounted += 1
+                if not dry_run:
+                    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=count)
+
+        # Files on disk with no MediaBlob row (and abandoned partial uploads)
+        strays = 0
+        blob_root = storage.path(BLOB_DIR)
+        oldest = time.time() - options['grace_hours'] * 3600
+        for dirpath, dirnames, filenames in os.walk(blob_root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                if name in known or references.get(name) or os.path.getmtime(path) > oldest:
+                    continue
+                strays += 1
+                freed += os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{deleted} blobs and {strays} stray files removed '
+            f'({freed / 1024 / 1024:.1f} MB), {recounted} reference counts corrected'
+        ))
+
+    def _remove(self, storage, name):
+        path = storage.path(name)
+        if os.path.exists(path):
+            os.remove(path)
+        remove_pyramid(name)
@@ -0,0 +1,86 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from luna_app import facets, perceptual
+from luna_app.models import Content
+from luna_app.storage import media_storage
+
+
+class Command(BaseCommand):
+    help = 'Compute perceptual hashes for posted photos and record duplicate_of for re-uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='rehash photos that already have hashes')
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.hash_images(options)
+        self.link_duplicates(options['batch_size'])
+        perceptual.reset()
+
+    def hash_images(self, options):
+        todo = Content.objects.exclude(Q(image='') | Q(image__isnull=True))
+        if not options['all']:
+            todo = todo.filter(image_phash__isnull=True)
+        storage = media_storage()
+        batch_size = options['batch_size']
+
+        start, hashed, failed = time.perf_counter(), 0, 0
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            rows = list(todo.values_list('pk', 'image'))
+            for offset in range(0, len(rows), batch_size):
+                batch = rows[offset:offset + batch_size]
+                results = pool.map(perceptual.try_image_hashes, [storage.path(name) for pk, name in batch], chunksize=16)
+                updates = []
+                for (pk, name), hashes in zip(batch, results):
+                    if hashes is None:
+                        failed += 1
+                        self.stderr.write(f'Could not read {name}')
+                        continue
+                    updates.append(Content(pk=pk, image_phash=hashes[0], image_dhash=hashes[1]))
+                Content.objects.bulk_update(updates, ['image_phash', 'image_dhash'])
+                hashed += len(updates)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Hashed {hashed:,} photos in {elapsed:.1f}s ({failed} unreadable)')
+
+    def link_duplicates(self, batch_size):
+        """Replay posts in creation order; each is a duplicate of the earliest earlier match"""
+        max_distance = getattr(settings, 'DUPLICATE_IMAGE_DISTANCE', 8)
+        rows = list(Content.objects.filter(image_phash__isnull=False).order_by('created_at', 'pk')
+                    .values_list('pk', 'author_id', 'image_phash', 'image_dhash', 'duplicate_of_id',
+                                 'category', 'location', 'created_at'))
+        position = {row[0]: i for i, row in enumerate(rows)}
+        index = perceptual.HammingIndex([row[0] for row in rows], [row[2] for row in rows])
+
+        roots, changed = {}, []
+        for i, (pk, author_id, phash, dhash, duplicate_of_id, category, location, created_at) in enumerate(rows):
+            earlier = [
+                position[match] for match, distance in index.search(phash, max_distance)
+                if position[match] < i and perceptual.hamming(rows[position[match]][3], dhash) <= max_distance * 2
+            ]
+            original = rows[min(earlier)] if earlier else None
+            root = roots.get(original[0], original[0]) if original else None
+            if root is not None:
+                roots[pk] = root
+            if root == duplicate_of_id:
+                continue
+            content = Content(pk=pk, category=category, location=location, created_at=created_at)
+            if root is not None:
+                perceptual.mark_duplicate(content, root, original[1] == author_id)
+            else:
+                # No longer a duplicate: replace the duplicate verdict
+                perceptual.clear_duplicate(content)
+            changed.append(content)
+
+        for offset in range(0, len(changed), batch_size):
+            batch = changed[offset:offset + batch_size]
+            with facets.tracking(Content.all_objects.filter(pk__in=[content.pk for content in batch])):
+                Content.objects.bulk_update(batch, ['duplicate_of', 'ai_verified', 'ai_confidence', 'ai_reason'])
+        self.stdout.write(f'{len(roots):,} of {len(rows):,} photos are duplicates; {len(changed):,} links updated')
@@ -0,0 +1,84 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter under -X importtime: each start-up phase is timed
+# and printed as JSON on stdout, the import log goes to stderr
+SCRIPT = '''
+import json, os, time
+start = time.perf_counter()
+phases = []
+def mark(name):
+    global start
+    now = time.perf_counter()
+    phases.append((name, now - start))
+    start = now
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'luna_project.settings')
+import django
+mark('import django')
+django.setup()
+mark('django.setup() (settings, apps, models)')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+mark('WSGI handler (middleware)')
+from django.urls import get_resolver
+get_resolver().url_patterns
+mark('URLconf (views, serializers)')
+from luna_app.warmup import warm_up
+phases.extend(('warm-up: ' + name, seconds) for name, seconds in warm_up(application))
+print(json.dumps(phases))
+'''
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$')
+
+
+class Command(BaseCommand):
+    help = 'Report where a fresh worker spends its start-up time: phases, and imports by package'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Modules to list by cumulative import time')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'WARMUP_ENABLED': 'True'}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Start-up phases'))
+        for name, seconds in phases:
+            self.stdout.write(f'  {name:<42} {seconds * 1000:8.1f}ms')
+        self.stdout.write(f"  {'total':<42} {sum(s for _, s in phases) * 1000:8.1f}ms")
+
+        # (own us, cumulative us, module) per import
+        imports = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                imports.append((int(match[1]), int(match[2]), match[3]))
+
+        by_package = defaultdict(int)
+        for own, _, module in imports:
+            by_package[module.split('.')[0]] += own
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time by package (own time)'))
+        for package, micros in sorted(by_package.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {package:<42} {micros / 1000:8.1f}ms')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Slowest imports (including what they import)'))
+        for _, cumulative, module in sorted(imports, key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {module:<42} {cumulative / 1000:8.1f}ms')
+
+        app_imports = [(cumulative, module) for _, cumulative, module in imports if module.startswith('luna_')]
+        self.stdout.write(self.style.MIGRATE_HEADING('Project modules (including what they import)'))
+        for cumulative, module in sorted(app_imports, reverse=True):
+            self.stdout.write(f'  {module:<42} {cumulative / 1000:8.1f}ms')
@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from luna_app import purge
+
+
+class Command(BaseCommand):
+    help = 'Hard-delete soft-deleted accounts, posts and comments in small batches, and their media files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=float, default=None,
+            help='Only rows deleted at least this many hours ago (default PURGE_AFTER_HOURS)'
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=settings.PURGE_BATCH_PAUSE,
+            help='Seconds to sleep between batches so other writers get the database'
+        )
+
+    def handle(self, *args, **options):
+        older_than = options['older_than']
+        start = time.perf_counter()
+        deleted = purge.purge(
+            older_than=None if older_than is None else timedelta(hours=older_than),
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+        )
+        freed = deleted.pop('media bytes', 0)
+        summary = ', '.join(f'{count} {label}' for label, count in sorted(deleted.items())) or 'nothing'
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {summary}; freed {freed / 1024 / 1024:.1f} MB of media in {time.perf_counter() - start:.1f}s'
+        ))
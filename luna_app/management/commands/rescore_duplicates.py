@@ -0,0 +1,99 @@
+import heapq
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from luna_app import dedup
+from luna_app.models import Comment, Content, TextSignature
+
+
+def _rows(queryset, field, kind, batch_size):
+    """(created_at, kind, pk, text) in creation order, signed in vectorized batches"""
+    batch = []
+    for row in queryset.order_by('created_at').values_list('created_at', 'pk', field).iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield from _signed(batch, kind)
+            batch = []
+    yield from _signed(batch, kind)
+
+
+def _signed(batch, kind):
+    for (created_at, pk, text), sig in zip(batch, dedup.signatures([row[2] for row in batch])):
+        yield created_at, kind, pk, sig
+
+
+class Command(BaseCommand):
+    help = 'Recompute text signatures for all comments and posts and re-flag near-duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='report duplicates without saving anything')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        threshold = getattr(settings, 'DUPLICATE_TEXT_THRESHOLD', 0.8)
+        index = dedup.DuplicateIndex()
+        flagged = Counter()
+        pending, seen = [], 0
+
+        start = time.perf_counter()
+        # Replay the corpus in creation order: a text is a duplicate if it
+        # matches anything posted before it
+        stream = heapq.merge(
+            _rows(Content.objects.all(), 'description', 'content', batch_size),
+            _rows(Comment.objects.all(), 'text', 'comment', batch_size),
+            key=lambda row: row[0],
+        )
+        for created_at, kind, pk, sig in stream:
+            seen += 1
+            duplicate = sig is not None and bool(index.query(sig, threshold))
+            flagged[kind] += duplicate
+            if sig is not None:
+                index.add((kind, pk), sig)
+            if not dry_run:
+                pending.append((kind, pk, sig, duplicate))
+                if len(pending) == batch_size:
+                    self._save(pending)
+                    pending = []
+
+        if not dry_run:
+            self._save(pending)
+            # Hidden texts were not replayed; drop what is left of them
+            TextSignature.objects.filter(
+                Q(content__deleted_at__isnull=False) | Q(comment__deleted_at__isnull=False)
+            ).delete()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'Scored {seen:,} texts in {elapsed:.1f}s ({seen / max(elapsed, 1e-9):,.0f}/s); '
+                          f"{len(index):,} signed, {flagged['comment']:,} duplicate comments, "
+                          f"{flagged['content']:,} duplicate posts")
+        if not dry_run:
+            dedup.reset()
+            self.stdout.write(self.style.SUCCESS('Saved signatures and flags'))
+
+    def _save(self, rows):
+        """
+        Replace the signatures and flags of one batch of texts. Each batch is
+        its own transaction, so a long rescore never holds the write lock for
+        more than one batch and live posting carries on in between.
+        """
+        with transaction.atomic():
+            for kind, model in (('content', Content), ('comment', Comment)):
+                batch = [(pk, sig, duplicate) for row_kind, pk, sig, duplicate in rows if row_kind == kind]
+                if not batch:
+                    continue
+                TextSignature.objects.filter(**{f'{kind}_id__in': [pk for pk, _, _ in batch]}).delete()
+                TextSignature.objects.bulk_create(
+                    TextSignature(signature=sig.tobytes(), **{f'{kind}_id': pk})
+                    for pk, sig, _ in batch if sig is not None
+                )
+                for value in (True, False):
+                    model.objects.filter(
+                        pk__in=[pk for pk, _, duplicate in batch if duplicate is value]
+                    ).exclude(flagged=value).update(flagged=value)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from luna_app import analytics
+
+
+class Command(BaseCommand):
+    help = 'Roll the activity log up into hourly and daily counts, or backfill them from the content tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', help='Recount from this ISO datetime (default: just before the newest rollup)'
+        )
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='Count posts, likes and comments from before the activity log started'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None or since.tzinfo is None:
+                raise CommandError('--since must be an ISO datetime with a time zone')
+
+        start = time.perf_counter()
+        if options['backfill']:
+            counted = analytics.backfill(start=since)
+            self.stdout.write(f'Backfilled {counted:,} events in {time.perf_counter() - start:.1f}s')
+            return
+        # Anything this process still has buffered goes in first
+        analytics.flush()
+        rolled_from = analytics.roll_up(since)
+        if rolled_from is None:
+            self.stdout.write('The activity log is empty')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up activity since {rolled_from:%Y-%m-%d %H:%M} in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from luna_app import notifications
+
+
+class Command(BaseCommand):
+    help = 'Email each user a digest of their unread notifications not sent in an earlier digest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Users per batch of emails')
+        parser.add_argument('--limit', type=int, default=20, help='Notifications listed per email')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        # Write out anything this process still has buffered first
+        notifications.flush()
+        sent = notifications.send_digests(batch_size=options['batch_size'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {sent} digests in {time.perf_counter() - start:.1f}s'
+        ))
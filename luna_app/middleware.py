@@ -0,0 +1,163 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+
+def may_hold_secrets(request, response):
+    """
+    Whether the response could carry a secret next to reflected input, the
+    setting BREACH needs: HTML (CSRF tokens), anything for a request with
+    cookies or credentials, and anything setting a cookie
+    """
+    return bool(
+        response.get('Content-Type', '').startswith('text/html')
+        or request.META.get('HTTP_COOKIE')
+        or request.META.get('HTTP_AUTHORIZATION')
+        or response.cookies
+    )
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress text and JSON responses with brotli when the client accepts it,
+    otherwise gzip. Media (already compressed images, range responses) is
+    passed through untouched; static files are precompressed by WhiteNoise.
+
+    Brotli has no room for the random padding GZipMiddleware adds against
+    BREACH, so responses that may hold secrets always get padded gzip.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or not re_accepts_brotli.search(ae) or may_hold_secrets(request, response):
+            return super().process_response(request, response)
+
+        # Same guards as GZipMiddleware
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        quality = getattr(settings, 'BROTLI_QUALITY', 4)
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=quality)
+                    async for chunk in original_iterator:
+                        yield compressor.process(chunk) + compressor.flush()
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = self._compress_sequence(response.streaming_content, quality)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=quality)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    @staticmethod
+    def _compress_sequence(sequence, quality):
+        compressor = brotli.Compressor(quality=quality)
+        for chunk in sequence:
+            # Flush per chunk so streamed data reaches the client promptly
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, usable from async requests. WhiteNoise's middleware is sync
+    only, and one sync middleware at the top of the stack makes Django run
+    every request under ASGI on a thread, async views included. Static
+    lookups are a dict get, so only serving a file leaves the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+_DONE = object()
+
+
+async def _aiterate(iterator):
+    """Pull a sync iterator's parts one at a time on the request's sync thread"""
+    next_part = sync_to_async(next)
+    while (part := await next_part(iterator, _DONE)) is not _DONE:
+        yield part
+
+
+class AsyncStreamingMiddleware:
+    """
+    Under ASGI, Django reads a streaming response's sync iterator into a list
+    before sending the first byte, so exports, ?stream=1 lists and media
+    ranges would be held in memory whole. This hands the server an async
+    iterator that pulls one part at a time instead. List it below
+    CompressionMiddleware, which then compresses the async stream.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _aiterate(iter(response.streaming_content))
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:00
+
+import luna_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=luna_app.storage.media_storage, upload_to='astrophotos/'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=luna_app.storage.media_storage, upload_to='profile_pics/'),
+        ),
+    ]
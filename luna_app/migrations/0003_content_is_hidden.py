@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0002_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='is_hidden',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0004_comment_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='luna_app.content'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='image_dhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='image_phash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0005_content_image_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='content_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from luna_app.articles import render
+
+
+def render_articles(apps, schema_editor):
+    Content = apps.get_model('luna_app', 'Content')
+    rendered = []
+    posts = Content.objects.exclude(content__isnull=True).exclude(content='').only('pk', 'content')
+    for post in posts.iterator(chunk_size=500):
+        for field, value in render(post.content).items():
+            setattr(post, field, value)
+        rendered.append(post)
+        if len(rendered) == 500:
+            Content.objects.bulk_update(rendered, ['content_html', 'excerpt', 'word_count', 'reading_time'])
+            rendered = []
+    Content.objects.bulk_update(rendered, ['content_html', 'excerpt', 'word_count', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0006_content_rendered_article'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_articles, migrations.RunPython.noop),
+    ]
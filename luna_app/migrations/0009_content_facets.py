@@ -0,0 +1,60 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_facets(apps, schema_editor):
+    Content = apps.get_model('luna_app', 'Content')
+    FacetCount = apps.get_model('luna_app', 'FacetCount')
+    public = Content.objects.filter(is_hidden=False, deleted_at__isnull=True).order_by()
+    rows = []
+    for facet in ['category', 'content_type', 'ai_verified']:
+        for row in public.values(facet).annotate(n=Count('pk')):
+            value = row[facet]
+            if facet == 'ai_verified':
+                value = 'true' if value else 'false'
+            rows.append(FacetCount(facet=facet, value=value, count=row['n']))
+    FacetCount.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0008_soft_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['category', '-created_at'], name='content_category_created'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['content_type', '-created_at'], name='content_type_created'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['author', '-created_at'], name='content_author_created'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['ai_verified', '-created_at'], name='content_verified_created'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='facetcount',
+            unique_together={('facet', 'value')},
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0011_content_has_tiles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('like', 'Like'), ('comment', 'Comment')], max_length=10)),
+                ('category', models.CharField(blank=True, default='', max_length=20)),
+                ('content_type', models.CharField(blank=True, default='', max_length=10)),
+                ('content_id', models.UUIDField(blank=True, null=True)),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('like', 'Like'), ('comment', 'Comment')], max_length=10)),
+                ('category', models.CharField(blank=True, default='', max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('period', 'kind', 'bucket', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:05
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_existing(apps, schema_editor):
+    # Existing events were last changed when they were created, as far as we know
+    CosmicEvent = apps.get_model('luna_app', 'CosmicEvent')
+    CosmicEvent.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0012_activity_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cosmicevent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='cosmicevent',
+            index=models.Index(fields=['event_type', 'event_date'], name='cosmic_event_type_date'),
+        ),
+        migrations.RunPython(stamp_existing, migrations.RunPython.noop),
+    ]
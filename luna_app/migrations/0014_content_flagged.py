@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0013_cosmic_event_feeds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='flagged',
+            field=models.BooleanField(default=False),
+        ),
+    ]
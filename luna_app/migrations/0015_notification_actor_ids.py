@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+def fill_actor_ids(apps, schema_editor):
+    # Older rows only know their last actor; earlier ones were never stored
+    Notification = apps.get_model('luna_app', 'Notification')
+    rows = Notification.objects.filter(last_actor__isnull=False).only('pk', 'last_actor_id')
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        row.actor_ids = [row.last_actor_id]
+        batch.append(row)
+        if len(batch) >= 2000:
+            Notification.objects.bulk_update(batch, ['actor_ids'])
+            batch = []
+    Notification.objects.bulk_update(batch, ['actor_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0014_content_flagged'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(fill_actor_ids, migrations.RunPython.noop),
+    ]
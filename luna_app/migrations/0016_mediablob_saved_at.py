@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('luna_app', '0015_notification_actor_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='saved_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
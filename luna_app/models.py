@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
+from .articles import render as render_article
+from .storage import media_storage
 
 class CosmicEvent(models.Model):
     EVENT_TYPES = [
@@ -18,9 +20,14 @@ class CosmicEvent(models.Model):
     event_date = models.DateTimeField()
     event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['event_date']
+        indexes = [
+            # Calendar feeds filtered by type
+            models.Index(fields=['event_type', 'event_date'], name='cosmic_event_type_date'),
+        ]
     
     def __str__(self):
         return self.title
@@ -29,12 +36,25 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', storage=media_storage, blank=True, null=True)
     join_date = models.DateTimeField(auto_now_add=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)  # Account deleted, see purge.py
     
     def __str__(self):
         return f"{self.user.username}'s profile"
 
+class SoftDeleteManager(models.Manager):
+    """Default manager that leaves out soft-deleted rows; use all_objects to see them"""
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class ContentQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Hide moderated posts from everyone but their author"""
+        if user is not None and user.is_authenticated:
+            return self.filter(models.Q(is_hidden=False) | models.Q(author=user))
+        return self.filter(is_hidden=False)
+
 class Content(models.Model):
     CONTENT_TYPES = [
         ('photo', 'Photo'),
@@ -63,28 +83,66 @@ class Content(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     content = models.TextField(blank=True, null=True)  # For articles
-    image = models.ImageField(upload_to='astrophotos/', blank=True, null=True)
+    # Rendered from content on save, see articles.py
+    content_html = models.TextField(blank=True, default='')
+    excerpt = models.CharField(max_length=500, blank=True, default='')
+    word_count = models.PositiveIntegerField(default=0)
+    reading_time = models.PositiveSmallIntegerField(default=0)  # Minutes
+    image = models.ImageField(upload_to='astrophotos/', storage=media_storage, blank=True, null=True)
     image_url = models.URLField(blank=True, null=True)  # For external images
     location = models.CharField(max_length=100, blank=True, null=True)
     category = models.CharField(max_length=20, choices=CATEGORIES)
     ai_verified = models.BooleanField(default=False)
     ai_confidence = models.FloatField(default=0.0)
     ai_reason = models.CharField(max_length=200, blank=True, null=True)
+    is_hidden = models.BooleanField(default=False)  # Hidden by moderators
+    flagged = models.BooleanField(default=False)  # Description near-duplicates earlier text
+    image_phash = models.BigIntegerField(blank=True, null=True)  # Perceptual hashes, see perceptual.py
+    image_dhash = models.BigIntegerField(blank=True, null=True)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
+    has_tiles = models.BooleanField(default=False)  # Deep-zoom pyramid built, see tiles.py
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)  # Soft-deleted, see purge.py
+    
+    objects = SoftDeleteManager.from_queryset(ContentQuerySet)()
+    all_objects = ContentQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        # One per way the API lists posts: newest first within a filter
+        indexes = [
+            models.Index(fields=['category', '-created_at'], name='content_category_created'),
+            models.Index(fields=['content_type', '-created_at'], name='content_type_created'),
+            models.Index(fields=['author', '-created_at'], name='content_author_created'),
+            models.Index(fields=['ai_verified', '-created_at'], name='content_verified_created'),
+        ]
     
     def __str__(self):
         return f"{self.content_type}: {self.title}"
     
+    def save(self, *args, **kwargs):
+        # Render the article body once here rather than on every read
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            rendered = render_article(self.content)
+            for field, value in rendered.items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *rendered}
+        super().save(*args, **kwargs)
+    
     @property
     def likes_count(self):
+        # Querysets may annotate the count up front (see ContentSerializer.optimize_queryset)
+        if hasattr(self, 'likes_total'):
+            return self.likes_total
         return self.likes.count()
     
     @property
     def comments_count(self):
+        if hasattr(self, 'comments_total'):
+            return self.comments_total
         return self.comments.count()
 
 class Like(models.Model):
@@ -105,8 +163,13 @@ class Comment(models.Model):
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='comments')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     text = models.TextField()
+    flagged = models.BooleanField(default=False)  # Near-duplicate of earlier text
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)  # Soft-deleted, see purge.py
+    
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
     
     class Meta:
         ordering = ['created_at']
@@ -116,4 +179,113 @@ class Comment(models.Model):
     
     @property
     def is_reply(self):
-        return self.parent is not None
\ No newline at end of file
+        return self.parent is not None
+
+class MediaBlob(models.Model):
+    """A content-addressed media file, shared by every field that stores the same bytes"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    saved_at = models.DateTimeField(default=timezone.now)  # Last uploaded, see storage.SAVE_GRACE
+    
+    def __str__(self):
+        return self.name
+
+class TextSignature(models.Model):
+    """MinHash signature of a comment's text or a post's description, for near-duplicate lookup"""
+    comment = models.OneToOneField(Comment, on_delete=models.CASCADE, null=True, blank=True, related_name='signature')
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, null=True, blank=True, related_name='signature')
+    signature = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Signature of {'comment' if self.comment_id else 'content'} {self.comment_id or self.content_id}"
+
+class FacetCount(models.Model):
+    """Public posts with one facet value (e.g. category=nebula), kept up to date by facets.py"""
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['facet', 'value']
+    
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+class Notification(models.Model):
+    """
+    Likes or comments on a recipient's post. Events arriving within
+    NOTIFICATION_COALESCE_MINUTES share one unread row ("N people liked your
+    photo"), see notifications.py.
+    """
+    VERBS = [
+        ('like', 'Like'),
+        ('comment', 'Comment'),
+        ('reply', 'Reply'),
+    ]
+    
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    verb = models.CharField(max_length=10, choices=VERBS)
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='notifications')
+    last_actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    actor_ids = models.JSONField(default=list)  # Distinct users coalesced into this row
+    actor_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    digested_at = models.DateTimeField(blank=True, null=True)  # Included in an email digest
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)  # Last event coalesced into this row
+    
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read', '-updated_at'], name='notification_inbox'),
+            models.Index(fields=['content', 'verb', 'is_read'], name='notification_coalesce'),
+        ]
+    
+    def __str__(self):
+        return f"{self.verb} x{self.actor_count} for {self.recipient_id}"
+
+class ActivityEvent(models.Model):
+    """
+    Append-only log of posts, likes and comments, rolled up into
+    ActivityRollup by analytics.py. Ids are copied rather than linked so
+    the log outlives purged rows.
+    """
+    KINDS = [
+        ('post', 'Post'),
+        ('like', 'Like'),
+        ('comment', 'Comment'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    category = models.CharField(max_length=20, blank=True, default='')  # Of the post involved
+    content_type = models.CharField(max_length=10, blank=True, default='')
+    content_id = models.UUIDField(blank=True, null=True)
+    user_id = models.IntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.kind} at {self.created_at:%Y-%m-%d %H:%M}"
+
+class ActivityRollup(models.Model):
+    """Events of one kind and category in one hour or day, from the activity log"""
+    PERIODS = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    period = models.CharField(max_length=4, choices=PERIODS)
+    bucket = models.DateTimeField()  # Start of the hour or day, UTC
+    kind = models.CharField(max_length=10, choices=ActivityEvent.KINDS)
+    category = models.CharField(max_length=20, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['period', 'kind', 'bucket', 'category']
+    
+    def __str__(self):
+        return f"{self.kind}/{self.category} {self.period} {self.bucket:%Y-%m-%d %H:%M}: {self.count}"
@@ -0,0 +1,159 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+from .tasks import BatchBuffer
+
+# A popular photo can collect hundreds of likes a minute. Writing a row per
+# like would make the notification table the busiest writer in the app, so
+# notify() only adds the event to a BatchBuffer. Each batch written (after
+# NOTIFICATION_FLUSH_SECONDS, or NOTIFICATION_BATCH_SIZE events) is grouped
+# per (recipient, verb, post) and becomes one row per group: the recipient's
+# unread row for that post is bumped if one was touched within
+# NOTIFICATION_COALESCE_MINUTES, and a new one inserted otherwise. A like
+# storm costs a few UPDATEs per batch, however many likes arrive. Rows keep
+# the ids of their distinct actors, so "and 3 others" counts people: someone
+# commenting five times is one of them.
+
+
+def notify(recipient, actor, verb, content):
+    """Queue a notification for recipient that actor did verb on content"""
+    if recipient is None or recipient.pk == actor.pk:
+        return
+    _buffer.add((recipient.pk, verb, content.pk, actor.pk, timezone.now()))
+
+
+def _write(events):
+    """Write buffered events, one row per (recipient, verb, post)"""
+    # (recipient, verb, content) -> [actors in order, last actor, last time]
+    groups = {}
+    for recipient_id, verb, content_id, actor_id, at in events:
+        group = groups.setdefault((recipient_id, verb, content_id), [{}, actor_id, at])
+        group[0][actor_id] = None
+        if at >= group[2]:
+            group[1], group[2] = actor_id, at
+
+    since = timezone.now() - timedelta(minutes=settings.NOTIFICATION_COALESCE_MINUTES)
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+    with transaction.atomic():
+        open_rows = {}
+        # Locked, as another process may be merging into the same rows
+        candidates = Notification.objects.select_for_update().filter(
+            is_read=False, updated_at__gte=since,
+            content_id__in={content_id for _, _, content_id in groups},
+            verb__in={verb for _, verb, _ in groups},
+        ).order_by('updated_at').only('pk', 'recipient_id', 'verb', 'content_id', 'actor_ids')
+        for row in candidates:
+            open_rows[row.recipient_id, row.verb, row.content_id] = row
+
+        updated, created = [], []
+        for key, (actors, actor_id, at) in groups.items():
+            row = open_rows.get(key)
+            if row is not None:
+                row.actor_ids = list(dict.fromkeys(row.actor_ids + list(actors)))
+                row.actor_count = len(row.actor_ids)
+                row.last_actor_id = actor_id
+                row.updated_at = at
+                updated.append(row)
+            else:
+                recipient_id, verb, content_id = key
+                created.append(Notification(
+                    recipient_id=recipient_id, verb=verb, content_id=content_id, last_actor_id=actor_id,
+                    actor_ids=list(actors), actor_count=len(actors), created_at=at, updated_at=at,
+                ))
+        Notification.objects.bulk_update(
+            updated, ['actor_ids', 'actor_count', 'last_actor', 'updated_at'], batch_size=batch_size
+        )
+        Notification.objects.bulk_create(created, batch_size=batch_size)
+
+
+_buffer = BatchBuffer(_write, 'NOTIFICATION_BATCH_SIZE', 'NOTIFICATION_FLUSH_SECONDS')
+
+
+def flush():
+    """Write the buffered events now. Returns the number of events."""
+    return _buffer.flush()
+
+
+def inbox(user):
+    """The user's notifications, leaving out those on deleted posts"""
+    return Notification.objects.filter(recipient=user, content__deleted_at__isnull=True)
+
+
+def unread_count(user):
+    """
+    Unread notifications for user. Counted in the database (an index range
+    scan on notification_inbox), so every worker agrees on it as soon as a
+    batch is written or mark_read() runs.
+    """
+    return inbox(user).filter(is_read=False).count()
+
+
+def mark_read(user, ids=None):
+    """Mark the user's notifications (all, or just ids) read. Returns how many changed."""
+    queryset = Notification.objects.filter(recipient=user, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset.update(is_read=True)
+
+
+def describe(notification):
+    """'stella and 3 others liked your photo "M42"'"""
+    actor = notification.last_actor.username if notification.last_actor else 'Someone'
+    others = notification.actor_count - 1
+    if others > 0:
+        actor += f" and {others} {'other' if others == 1 else 'others'}"
+    action = {
+        'like': 'liked',
+        'comment': 'commented on',
+        'reply': 'replied to a comment on',
+    }[notification.verb]
+    return f'{actor} {action} your {notification.content.content_type} "{notification.content.title}"'
+
+
+def send_digests(batch_size=200, limit=20):
+    """
+    Email each user with unread notifications not yet in a digest one
+    message listing up to limit of them, then mark them digested. Returns
+    the number of emails sent.
+    """
+    pending = Notification.objects.filter(
+        is_read=False, digested_at__isnull=True, content__deleted_at__isnull=True
+    )
+    recipients = list(
+        User.objects.filter(is_active=True, pk__in=pending.values('recipient_id'))
+        .exclude(email='').order_by('pk').values_list('pk', 'username', 'email')
+    )
+    sent = 0
+    connection = get_connection()
+    for start in range(0, len(recipients), batch_size):
+        batch = recipients[start:start + batch_size]
+        by_recipient = defaultdict(list)
+        rows = (pending.filter(recipient_id__in=[pk for pk, _, _ in batch])
+                .select_related('last_actor', 'content').order_by('-updated_at'))
+        for row in rows:
+            by_recipient[row.recipient_id].append(row)
+
+        messages, digested = [], []
+        for pk, username, email in batch:
+            rows = by_recipient.get(pk)
+            if not rows:
+                continue
+            lines = [f'- {describe(row)}' for row in rows[:limit]]
+            if len(rows) > limit:
+                lines.append(f'...and {len(rows) - limit} more')
+            messages.append(EmailMessage(
+                subject=f'Luna: {len(rows)} new notification{"s" if len(rows) != 1 else ""}',
+                body=f'Hi {username},\n\nWhile you were away:\n\n' + '\n'.join(lines) + '\n',
+                to=[email],
+            ))
+            digested.extend(row.pk for row in rows)
+        sent += connection.send_messages(messages) or 0
+        Notification.objects.filter(pk__in=digested).update(digested_at=timezone.now())
+    return sent
@@ -0,0 +1,263 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Perceptual hashes of uploaded photos, for spotting re-uploads of the same
+# shot (resized, recompressed or lightly edited). Both are 64-bit:
+#   pHash - signs of the 8x8 lowest frequencies of a 32x32 DCT; robust to
+#           scaling, compression and small colour changes.
+#   dHash - whether each pixel of a 9x8 thumbnail is brighter than its right
+#           neighbour; cheap, used to confirm pHash matches.
+# Hashes are stored as signed 64-bit integers (BigIntegerField).
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+CHUNKS = 4
+CHUNK_BITS = 64 // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(DCT_SIZE)
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(values):
+    return np.asarray(values, dtype=np.int64).view(np.uint64)
+
+
+def image_hashes(file):
+    """(phash, dhash) of an image file or path, as signed 64-bit ints"""
+    with Image.open(file) as img:
+        # Let the JPEG decoder scale down while decoding (1/2 .. 1/8)
+        img.draft('L', (DCT_SIZE * 2, DCT_SIZE * 2))
+        gray = img.convert('L')
+
+    pixels = np.asarray(gray.resize((DCT_SIZE, DCT_SIZE), Image.Resampling.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    phash = _bits_to_int(low > np.median(low[1:]))
+
+    thumb = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS), dtype=np.int16)
+    dhash = _bits_to_int(thumb[:, 1:] > thumb[:, :-1])
+    return to_signed(phash), to_signed(dhash)
+
+
+def try_image_hashes(path):
+    """image_hashes() for bulk indexing: None for missing or unreadable files"""
+    try:
+        return image_hashes(path)
+    except (OSError, ValueError):
+        return None
+
+
+def hamming(a, b):
+    return ((a ^ b) & ((1 << 64) - 1)).bit_count()
+
+
+@lru_cache(maxsize=None)
+def _probe_masks(radius):
+    """Every CHUNK_BITS-bit mask with at most radius bits set"""
+    values = np.arange(1 << CHUNK_BITS, dtype=np.uint32)
+    return values[np.bitwise_count(values) <= radius].astype(np.uint64)
+
+
+class HammingIndex:
+    """
+    Multi-index hashing over 64-bit hashes. Each hash is split into 4
+    16-bit chunks, with one sorted table per chunk. If two hashes differ in
+    at most d bits, some chunk differs in at most d // 4 bits (pigeonhole).
+    So a search probes each table for the query's chunk with every
+    variation of up to d // 4 flipped bits, then checks the full distance of
+    the candidates.
+    """
+
+    def __init__(self, ids, hashes):
+        self.ids = np.asarray(ids, dtype=object)
+        self.hashes = to_unsigned(hashes)
+        self.tables = []
+        for chunk in range(CHUNKS):
+            values = (self.hashes >> np.uint64(chunk * CHUNK_BITS)) & np.uint64(CHUNK_MASK)
+            order = np.argsort(values, kind='stable')
+            self.tables.append((values[order], order))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, value, max_distance):
+        """[(id, distance)] of hashes within max_distance bits of value, nearest first"""
+        if not len(self.ids):
+            return []
+        query = to_unsigned([value])[0]
+        masks = _probe_masks(max_distance // CHUNKS)
+        found = []
+        for chunk, (values, order) in enumerate(self.tables):
+            probes = np.sort(((query >> np.uint64(chunk * CHUNK_BITS)) & np.uint64(CHUNK_MASK)) ^ masks)
+            starts = np.searchsorted(values, probes, 'left')
+            lengths = np.searchsorted(values, probes, 'right') - starts
+            # Positions start..end-1 of every non-empty range, without a Python loop
+            offsets = np.cumsum(lengths) - lengths
+            found.append(order[np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())])
+        # A hash can turn up in several tables; only the few matches are deduplicated
+        candidates = np.concatenate(found)
+        distances = np.bitwise_count(self.hashes[candidates] ^ query)
+        keep = distances <= max_distance
+        matches = dict(zip(candidates[keep].tolist(), distances[keep].tolist()))
+        return [(self.ids[i], distance) for i, distance in sorted(matches.items(), key=lambda match: match[1])]
+
+
+class ImageIndex:
+    """
+    Process-wide pHash index of posted photos. Hashes saved since the last
+    rebuild (here or by other workers) are kept in a small list that is
+    scanned directly, and folded into the HammingIndex once it grows.
+    """
+    rebuild_after = 10000
+
+    def __init__(self):
+        self.index = None
+        self.recent = {}
+        self.checked_at = None
+        self.refreshed = 0.0
+        self.lock = threading.Lock()
+
+    def _rebuild(self, Content):
+        rows = Content.objects.filter(image_phash__isnull=False).values_list('pk', 'image_phash')
+        ids, hashes = zip(*rows) if rows else ((), ())
+        self.index = HammingIndex(ids, hashes)
+        self.recent = {}
+
+    def _refresh(self):
+        from .models import Content
+
+        now = timezone.now()
+        if self.index is None:
+            self._rebuild(Content)
+        elif time.monotonic() - self.refreshed >= getattr(settings, 'DUPLICATE_IMAGE_REFRESH', 5):
+            # updated_at moves when a hash is written, so this catches new uploads
+            changed = Content.objects.filter(image_phash__isnull=False, updated_at__gte=self.checked_at)
+            self.recent.update(changed.values_list('pk', 'image_phash'))
+            if len(self.recent) > self.rebuild_after:
+                self._rebuild(Content)
+        else:
+            return
+        self.checked_at = now
+        self.refreshed = time.monotonic()
+
+    def add(self, pk, phash):
+        with self.lock:
+            self.recent[pk] = phash
+
+    def search(self, phash, max_distance):
+        with self.lock:
+            self._refresh()
+            matches = dict(self.index.search(phash, max_distance))
+            for pk, other in self.recent.items():
+                distance = hamming(phash, other)
+                if distance <= max_distance:
+                    matches[pk] = distance
+        return sorted(matches.items(), key=lambda match: match[1])
+
+
+_image_index = ImageIndex()
+
+
+def reset():
+    global _image_index
+    _image_index = ImageIndex()
+
+
+def mark_duplicate(content, original_pk, same_author):
+    content.duplicate_of_id = original_pk
+    content.ai_verified = False
+    content.ai_confidence = 1.0
+    if same_author:
+        content.ai_reason = 'Same photo as one of your earlier posts'
+    else:
+        content.ai_reason = 'Matches a photo posted earlier by another user'
+
+
+def clear_duplicate(content):
+    """Undo mark_duplicate(): the post is verified afresh, like a new upload"""
+    from .views import verify_astro_photo
+
+    result = verify_astro_photo(content.category, content.location, content.created_at)
+    content.duplicate_of_id = None
+    content.ai_verified = result['verified']
+    content.ai_confidence = result['confidence']
+    content.ai_reason = result['reason']
+
+
+def schedule_check(content):
+    """
+    check_duplicate() a newly posted photo on a background thread. The draft
+    trick only helps JPEGs: a large PNG or TIFF is decoded whole, which is
+    no job for a request.
+    """
+    from .tasks import run_in_background
+
+    if content.image:
+        run_in_background(_check_stored, content.pk)
+
+
+def _check_stored(pk):
+    from .models import Content
+
+    content = Content.objects.filter(pk=pk).first()
+    if content is None or not content.image:
+        return
+    try:
+        check_duplicate(content)
+    except (OSError, ValueError):
+        logger.warning('Could not hash the image of post %s', pk, exc_info=True)
+
+
+def check_duplicate(content):
+    """
+    Hash a newly uploaded photo and look for earlier posts of the same image.
+    A match records duplicate_of (the earliest original) and marks the post
+    unverified, with the reason in ai_reason.
+    """
+    from .models import Content
+
+    if not content.image:
+        return None
+    with content.image.open('rb') as file:
+        content.image_phash, content.image_dhash = image_hashes(file)
+    max_distance = getattr(settings, 'DUPLICATE_IMAGE_DISTANCE', 8)
+    matches = [pk for pk, distance in _image_index.search(content.image_phash, max_distance) if pk != content.pk]
+
+    fields = ['image_phash', 'image_dhash']
+    originals = (Content.objects.filter(pk__in=matches, created_at__lte=content.created_at)
+                 .exclude(pk=content.pk).only('pk', 'author_id', 'image_dhash', 'duplicate_of_id', 'created_at')
+                 .order_by('created_at'))
+    for original in originals:
+        # dHash must roughly agree too; it rules out chance pHash collisions
+        if original.image_dhash is None or hamming(original.image_dhash, content.image_dhash) > max_distance * 2:
+            continue
+        mark_duplicate(content, original.duplicate_of_id or original.pk, original.author_id == content.author_id)
+        fields += ['duplicate_of', 'ai_verified', 'ai_confidence', 'ai_reason']
+        break
+    content.save(update_fields=fields + ['updated_at'])
+    _image_index.add(content.pk, content.image_phash)
+    return content.duplicate_of_id
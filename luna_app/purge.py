@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import facets
+from .authentication import revoke_token
+from .caching import bump_content_generation
+from .models import Comment, Content, Like, Notification, UserProfile
+from .storage import media_storage
+from .tasks import run_in_background
+
+# Deleting a user or a post used to cascade through every like, comment and
+# reply in one transaction, holding SQLite's write lock for as long as that
+# took. Now deletion only stamps deleted_at (the default managers hide those
+# rows at once), and purge() hard-deletes them afterwards: dependents
+# (comments, likes, notifications) first, PURGE_BATCH_SIZE rows per
+# transaction, sleeping PURGE_BATCH_PAUSE seconds between transactions so
+# other writers get a turn.
+
+
+def _descendants(comment_ids):
+    """Ids of every reply below the given comments"""
+    found, level = [], list(comment_ids)
+    while level:
+        level = list(Comment.all_objects.filter(parent_id__in=level).values_list('pk', flat=True))
+        found.extend(level)
+    return found
+
+
+def soft_delete_comments(comment_ids, now=None):
+    """Hide comments and the replies under them"""
+    ids = list(comment_ids) + _descendants(comment_ids)
+    Comment.objects.filter(pk__in=ids).update(deleted_at=now or timezone.now())
+
+
+def soft_delete_contents(queryset, now=None):
+    """Hide posts and their comments"""
+    now = now or timezone.now()
+    pks = list(queryset.values_list('pk', flat=True))
+    with facets.tracking(Content.objects.filter(pk__in=pks)):
+        Content.objects.filter(pk__in=pks).update(deleted_at=now)
+    Comment.objects.filter(content_id__in=pks).update(deleted_at=now)
+    bump_content_generation()
+
+
+def soft_delete_user(user):
+    """Deactivate an account and hide everything it posted"""
+    now = timezone.now()
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    UserProfile.objects.update_or_create(user=user, defaults={'deleted_at': now})
+    revoke_token(user)
+    soft_delete_contents(Content.objects.filter(author=user), now)
+    soft_delete_comments(Comment.objects.filter(user=user).values_list('pk', flat=True), now)
+
+
+def _batches(queryset, batch_size):
+    """Successive lists of up to batch_size primary keys, re-queried after each batch is deleted"""
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+
+
+def _delete(model, pks, pause):
+    with transaction.atomic():
+        deleted, per_model = model._base_manager.filter(pk__in=pks).delete()
+    time.sleep(pause)
+    return per_model
+
+
+def purge(older_than=None, batch_size=None, pause=None):
+    """
+    Hard-delete users, posts and comments soft-deleted more than older_than
+    ago (PURGE_AFTER_HOURS by default), and remove media files nothing else
+    uses. Returns a Counter of deleted rows per model.
+    """
+    if older_than is None:
+        older_than = timedelta(hours=settings.PURGE_AFTER_HOURS)
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    pause = settings.PURGE_BATCH_PAUSE if pause is None else pause
+    cutoff = timezone.now() - older_than
+    deleted = Counter()
+
+    gone_contents = Q(content__deleted_at__lte=cutoff)
+    gone_users = User.objects.filter(is_active=False, profile__deleted_at__lte=cutoff)
+
+    # Comments newest first, so replies mostly go before the comment they answer
+    comments = (Comment.all_objects.filter(Q(deleted_at__lte=cutoff) | gone_contents)
+                .order_by('-created_at'))
+    for pks in _batches(comments, batch_size):
+        deleted.update(_delete(Comment, pks, pause))
+
+    likes = Like.objects.filter(gone_contents | Q(user__in=gone_users)).order_by()
+    for pks in _batches(likes, batch_size):
+        deleted.update(_delete(Like, pks, pause))
+
+    notifications = Notification.objects.filter(gone_contents | Q(recipient__in=gone_users)).order_by()
+    for pks in _batches(notifications, batch_size):
+        deleted.update(_delete(Notification, pks, pause))
+    # Others' notifications naming a deleted user as the last actor lose the link
+    actors = Notification.objects.filter(last_actor__in=gone_users).order_by()
+    for pks in _batches(actors, batch_size):
+        with transaction.atomic():
+            Notification.objects.filter(pk__in=pks).update(last_actor=None)
+        time.sleep(pause)
+
+    storage = media_storage()
+    contents = Content.all_objects.filter(deleted_at__lte=cutoff).order_by()
+    for pks in _batches(contents, batch_size):
+        images = list(Content.all_objects.filter(pk__in=pks).exclude(image='').values_list('image', flat=True))
+        deleted.update(_delete(Content, pks, pause))
+        deleted['media bytes'] += storage.remove_unreferenced(images)
+
+    # What is left of a deleted account is small: profile, token, permissions
+    for user in gone_users.exclude(pk__in=Content.all_objects.values('author_id')).select_related('profile'):
+        avatar = user.profile.profile_picture.name
+        deleted.update(_delete(User, [user.pk], pause))
+        deleted['media bytes'] += storage.remove_unreferenced([avatar])
+
+    if deleted:
+        bump_content_generation()
+    return deleted
+
+
+_lock = threading.Lock()
+_running = False
+_again = False
+
+
+def _purge_until_idle():
+    global _running, _again
+    with _lock:
+        if _running:
+            # The purge in progress runs once more when it is done
+            _again = True
+            return
+        _running = True
+    try:
+        while True:
+            purge()
+            with _lock:
+                if not _again:
+                    return
+                _again = False
+    finally:
+        with _lock:
+            _running = _again = False
+
+
+def schedule_purge():
+    """
+    Purge in the background right after a deletion when PURGE_AFTER_HOURS
+    is 0; otherwise the purge_deleted command does it later.
+    """
+    if settings.PURGE_AFTER_HOURS == 0:
+        run_in_background(_purge_until_idle)
@@ -0,0 +1,199 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+# Token buckets: every (scope, user) or (scope, IP) pair has a bucket holding
+# up to N tokens that refills at N per period. A request takes one token or
+# is refused with the time until the next token arrives.
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'20/m' -> (capacity 20, refill 20/60 tokens per second)"""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def take_token(state, capacity, refill, now):
+    """Return the bucket's new (tokens, timestamp) state and the wait (0 if a token was taken)"""
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * refill)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / refill
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory, least recently used evicted first"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill, now):
+        with self._lock:
+            state, wait = take_token(self._buckets.pop(key, None), capacity, refill, now)
+            self._buckets[key] = state
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class CacheBucketStore:
+    """
+    Buckets in a Django cache shared by all workers (Redis, or the
+    file-based cache on a single host). The read-modify-write isn't atomic,
+    so concurrent requests from one client may occasionally both get the
+    last token; that is acceptable for abuse protection.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, refill, now):
+        cache_key = f'ratelimit:{key}'
+        state, wait = take_token(self.cache.get(cache_key), capacity, refill, now)
+        # Once a bucket has had time to refill completely it can be forgotten
+        self.cache.set(cache_key, state, math.ceil(capacity / refill) + 1)
+        return wait
+
+
+class RateLimiter:
+    """
+    Checks the in-process bucket first: a worker's own bucket never admits
+    more than the shared one would, so a refusal there skips the shared
+    store entirely. Admitted requests are then checked against the shared
+    store, when one is configured.
+    """
+
+    def __init__(self, rates, shared=None, max_entries=10000):
+        self.rates = rates
+        self.local = LocalBucketStore(max_entries)
+        self.shared = shared
+
+    def hit(self, scope, ident):
+        """Take a token for ident in scope; return seconds to wait, or 0 if allowed"""
+        rate = self.rates.get(scope)
+        if rate is None:
+            return 0.0
+        capacity, refill = parse_rate(rate)
+        key = f'{scope}:{ident}'
+        now = time.time()
+        wait = self.local.take(key, capacity, refill, now)
+        if wait or self.shared is None:
+            return wait
+        return self.shared.take(key, capacity, refill, now)
+
+
+_limiter = None
+_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            alias = getattr(settings, 'RATELIMIT_CACHE', None)
+            _limiter = RateLimiter(
+                getattr(settings, 'RATELIMIT_RATES', {}),
+                shared=CacheBucketStore(alias) if alias else None,
+                max_entries=getattr(settings, 'RATELIMIT_MAX_ENTRIES', 10000),
+            )
+        return _limiter
+
+
+def reset():
+    """Forget every bucket and reload rates from settings"""
+    global _limiter
+    with _lock:
+        _limiter = None
+
+
+_get_ident = BaseThrottle().get_ident
+
+
+def ip_key(request):
+    """
+    The client address: with REST_FRAMEWORK['NUM_PROXIES'] set, the
+    X-Forwarded-For entry our proxy added (clients can put anything before
+    it), else REMOTE_ADDR
+    """
+    return f'ip:{_get_ident(request)}'
+
+
+def username_key(username):
+    """Bucket for login attempts on one account, from any number of addresses"""
+    return f'username:{str(username or "").casefold()}'
+
+
+def check_request(scope, key):
+    if not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return 0.0
+    return get_limiter().hit(scope, key)
+
+
+def too_many_requests(wait):
+    response = JsonResponse({'error': 'Too many requests, please retry shortly.'}, status=429)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    DRF throttle for views that declare a throttle_scope, or for viewsets a
+    throttle_scopes mapping of action name -> scope. Views without a scope
+    are not limited.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+        scope = scope or getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        # Per user when signed in, per client IP otherwise
+        if request.user and request.user.is_authenticated:
+            key = f'user:{request.user.pk}'
+        else:
+            key = ip_key(request)
+        self.wait_time = check_request(scope, key)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+def ratelimit(scope):
+    """
+    Rate limit a plain (non-DRF) view, sync or async, per client IP. These
+    are the anonymous login/register endpoints, and reading request.user
+    would hit the session store from async code.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async def wrapper(request, *args, **kwargs):
+                wait = check_request(scope, ip_key(request))
+                if wait:
+                    return too_many_requests(wait)
+                return await view(request, *args, **kwargs)
+        else:
+            def wrapper(request, *args, **kwargs):
+                wait = check_request(scope, ip_key(request))
+                if wait:
+                    return too_many_requests(wait)
+                return view(request, *args, **kwargs)
+        return wraps(view)(wrapper)
+    return decorator
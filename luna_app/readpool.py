@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+# Concurrent database reads for async views. Django's async ORM methods
+# (aget, acount, ...) hand every query to the one thread sync_to_async keeps
+# for thread-sensitive code, so awaiting several of them at once still runs
+# them one after another. gather() instead runs independent reads on a small
+# pool of READ_POOL_WORKERS threads. Each thread has its own connection,
+# opened on first use and closed as a request's would be (at once, or after
+# CONN_MAX_AGE), so the reads overlap in the database. Only reads go through
+# the pool: each runs in its own autocommit query, with no transaction
+# shared between them or with the calling view.
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.READ_POOL_WORKERS,
+                thread_name_prefix='luna-read',
+            )
+        return _executor
+
+
+def _call(fn, args, kwargs):
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(fn, *args, **kwargs):
+    """Await fn(*args, **kwargs) run on the read pool"""
+    return await asyncio.wrap_future(_get_executor().submit(_call, fn, args, kwargs))
+
+
+async def gather(*calls):
+    """Run zero-argument callables on the read pool concurrently; their results in order"""
+    return await asyncio.gather(*(run(call) for call in calls))
@@ -0,0 +1,333 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+# "More like this" vectors. Each post is a 256-float32 vector made of three
+# L2-normalized, weighted blocks:
+#   text      TF-IDF of title (counted twice), description and article body,
+#             folded into 192 dims with signed feature hashing
+#   category  one-hot
+#   co-likes  the users who liked the post, signed-hashed into 48 dims, so
+#             posts liked by the same people point the same way
+# The whole matrix is one memory-mapped .npy file: similarity to every post
+# is a single matrix-vector product.
+
+TEXT_DIM = 192
+CATEGORY_DIM = 16
+LIKE_DIM = 48
+DIM = TEXT_DIM + CATEGORY_DIM + LIKE_DIM
+WEIGHTS = {'text': 1.0, 'category': 0.35, 'likes': 0.6}
+DF_BUCKETS = 1 << 18
+MIN_SCORE = 0.2  # below this, similarity is mostly feature-hashing noise
+
+_word = re.compile(r'[a-z0-9]{2,}')
+VERSION_FILE = re.compile(r'(?:vectors|ids|df)-(?P<version>[0-9a-f]{12})\.npy')
+STOP_WORDS = frozenset(
+    'the and for with this that from are was were have has had but not you your our its into '
+    'over under about just very what when where which will can all out one also than then them'.split()
+)
+
+
+def _hashes(keys):
+    return np.fromiter((zlib.crc32(key.encode()) for key in keys), dtype=np.uint32, count=len(keys))
+
+
+def _terms(title, description, body):
+    text = ' '.join((title or '', title or '', description or '', body or '')).lower()
+    counts = Counter(word for word in _word.findall(text) if word not in STOP_WORDS)
+    return _hashes(list(counts)), np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+
+
+def _signed_add(block, rows, hashes, values):
+    """Feature hashing: add each value at dim hash % width with a sign taken from the hash"""
+    signs = np.where(hashes >> 31, 1.0, -1.0).astype(np.float32)
+    np.add.at(block, (rows, (hashes >> 8) % block.shape[1]), signs * values)
+
+
+def _normalize(block):
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    np.divide(block, norms, out=block, where=norms > 0)
+
+
+def vectorize(posts, likes, df, n_docs):
+    """
+    Vectors for posts, a list of (pk, title, description, content, category)
+    tuples; likes is a list of (post pk, user id) pairs.
+    """
+    from .models import Content
+
+    categories = {key: i for i, (key, label) in enumerate(Content.CATEGORIES)}
+    vectors = np.zeros((len(posts), DIM), dtype=np.float32)
+    text = vectors[:, :TEXT_DIM]
+    for row, (pk, title, description, body, category) in enumerate(posts):
+        hashes, tf = _terms(title, description, body)
+        if len(hashes):
+            idf = np.log((1 + n_docs) / (1 + df[hashes % DF_BUCKETS])) + 1
+            _signed_add(text, np.full(len(hashes), row), hashes, tf * idf)
+        if category in categories:
+            vectors[row, TEXT_DIM + categories[category]] = 1.0
+
+    position = {pk: row for row, (pk, *rest) in enumerate(posts)}
+    likes = [(position[post], user) for post, user in likes if post in position]
+    if likes:
+        rows, users = zip(*likes)
+        _signed_add(vectors[:, TEXT_DIM + CATEGORY_DIM:], np.array(rows),
+                    _hashes([str(user) for user in users]), np.float32(1.0))
+
+    for name, block in (('text', text), ('category', vectors[:, TEXT_DIM:TEXT_DIM + CATEGORY_DIM]),
+                        ('likes', vectors[:, TEXT_DIM + CATEGORY_DIM:])):
+        _normalize(block)
+        block *= WEIGHTS[name]
+    _normalize(vectors)
+    return vectors
+
+
+def document_frequencies(posts, df):
+    """Count each post's distinct terms into df (hashed into DF_BUCKETS)"""
+    for pk, title, description, body, category in posts:
+        hashes, tf = _terms(title, description, body)
+        np.add.at(df, hashes % DF_BUCKETS, 1)
+
+
+POST_FIELDS = ('pk', 'title', 'description', 'content', 'category')
+
+
+def post_rows(queryset):
+    return list(queryset.values_list(*POST_FIELDS))
+
+
+def post_likes(pks):
+    from .models import Like
+
+    return list(Like.objects.filter(content_id__in=pks).values_list('content_id', 'user_id'))
+
+
+class VectorStore:
+    """
+    The on-disk index in RECOMMEND_INDEX_DIR: meta.json names the current
+    version, whose vectors-<v>.npy (memory-mapped, read-only), ids-<v>.npy
+    (post ids as hex) and df-<v>.npy files it uses. A version's files are
+    never changed once written: writers build a new version and replace
+    meta.json last, so readers always see a complete one. The previous
+    version stays on disk until the next commit, for readers that read
+    meta.json just before it changed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = None
+        self.loaded_mtime = None
+        self.lock = threading.Lock()
+
+    def _path(self, kind, version):
+        return os.path.join(self.directory, f'{kind}-{version}.npy')
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.directory, 'meta.json')
+
+    def load(self):
+        """(Re)open the current version if meta.json changed; False if there is no index yet"""
+        try:
+            mtime = os.stat(self.meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.loaded_mtime:
+            return True
+        for attempt in range(3):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            version = meta['version']
+            try:
+                vectors = np.load(self._path('vectors', version), mmap_mode='r')
+                ids = np.load(self._path('ids', version))
+                df = np.load(self._path('df', version))
+                break
+            except FileNotFoundError:
+                # Two commits since meta.json was read: read it again
+                if attempt == 2:
+                    raise
+                mtime = os.stat(self.meta_path).st_mtime_ns
+        rows = {pk.decode(): row for row, pk in enumerate(ids[:meta['rows']])}
+        with self.lock:
+            self.vectors, self.ids, self.df, self.rows = vectors, ids, df, rows
+            self.meta, self.loaded_mtime = meta, mtime
+        return True
+
+    def snapshot(self):
+        """This store as loaded now, unaffected by a reload in another thread"""
+        with self.lock:
+            return copy.copy(self)
+
+    def create(self, capacity):
+        """Start a new version: (version, writable vectors memmap of capacity rows)"""
+        os.makedirs(self.directory, exist_ok=True)
+        version = uuid.uuid4().hex[:12]
+        matrix = np.lib.format.open_memmap(self._path('vectors', version), mode='w+',
+                                           dtype=np.float32, shape=(capacity, DIM))
+        return version, matrix
+
+    def commit(self, version, ids, df, n_docs, built_at):
+        """Save ids and df next to a filled vectors file and make it the current version"""
+        old = self.meta['version'] if self.meta else None
+        capacity = np.load(self._path('vectors', version), mmap_mode='r').shape[0]
+        padded = np.zeros(capacity, dtype='S32')
+        padded[:len(ids)] = ids
+        self._save(self._path('ids', version), padded)
+        self._save(self._path('df', version), df)
+        self._write_meta({'version': version, 'rows': len(ids), 'n_docs': n_docs,
+                          'built_at': built_at.isoformat()})
+        # Keep the new and the previous version; readers that still map
+        # older files keep them until they reload
+        keep = {version, old}
+        for filename in os.listdir(self.directory):
+            match = VERSION_FILE.fullmatch(filename)
+            if match and match['version'] not in keep:
+                os.remove(os.path.join(self.directory, filename))
+        self.load()
+
+    @staticmethod
+    def _save(path, array):
+        tmp = path[:-len('.npy')] + '.tmp.npy'
+        np.save(tmp, array)
+        os.replace(tmp, path)
+
+    def _write_meta(self, meta):
+        tmp = self.meta_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+
+    def update(self, pks, vectors, df, n_docs, built_at):
+        """
+        Overwrite or append rows as a new version: the current vectors are
+        copied to a new file, which the changed rows are written into.
+        Processes still reading the current version are not disturbed.
+        """
+        self.load()
+        rows = self.meta['rows']
+        new = [pk for pk in pks if pk not in self.rows]
+        ids = list(self.ids[:rows]) + [pk.encode() for pk in new]
+        positions = dict(self.rows, **{pk: rows + i for i, pk in enumerate(new)})
+
+        version, matrix = self.create(len(self.ids) if len(ids) <= len(self.ids) else 2 * len(ids))
+        for offset in range(0, rows, 100000):
+            matrix[offset:min(offset + 100000, rows)] = self.vectors[offset:min(offset + 100000, rows)]
+        for pk, vector in zip(pks, vectors):
+            matrix[positions[pk]] = vector
+        matrix.flush()
+        self.commit(version, np.array(ids, dtype='S32'), df, n_docs, built_at)
+
+    def similar(self, vector, limit, exclude=None):
+        """Post ids (hex) with the highest cosine similarity to vector, best first"""
+        rows = self.meta['rows']
+        scores = self.vectors[:rows] @ vector
+        if exclude in self.rows:
+            scores[self.rows[exclude]] = -1
+        limit = min(limit, rows)
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [self.ids[row].decode() for row in top if scores[row] >= MIN_SCORE]
+
+
+_store = None
+_lock = threading.Lock()
+_checked = 0.0
+
+
+def get_store():
+    """The process-wide read-only store; re-checks meta.json at most once a second"""
+    global _store, _checked
+    with _lock:
+        if _store is None:
+            _store = VectorStore(settings.RECOMMEND_INDEX_DIR)
+        if time.monotonic() - _checked >= 1:
+            _store.load()
+            _checked = time.monotonic()
+        return _store
+
+
+def related(content, limit):
+    """Hex ids of the posts most similar to content (which need not be indexed yet)"""
+    store = get_store().snapshot()
+    if store.meta is None:
+        return []
+    key = content.pk.hex
+    if key in store.rows:
+        vector = np.asarray(store.vectors[store.rows[key]])
+    else:
+        post = (content.pk, content.title, content.description, content.content, content.category)
+        vector = vectorize([post], post_likes([content.pk]), store.df, store.meta['n_docs'])[0]
+    return store.similar(vector, limit, exclude=key)
+
+
+def build(batch_size=2000):
+    """Full rebuild of the index from every post"""
+    from .models import Content
+
+    built_at = timezone.now()
+    pks = list(Content.objects.order_by('pk').values_list('pk', flat=True))
+    df = np.zeros(DF_BUCKETS, dtype=np.int32)
+    for offset in range(0, len(pks), batch_size):
+        document_frequencies(post_rows(Content.objects.filter(pk__in=pks[offset:offset + batch_size])), df)
+
+    store = VectorStore(settings.RECOMMEND_INDEX_DIR)
+    store.load()
+    version, matrix = store.create(int(len(pks) * 1.25) + 64)
+    for offset in range(0, len(pks), batch_size):
+        batch = pks[offset:offset + batch_size]
+        by_pk = {post[0]: post for post in post_rows(Content.objects.filter(pk__in=batch))}
+        present = [i for i, pk in enumerate(batch) if pk in by_pk]
+        posts = [by_pk[batch[i]] for i in present]
+        matrix[[offset + i for i in present]] = vectorize(posts, post_likes(batch), df, len(pks))
+    matrix.flush()
+    store.commit(version, np.array([pk.hex for pk in pks], dtype='S32'), df, len(pks), built_at)
+    return len(pks)
+
+
+def refresh(batch_size=2000):
+    """
+    Re-vectorize posts edited or liked since the last build or refresh and
+    append new ones. Document frequencies only grow with new posts here;
+    a periodic full build() corrects the drift.
+    """
+    from .models import Content, Like
+
+    store = VectorStore(settings.RECOMMEND_INDEX_DIR)
+    if not store.load():
+        return build(batch_size)
+    since = datetime.fromisoformat(store.meta['built_at'])
+    built_at = timezone.now()
+    changed = set(Content.objects.filter(updated_at__gte=since).values_list('pk', flat=True))
+    changed.update(Like.objects.filter(created_at__gte=since).values_list('content_id', flat=True))
+    changed = sorted(changed)
+    if not changed:
+        return 0
+
+    df, n_docs = store.df.copy(), store.meta['n_docs']
+    new_posts = [pk for pk in changed if pk.hex not in store.rows]
+    for offset in range(0, len(new_posts), batch_size):
+        document_frequencies(post_rows(Content.objects.filter(pk__in=new_posts[offset:offset + batch_size])), df)
+    n_docs += len(new_posts)
+
+    pks, vectors = [], []
+    for offset in range(0, len(changed), batch_size):
+        batch = changed[offset:offset + batch_size]
+        posts = post_rows(Content.objects.filter(pk__in=batch))
+        vectors.append(vectorize(posts, post_likes(batch), df, n_docs))
+        pks.extend(post[0].hex for post in posts)
+    store.update(pks, np.concatenate(vectors) if vectors else [], df, n_docs, built_at)
+    return len(pks)
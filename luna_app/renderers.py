@@ -0,0 +1,53 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+# Datetimes go through DRF's encoder so both paths format them identically
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+def _default(obj):
+    # Decimal, lazy strings, datetimes, querysets... as DRF would encode them
+    return JSONEncoder().default(obj)
+
+
+def dumps(data):
+    """Encode data to compact UTF-8 JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def iter_json_array(batches):
+    """Stream lists of items as one JSON array, a batch at a time"""
+    yield b'['
+    first = True
+    for batch in batches:
+        for item in batch:
+            if not first:
+                yield b','
+            first = False
+            yield dumps(item)
+    yield b']'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed. Indented
+    output (browsable API, ?indent) still goes through the stdlib encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -1,7 +1,50 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.contrib.auth.models import User
-from django.contrib.auth.hashers import make_password
-from .models import Content, Like, Comment, UserProfile, CosmicEvent
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from .hashing import make_password
+from .models import Content, Like, Comment, Notification, UserProfile, CosmicEvent
+from .notifications import describe
+from .tiles import dzi_url
+
+class FieldsetMixin:
+    """
+    Lets API clients ask for less. A named profile (?profile=card|detail|full)
+    picks a base set of fields, ?fields=a,b replaces it and ?expand=x,y adds
+    nested relations. Only applies to reads; writes always use every field.
+    """
+    profiles = {}
+    default_profile = 'full'
+    expandable = []
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        wanted = set(self.context.get('fields') or self.requested_fields(request, self.context.get('profile')))
+        for name in list(self.fields):
+            if name not in wanted:
+                self.fields.pop(name)
+    
+    @classmethod
+    def requested_fields(cls, request, profile=None):
+        """Field names to emit for this request"""
+        params = getattr(request, 'query_params', request.GET) if request else {}
+        all_fields = list(cls.Meta.fields)
+        profile = profile or params.get('profile') or cls.default_profile
+        fields = cls.profiles.get(profile, cls.profiles.get(cls.default_profile))
+        fields = list(fields) if fields is not None else all_fields
+        
+        if params.get('fields'):
+            fields = [name for name in params['fields'].split(',') if name in all_fields]
+            if 'id' not in fields:
+                fields.insert(0, 'id')
+        for name in params.get('expand', '').split(','):
+            if name in cls.expandable and name not in fields:
+                fields.append(name)
+        return fields
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,29 +92,81 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password', 'first_name']
     
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
+        # Hash in the password pool; HashingBusy propagates as a 429
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
             first_name=validated_data.get('first_name', '')
         )
+        user.password = make_password(validated_data['password'])
+        user.save()
         # Create user profile
         UserProfile.objects.create(user=user)
         return user
 
-class CommentSerializer(serializers.ModelSerializer):
+# Levels of replies nested under a comment, all prefetched
+REPLY_DEPTH = 2
+
+class CommentSerializer(FieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
+    replies_count = serializers.SerializerMethodField()
+    
+    profiles = {
+        'card': ['id', 'user', 'text', 'created_at', 'parent'],
+        'detail': ['id', 'user', 'text', 'created_at', 'parent'],
+        'full': None,
+    }
+    expandable = ['replies']
     
     class Meta:
         model = Comment
-        fields = ['id', 'user', 'text', 'created_at', 'parent', 'replies']
+        fields = ['id', 'user', 'text', 'created_at', 'parent', 'replies', 'replies_count']
         read_only_fields = ['user', 'created_at']
     
+    @classmethod
+    def requested_fields(cls, request, profile=None):
+        # The count tells clients where the nested replies were cut off
+        fields = super().requested_fields(request, profile)
+        if 'replies' in fields and 'replies_count' not in fields:
+            fields.append('replies_count')
+        return fields
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        """Load exactly what the chosen fields need"""
+        queryset = queryset.select_related('user')
+        if 'replies' in fields:
+            # Every level of replies get_replies() nests, with their authors;
+            # the deepest level only gets its replies counted
+            queryset = queryset.prefetch_related(*(
+                '__'.join(['replies'] * level) + '__user' for level in range(1, REPLY_DEPTH)
+            ), Prefetch(
+                '__'.join(['replies'] * REPLY_DEPTH),
+                queryset=Comment.objects.select_related('user').annotate(
+                    reply_count=Count('replies', filter=Q(replies__deleted_at__isnull=True))
+                ),
+            ))
+        elif 'replies_count' in fields:
+            queryset = queryset.annotate(reply_count=Count('replies', filter=Q(replies__deleted_at__isnull=True)))
+        return queryset
+    
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return CommentSerializer(obj.replies.all(), many=True).data
+        # Deeper replies come with their own comment (/api/comments/<id>/)
+        depth = self.context.get('reply_depth', 0)
+        if depth >= REPLY_DEPTH:
+            return []
+        replies = obj.replies.all()
+        if replies:
+            # Same context and fields as this comment, one level down
+            context = {**self.context, 'fields': list(self.fields), 'reply_depth': depth + 1}
+            return CommentSerializer(replies, many=True, context=context).data
         return []
+    
+    def get_replies_count(self, obj):
+        if hasattr(obj, 'reply_count'):
+            return obj.reply_count
+        return len(obj.replies.all())
 
 class LikeSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -80,31 +175,111 @@ class LikeSerializer(serializers.ModelSerializer):
         model = Like
         fields = ['id', 'user', 'created_at']
 
-class ContentSerializer(serializers.ModelSerializer):
+class ContentSerializer(FieldsetMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     likes = LikeSerializer(many=True, read_only=True)
     likes_count = serializers.IntegerField(read_only=True)
     comments_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
+    deep_zoom = serializers.SerializerMethodField()
+    
+    # card: grids and thumbnails, detail: feed posts, full: everything incl. the article
+    # body (raw and rendered), moderation state, comments and likes
+    profiles = {
+        'card': [
+            'id', 'author', 'content_type', 'title', 'description', 'image', 'image_url',
+            'category', 'ai_verified', 'excerpt', 'reading_time', 'created_at',
+            'likes_count', 'comments_count', 'is_liked', 'deep_zoom'
+        ],
+        'detail': [
+            'id', 'author', 'content_type', 'title', 'description', 'excerpt',
+            'word_count', 'reading_time', 'image', 'image_url', 'location', 'category', 'ai_verified',
+            'ai_confidence', 'ai_reason', 'created_at', 'updated_at',
+            'likes_count', 'comments_count', 'is_liked', 'deep_zoom'
+        ],
+        'full': None,
+    }
+    expandable = ['comments', 'likes']
     
     class Meta:
         model = Content
         fields = [
             'id', 'author', 'content_type', 'title', 'description', 'content',
+            'content_html', 'excerpt', 'word_count', 'reading_time',
             'image', 'image_url', 'location', 'category', 'ai_verified',
-            'ai_confidence', 'ai_reason', 'created_at', 'updated_at',
-            'comments', 'likes', 'likes_count', 'comments_count', 'is_liked'
+            'ai_confidence', 'ai_reason', 'is_hidden', 'duplicate_of', 'created_at', 'updated_at',
+            'comments', 'likes', 'likes_count', 'comments_count', 'is_liked', 'deep_zoom'
+        ]
+        read_only_fields = [
+            'author', 'content_html', 'excerpt', 'word_count', 'reading_time',
+            'ai_verified', 'ai_confidence', 'ai_reason', 'is_hidden', 'duplicate_of',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['author', 'created_at', 'updated_at']
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, fields, user=None):
+        """Select only the columns, counts and relations the chosen fields need"""
+        columns = {f.name for f in Content._meta.concrete_fields}
+        only = ['id', 'author'] + [name for name in fields if name in columns and name != 'id']
+        if 'deep_zoom' in fields:
+            only += ['image', 'has_tiles']
+        queryset = queryset.select_related('author').only(
+            *only, *[f'author__{name}' for name in UserSerializer.Meta.fields]
+        )
+        
+        if 'likes_count' in fields:
+            queryset = queryset.annotate(likes_total=Coalesce(Subquery(
+                Like.objects.filter(content=OuterRef('pk')).order_by()
+                .values('content').annotate(n=Count('pk')).values('n')
+            ), 0))
+        if 'comments_count' in fields:
+            queryset = queryset.annotate(comments_total=Coalesce(Subquery(
+                Comment.objects.filter(content=OuterRef('pk')).order_by()
+                .values('content').annotate(n=Count('pk')).values('n')
+            ), 0))
+        if 'is_liked' in fields and user is not None and user.is_authenticated:
+            queryset = queryset.annotate(liked_by_user=Exists(
+                Like.objects.filter(content=OuterRef('pk'), user=user)
+            ))
+        if 'comments' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'comments', queryset=CommentSerializer.optimize_queryset(Comment.objects.all(), ['replies'])
+            ))
+        if 'likes' in fields:
+            queryset = queryset.prefetch_related(Prefetch('likes', queryset=Like.objects.select_related('user')))
+        return queryset
+    
+    def get_deep_zoom(self, obj):
+        """URL of the DZI descriptor for large photos, once their tiles are built"""
+        if obj.has_tiles and obj.image:
+            return dzi_url(obj.image.name)
+        return None
     
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'liked_by_user'):
+                return obj.liked_by_user
             return obj.likes.filter(user=request.user).exists()
         return False
 
 class CosmicEventSerializer(serializers.ModelSerializer):
     class Meta:
         model = CosmicEvent
-        fields = ['id', 'title', 'description', 'event_date', 'event_type', 'created_at']
\ No newline at end of file
+        fields = ['id', 'title', 'description', 'event_date', 'event_type', 'created_at']
+
+class NotificationSerializer(serializers.ModelSerializer):
+    last_actor = serializers.CharField(source='last_actor.username', default=None, read_only=True)
+    content_title = serializers.CharField(source='content.title', read_only=True)
+    message = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'verb', 'content', 'content_title', 'last_actor', 'actor_count',
+            'message', 'is_read', 'created_at', 'updated_at'
+        ]
+    
+    def get_message(self, obj):
+        return describe(obj)
@@ -0,0 +1,100 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from . import facets
+from .authentication import forget_user
+from .caching import bump_content_generation, bump_event_generation
+from .models import Comment, Content, CosmicEvent, Like, UserProfile
+from .storage import media_storage
+
+MEDIA_FIELDS = {Content: 'image', UserProfile: 'profile_picture'}
+
+
+@receiver(post_delete, sender=Content)
+@receiver(post_delete, sender=UserProfile)
+def release_media(sender, instance, **kwargs):
+    """Drop the deleted row's reference to its media blob"""
+    field = getattr(instance, MEDIA_FIELDS[sender])
+    if field:
+        media_storage().release(field.name)
+
+
+@receiver(pre_save, sender=Content)
+@receiver(pre_save, sender=UserProfile)
+def remember_media(sender, instance, update_fields=None, **kwargs):
+    """Note which file the row referenced before this save ('' none, None unchanged)"""
+    name = MEDIA_FIELDS[sender]
+    if instance._state.adding:
+        instance._media_before = ''
+    elif update_fields is not None and name not in update_fields:
+        instance._media_before = None
+    else:
+        instance._media_before = sender._base_manager.filter(pk=instance.pk).values_list(name, flat=True).first() or ''
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_save, sender=UserProfile)
+def count_media_references(sender, instance, raw=False, **kwargs):
+    """Move the row's blob reference from the file it replaced to the one it stores"""
+    before = getattr(instance, '_media_before', None)
+    after = getattr(instance, MEDIA_FIELDS[sender]).name or ''
+    instance._media_before = None
+    if raw or before is None or before == after:
+        return
+    if before:
+        media_storage().release(before)
+    if after:
+        media_storage().retain(after)
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def evict_cached_tokens(sender, instance, raw=False, **kwargs):
+    """Token requests load the user from the token cache; make them reload it"""
+    if not raw:
+        forget_user(instance)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=Content)
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def invalidate_page_cache(sender, **kwargs):
+    bump_content_generation()
+
+
+@receiver(post_save, sender=CosmicEvent)
+@receiver(post_delete, sender=CosmicEvent)
+def invalidate_event_feeds(sender, **kwargs):
+    bump_event_generation()
+
+
+FACET_FIELDS = {'category', 'content_type', 'ai_verified', 'is_hidden', 'deleted_at'}
+
+
+@receiver(pre_save, sender=Content)
+def remember_facets(sender, instance, update_fields=None, **kwargs):
+    """Note which facet values the post counted towards before this save"""
+    if instance._state.adding or (update_fields is not None and not FACET_FIELDS & set(update_fields)):
+        instance._facets_before = None
+        return
+    instance._facets_before = facets.post_values(
+        Content.all_objects.filter(pk=instance.pk).only(*FACET_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Content)
+def update_facets(sender, instance, created, **kwargs):
+    before = [] if created else getattr(instance, '_facets_before', None)
+    if before is not None:
+        facets.adjust_between(Counter(before), Counter(facets.post_values(instance)))
+
+
+@receiver(post_delete, sender=Content)
+def remove_facets(sender, instance, **kwargs):
+    facets.adjust(Counter({key: -1 for key in facets.post_values(instance)}))
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+BLOB_DIR = 'blobs'
+CHUNK_SIZE = 64 * 1024
+# A saved blob has no reference until the row naming it is saved, moments
+# later; remove_unreferenced() leaves blobs saved this recently alone
+SAVE_GRACE = timedelta(hours=1)
+
+
+def blob_name_for(digest, ext=''):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every distinct file once, under its SHA-256 digest
+    (blobs/ab/cd/<digest>.jpg). The digest is computed while the upload is
+    streamed to disk; saving bytes that already exist returns the existing
+    blob's name (whatever extension the new upload had) instead of writing a
+    copy.
+
+    A blob's reference count is the number of model fields pointing at it.
+    Those change in signals.py as rows are saved and deleted, through
+    retain() and release(); gc_media removes blobs nothing references.
+    Saving registers the blob before its file is checked, and removal
+    deletes the row before the file, both in transactions on the row, so
+    a re-upload of bytes being purged writes them back.
+
+    Names saved before this storage existed (e.g. astrophotos/img1.jpg) keep
+    working as plain filesystem paths.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content digest in _save
+        return name
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()
+        blob_root = self.path(BLOB_DIR)
+        os.makedirs(blob_root, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=blob_root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            name = self._register(hasher.hexdigest(), ext, size)
+            path = self.path(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, path)
+            else:
+                os.remove(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+    def _register(self, digest, ext, size):
+        """
+        Record the blob, or mark an existing one as just saved; returns its
+        name. Waits for a removal of the blob in progress to finish.
+        """
+        from .models import MediaBlob
+
+        while True:
+            now = timezone.now()
+            with transaction.atomic():
+                if MediaBlob.objects.filter(pk=digest).update(saved_at=now):
+                    return MediaBlob.objects.filter(pk=digest).values_list('name', flat=True).get()
+            try:
+                with transaction.atomic():
+                    blob = MediaBlob.objects.create(
+                        digest=digest, name=blob_name_for(digest, ext), size=size, saved_at=now
+                    )
+                return blob.name
+            except IntegrityError:
+                # Another upload of the same bytes registered it first
+                continue
+
+    def retain(self, name):
+        """Count one more field referencing the blob"""
+        from .models import MediaBlob
+
+        if is_blob_name(name):
+            MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+    def release(self, name):
+        """
+        Drop one field's reference to the blob. The file itself is only
+        removed once nothing references it (gc_media, purge). Files outside
+        the blob store are deleted at once.
+        """
+        if not is_blob_name(name):
+            return super().delete(name)
+        from .models import MediaBlob
+
+        MediaBlob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1
+        )
+
+    def delete(self, name):
+        # Blobs may be shared, so deleting one field's file only drops that
+        # field's reference, which happens when its row is saved
+        if not is_blob_name(name):
+            return super().delete(name)
+
+    def remove_unreferenced(self, names):
+        """Remove the files of these blobs if nothing references them any more; returns bytes freed"""
+        from .models import MediaBlob
+        from .tiles import remove_pyramid
+
+        freed = 0
+        unreferenced = MediaBlob.objects.filter(ref_count=0, saved_at__lt=timezone.now() - SAVE_GRACE)
+        for blob in unreferenced.filter(name__in=[n for n in names if is_blob_name(n)]):
+            # The row stays locked until the file is gone; a save of the same
+            # bytes meanwhile waits, then registers the blob and rewrites it
+            with transaction.atomic():
+                if not unreferenced.filter(pk=blob.pk).delete()[0]:
+                    continue
+                path = self.path(blob.name)
+                if os.path.exists(path):
+                    os.remove(path)
+                remove_pyramid(blob.name)
+            freed += blob.size
+        return freed
+
+
+_media_storage = ContentAddressedStorage()
+
+
+def media_storage():
+    return _media_storage
@@ -0,0 +1,109 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                thread_name_prefix='luna-background',
+            )
+        return _executor
+
+
+def run_in_background(fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) on a background thread, for work too slow for a
+    request (bulk admin actions, purges, digests). Failures are logged.
+    With BACKGROUND_TASKS_SYNC the call runs inline, which tests rely on.
+    """
+    def job():
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            logger.exception('Background task %s failed', getattr(fn, '__name__', fn))
+            raise
+        finally:
+            # Each worker thread has its own connection; don't leak it
+            connections.close_all()
+
+    if getattr(settings, 'BACKGROUND_TASKS_SYNC', False):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            logger.exception('Background task %s failed', getattr(fn, '__name__', fn))
+            future.set_exception(exc)
+        return future
+    return _get_executor().submit(job)
+
+
+def in_batches(queryset, batch_size=500):
+    """
+    Yield querysets over successive batches of the given rows, by primary
+    key. Each batch is read after the previous one was handled, keyset-style,
+    so only one batch of keys is ever held.
+    """
+    keys = queryset.order_by('pk').values_list('pk', flat=True)
+    model = queryset.model
+    last = None
+    while True:
+        pks = list((keys if last is None else keys.filter(pk__gt=last))[:batch_size])
+        if not pks:
+            return
+        yield model._default_manager.filter(pk__in=pks)
+        last = pks[-1]
+
+
+class BatchBuffer:
+    """
+    Collects items in this process and hands them to write(items) in
+    batches on a background thread: the number of seconds in the
+    interval_setting after the first item arrives, or as soon as the
+    batch_size_setting number are waiting. Leftovers are written at exit.
+    With BACKGROUND_TASKS_SYNC every item is written at once.
+    """
+
+    def __init__(self, write, batch_size_setting, interval_setting):
+        self.write = write
+        self.batch_size_setting = batch_size_setting
+        self.interval_setting = interval_setting
+        self._items = []
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, item):
+        sync = getattr(settings, 'BACKGROUND_TASKS_SYNC', False)
+        with self._lock:
+            self._items.append(item)
+            full = len(self._items) >= getattr(settings, self.batch_size_setting)
+            if not full and not sync and self._timer is None:
+                self._timer = threading.Timer(getattr(settings, self.interval_setting), run_in_background, [self.flush])
+                self._timer.daemon = True
+                self._timer.start()
+        if full or sync:
+            run_in_background(self.flush)
+
+    def flush(self):
+        """Write whatever is waiting now; returns the number of items written"""
+        with self._lock:
+            items, self._items = self._items, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if items:
+            self.write(items)
+        return len(items)
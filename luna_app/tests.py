@@ -1,3 +1,722 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image, ImageDraw
+from rest_framework.test import APIClient
+
+from .articles import plain_text, render_html
+from .authentication import issue_token, revoke_token, token_cache
+from . import analytics, dedup, facets, notifications, perceptual, ratelimit, recommend
+from .models import (
+    ActivityEvent, ActivityRollup, Comment, Content, CosmicEvent, FacetCount, Like, MediaBlob, Notification, UserProfile,
+)
+from .export import export_sections
+from .purge import purge, soft_delete_contents, soft_delete_user
+from .management.commands.index_images import Command as IndexImages
+from .storage import media_storage
+from .tasks import in_batches
+from .views import profile_payload
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache().clear()
+        self.user = User.objects.create_user('stargazer', password='orbit-2026')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {issue_token(self.user).key}')
+
+    def test_cached_token_authenticates(self):
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        # The token and its user are cached now
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        self.assertFalse([q for q in queries if 'authtoken_token' in q['sql'] or 'FROM "auth_user"' in q['sql']])
+
+    def test_deactivated_user_is_refused_while_cached(self):
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIn(self.client.get('/api/profile/').status_code, (401, 403))
+
+    def test_changed_user_is_reloaded(self):
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        self.user.first_name = 'Carl'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/profile/').json()['user']['first_name'], 'Carl')
+
+    def test_revoked_token_is_refused(self):
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        revoke_token(self.user)
+        self.assertIn(self.client.get('/api/profile/').status_code, (401, 403))
+
+    def test_password_change_rotates_token_and_notifies_validators(self):
+        with mock.patch('django.contrib.auth.password_validation.password_changed') as password_changed:
+            response = self.client.post('/api/profile/change-password/', {
+                'current_password': 'orbit-2026', 'new_password': 'perihelion-7', 'confirm_password': 'perihelion-7',
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        password_changed.assert_called_once_with('perihelion-7', self.user)
+        self.assertIn(self.client.get('/api/profile/').status_code, (401, 403))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('perihelion-7'))
+
+
+
+class LoginRateLimitTests(TestCase):
+    def setUp(self):
+        ratelimit.reset()
+        self.addCleanup(ratelimit.reset)
+        User.objects.create_user('orion', password='belt-stars-3')
+
+    def attempt(self, username, forwarded_for):
+        return self.client.post('/api/login/', {'username': username, 'password': 'guess'},
+                                content_type='application/json', HTTP_X_FORWARDED_FOR=forwarded_for).status_code
+
+    @override_settings(RATELIMIT_RATES={'login': '3/m'})
+    def test_spoofed_forwarded_for_shares_the_proxy_added_address(self):
+        # The proxy appends the real address to whatever the client sent
+        codes = [self.attempt(f'user{i}', f'10.0.0.{i}, 203.0.113.7') for i in range(4)]
+        self.assertEqual(codes, [401, 401, 401, 429])
+        self.assertEqual(self.attempt('user9', '203.0.113.8'), 401)
+
+    @override_settings(RATELIMIT_RATES={'login': '100/m', 'login_username': '2/h'})
+    def test_one_username_is_limited_across_addresses(self):
+        codes = [self.attempt('Orion', f'203.0.113.{i}') for i in range(3)]
+        self.assertEqual(codes, [401, 401, 429])
+        self.assertEqual(self.attempt('vega', '203.0.113.9'), 401)
+
+
+def use_temp_media(test):
+    """Point MEDIA_ROOT at a directory removed after the test"""
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root)
+    settings_override = override_settings(MEDIA_ROOT=media_root)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+def assert_facets_match(test):
+    """The stored facet counts agree with a recount of the content table"""
+    stored = Counter({(facet, value): count for facet, value, count
+                      in FacetCount.objects.values_list('facet', 'value', 'count') if count})
+    test.assertEqual(stored, +facets.tally(Content.all_objects.all()))
+
+
+class MediaStoreTests(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+        self.profile = UserProfile.objects.create(user=User.objects.create_user('comet'))
+
+    def blob(self, name):
+        return MediaBlob.objects.get(name=name)
+
+    def test_same_bytes_are_stored_once(self):
+        first = media_storage().save('astrophotos/m31.jpg', ContentFile(b'andromeda'))
+        second = media_storage().save('astrophotos/copy.jpeg', ContentFile(b'andromeda'))
+        self.assertEqual(first, second)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_fields_sharing_a_blob_each_count(self):
+        other = UserProfile.objects.create(user=User.objects.create_user('meteor'))
+        self.profile.profile_picture.save('a.png', ContentFile(b'shared'))
+        other.profile_picture.save('b.jpg', ContentFile(b'shared'))
+        self.assertEqual(other.profile_picture.name, self.profile.profile_picture.name)
+        self.assertEqual(self.blob(other.profile_picture.name).ref_count, 2)
+
+    def test_replacing_a_file_releases_the_old_blob(self):
+        self.profile.profile_picture.save('old.png', ContentFile(b'old avatar'))
+        old = self.profile.profile_picture.name
+        self.profile.profile_picture.save('new.png', ContentFile(b'new avatar'))
+        self.assertEqual(self.blob(old).ref_count, 0)
+        self.assertEqual(self.blob(self.profile.profile_picture.name).ref_count, 1)
+
+        # The same bytes again: still one reference
+        self.profile.profile_picture.save('again.png', ContentFile(b'new avatar'))
+        self.assertEqual(self.blob(self.profile.profile_picture.name).ref_count, 1)
+
+        # Saving other fields leaves the reference alone
+        self.profile.bio = 'Observer'
+        self.profile.save()
+        self.assertEqual(self.blob(self.profile.profile_picture.name).ref_count, 1)
+
+    def test_deleting_releases_the_blob(self):
+        self.profile.profile_picture.save('avatar.png', ContentFile(b'avatar'))
+        name = self.profile.profile_picture.name
+        self.profile.delete()
+        self.assertEqual(self.blob(name).ref_count, 0)
+
+    def test_blob_etag(self):
+        name = media_storage().save('photo.jpg', ContentFile(b'pixels'))
+        url = '/media/' + name
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, 304)
+        # A tag that merely contains ours is a different tag
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"x{etag[1:]}').status_code, 200)
+
+    def test_blob_ranges(self):
+        url = '/media/' + media_storage().save('photo.jpg', ContentFile(b'0123456789'))
+        response = self.client.get(url, HTTP_RANGE='bytes=2-4')
+        self.assertEqual((response.status_code, b''.join(response.streaming_content)), (206, b'234'))
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=20-').status_code, 416)
+        # An invalid range is ignored
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=5-3').status_code, 200)
+
+    def test_reposting_bytes_being_purged_restores_the_file(self):
+        self.profile.profile_picture.save('avatar.png', ContentFile(b'avatar'))
+        name = self.profile.profile_picture.name
+        self.profile.profile_picture = None
+        self.profile.save()
+        MediaBlob.objects.filter(name=name).update(saved_at=timezone.now() - timedelta(days=1))
+
+        # The purge removes the blob right after a new upload found it...
+        storage = media_storage()
+        register = storage._register
+
+        def register_then_purge(*args):
+            stored = register(*args)
+            storage.remove_unreferenced([stored])
+            return stored
+
+        with mock.patch.object(storage, '_register', register_then_purge):
+            self.profile.profile_picture.save('again.png', ContentFile(b'avatar'))
+        # ...which it does not: the upload had just been saved
+        self.assertTrue(storage.exists(self.profile.profile_picture.name))
+        self.assertEqual(self.blob(name).ref_count, 1)
+
+    def test_purge_removes_blobs_nothing_references(self):
+        self.profile.profile_picture.save('avatar.png', ContentFile(b'avatar'))
+        name = self.profile.profile_picture.name
+        self.profile.profile_picture = None
+        self.profile.save()
+        storage = media_storage()
+        self.assertEqual(storage.remove_unreferenced([name]), 0)  # saved moments ago
+        MediaBlob.objects.filter(name=name).update(saved_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(storage.remove_unreferenced([name]), len(b'avatar'))
+        self.assertFalse(storage.exists(name))
+
+        # The same bytes again are written back
+        self.profile.profile_picture.save('again.png', ContentFile(b'avatar'))
+        self.assertTrue(storage.exists(self.profile.profile_picture.name))
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('capella')
+
+    def post(self, **fields):
+        fields = {'content_type': 'photo', 'title': 'Sky', 'category': 'galaxy', **fields}
+        return Content.objects.create(author=self.author, **fields)
+
+    def test_counts_follow_writes(self):
+        first = self.post()
+        second = self.post(category='planet', ai_verified=True)
+        self.post(content_type='article', category='planet')
+        counts = facets.facet_counts()
+        self.assertEqual(counts['category']['planet'], 2)
+        self.assertEqual(counts['ai_verified'], {'true': 1, 'false': 2})
+        self.assertEqual(counts['total'], 3)
+
+        first.is_hidden = True
+        first.save()
+        second.category = 'nebula'
+        second.save(update_fields=['category'])
+        soft_delete_contents(Content.objects.filter(content_type='article'))
+        counts = facets.facet_counts()
+        self.assertEqual(counts['category'], {**counts['category'], 'galaxy': 0, 'planet': 0, 'nebula': 1})
+        self.assertEqual(counts['total'], 1)
+        assert_facets_match(self)
+
+        second.delete()
+        self.assertEqual(facets.facet_counts()['total'], 0)
+        assert_facets_match(self)
+
+    def test_tracking_covers_bulk_updates(self):
+        for category in ('galaxy', 'galaxy', 'planet'):
+            self.post(category=category)
+        queryset = Content.objects.filter(category='galaxy')
+        with facets.tracking(queryset):
+            queryset.update(category='nebula', ai_verified=True)
+        assert_facets_match(self)
+
+        FacetCount.objects.all().delete()
+        facets.rebuild()
+        assert_facets_match(self)
+
+
+SPAM = 'Buy cheap telescopes and eyepieces today at our amazing online store, free shipping'
+
+
+@override_settings(RATELIMIT_ENABLED=False, BACKGROUND_TASKS_SYNC=True, DUPLICATE_TEXT_ACTION='flag')
+class DuplicateTextTests(TestCase):
+    def setUp(self):
+        dedup.reset()
+        self.addCleanup(dedup.reset)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('nova'))
+
+    def post(self, description):
+        response = self.client.post('/api/content/', {
+            'content_type': 'article', 'title': 'Post', 'category': 'other', 'description': description,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Content.objects.get(pk=response.json()['id'])
+
+    def comment(self, content, text):
+        response = self.client.post(f'/api/content/{content.pk}/comment/', {'text': text}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Comment.objects.get(pk=response.json()['id'])
+
+    def test_near_duplicate_texts_are_flagged(self):
+        first = self.post(SPAM)
+        self.assertFalse(first.flagged)
+        self.assertTrue(self.post(SPAM.replace('store', 'shop') + '!').flagged)
+        self.assertFalse(self.post('Saturn at opposition through a 200mm reflector last night').flagged)
+
+        self.assertFalse(self.comment(first, 'What exposure did you use for the rings here?').flagged)
+        self.assertTrue(self.comment(first, SPAM.upper()).flagged)
+
+    def test_short_texts_may_repeat(self):
+        first = self.post('Amazing shot')
+        self.assertFalse(self.post('Amazing shot').flagged)
+        self.assertFalse(self.comment(first, 'Wow!').flagged)
+        self.assertFalse(self.comment(first, 'Wow!').flagged)
+
+    def test_text_deleted_elsewhere_no_longer_matches(self):
+        first = self.post(SPAM)
+        # Another worker soft-deletes the post; this index still holds it
+        Content.objects.filter(pk=first.pk).update(deleted_at=timezone.now())
+        self.assertFalse(self.post(SPAM).flagged)
+        self.assertNotIn(('content', first.pk), dedup.get_index().signatures)
+
+    @override_settings(DUPLICATE_TEXT_ACTION='reject')
+    def test_reject_refuses_duplicates(self):
+        self.post(SPAM)
+        response = self.client.post('/api/content/', {
+            'content_type': 'article', 'title': 'Again', 'category': 'other', 'description': SPAM,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('description', response.json())
+
+    def test_rescore_rebuilds_flags(self):
+        first = self.post(SPAM)
+        copy = self.post(SPAM)
+        Content.objects.filter(pk=copy.pk).update(flagged=False)
+        Content.objects.filter(pk=first.pk).update(flagged=True)
+        call_command('rescore_duplicates', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(
+            dict(Content.objects.values_list('pk', 'flagged')), {first.pk: False, copy.pk: True}
+        )
+
+
+def photo(seed, size=(640, 480), quality=90):
+    """A JPEG of a few bright blobs on a gradient, laid out by seed"""
+    width, height = 640, 480
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for i in range(5):
+        x = (seed * 97 + i * 131) % width
+        y = (seed * 53 + i * 71) % height
+        radius = width // 12 + (seed + i) % 20
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=(255, 240, 200))
+    buffer = io.BytesIO()
+    img.resize(size).save(buffer, 'JPEG', quality=quality)
+    return ContentFile(buffer.getvalue())
+
+
+class PerceptualDuplicateTests(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+        perceptual.reset()
+        self.addCleanup(perceptual.reset)
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+
+    def upload(self, author, image, name='photo.jpg'):
+        content = Content.objects.create(author=author, content_type='photo', title='Sky', category='galaxy')
+        content.image.save(name, image)
+        perceptual.check_duplicate(content)
+        content.refresh_from_db()
+        return content
+
+    def test_reupload_is_linked_to_the_original(self):
+        original = self.upload(self.alice, photo(1))
+        resized = self.upload(self.bob, photo(1, size=(320, 240), quality=60))
+        other = self.upload(self.bob, photo(7))
+
+        self.assertIsNone(original.duplicate_of_id)
+        self.assertEqual(resized.duplicate_of_id, original.pk)
+        self.assertFalse(resized.ai_verified)
+        self.assertEqual(resized.ai_reason, 'Matches a photo posted earlier by another user')
+        self.assertIsNone(other.duplicate_of_id)
+        assert_facets_match(self)
+
+    @override_settings(RATELIMIT_ENABLED=False, BACKGROUND_TASKS_SYNC=True)
+    def test_verdict_on_posted_photos_is_read_only(self):
+        self.upload(self.alice, photo(3))
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        image = photo(3, size=(320, 240))
+        image.name = 'mine.jpg'
+        response = client.post('/api/content/', {
+            'content_type': 'photo', 'title': 'Sky', 'category': 'galaxy', 'image': image,
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+        url = f"/api/content/{response.json()['id']}/"
+
+        response = client.patch(url, {'ai_verified': True, 'ai_reason': 'Mine'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        copy = Content.objects.get(pk=response.json()['id'])
+        self.assertIsNotNone(copy.duplicate_of_id)
+        self.assertFalse(copy.ai_verified)
+        self.assertNotEqual(copy.ai_reason, 'Mine')
+
+    def test_unreadable_images_are_logged_not_raised(self):
+        content = self.upload(self.alice, photo(2))
+        with open(content.image.path, 'wb') as f:
+            f.write(b'not an image')
+        with self.assertLogs('luna_app.perceptual', 'WARNING'):
+            perceptual._check_stored(content.pk)
+
+    def test_relinking_clears_posts_that_are_no_longer_duplicates(self):
+        original = self.upload(self.alice, photo(1))
+        other = self.upload(self.bob, photo(7))
+        # A stale link, e.g. left by an older distance setting
+        perceptual.mark_duplicate(other, original.pk, False)
+        other.save()
+
+        IndexImages(stdout=io.StringIO()).link_duplicates(batch_size=1)
+        other.refresh_from_db()
+        self.assertIsNone(other.duplicate_of_id)
+        self.assertNotIn('earlier', other.ai_reason)
+        assert_facets_match(self)
+
+
+class ProfilePayloadTests(TestCase):
+    def test_missing_profile_is_read_not_created(self):
+        user = User.objects.create_user('mira')
+        self.assertEqual(profile_payload(user, ['profile'])['profile']['join_date'], user.date_joined)
+        self.assertFalse(UserProfile.objects.filter(user=user).exists())
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('vega')
+        self.fan = User.objects.create_user('deneb')
+        self.post = Content.objects.create(author=self.author, content_type='article', title='M13', category='stars')
+        Like.objects.create(user=self.fan, content=self.post)
+        Notification.objects.create(recipient=self.author, verb='like', content=self.post, last_actor=self.fan)
+
+    def test_likes_and_comments_of_deleted_posts_are_not_counted(self):
+        Comment.objects.create(user=self.fan, content=self.post, text='Great cluster')
+        self.client.force_login(self.author)
+        stats = self.client.get('/api/profile/').json()
+        self.assertEqual((stats['total_likes'], stats['total_comments']), (1, 1))
+        soft_delete_contents(Content.objects.filter(pk=self.post.pk))
+        stats = self.client.get('/api/profile/').json()
+        self.assertEqual((stats['total_likes'], stats['total_comments']), (0, 0))
+
+    def test_replies_are_counted_where_nesting_stops(self):
+        top = Comment.objects.create(user=self.fan, content=self.post, text='Level 0')
+        parent = top
+        for level in range(1, 5):
+            parent = Comment.objects.create(user=self.fan, content=self.post, parent=parent, text=f'Level {level}')
+        Comment.objects.create(user=self.fan, content=self.post, parent=parent.parent.parent, text='Removed', deleted_at=timezone.now())
+
+        with self.assertNumQueries(4):
+            data = self.client.get(f'/api/comments/{top.pk}/').json()
+        self.assertEqual(data['replies_count'], 1)
+        deepest = data['replies'][0]['replies'][0]
+        self.assertEqual((deepest['text'], deepest['replies'], deepest['replies_count']), ('Level 2', [], 1))
+
+        data = self.client.get(f'/api/comments/{top.pk}/?fields=text,replies_count').json()
+        self.assertEqual(data, {'id': str(top.pk), 'text': 'Level 0', 'replies_count': 1})
+
+    @override_settings(PURGE_AFTER_HOURS=24)
+    def test_site_export_leaves_out_deleted_accounts(self):
+        UserProfile.objects.create(user=self.author, profile_picture='profile_pics/vega.jpg')
+        UserProfile.objects.create(user=self.fan, profile_picture='profile_pics/deneb.jpg')
+        soft_delete_user(self.author)
+        media = dict(export_sections())['media']
+        self.assertEqual([row['name'] for row in media], ['profile_pics/deneb.jpg'])
+
+    def test_purge_removes_a_deleted_users_notifications(self):
+        other = Content.objects.create(author=self.fan, content_type='article', title='M31', category='galaxy')
+        kept = Notification.objects.create(recipient=self.fan, verb='like', content=other, last_actor=self.author)
+        soft_delete_user(self.author)
+        deleted = purge(pause=0)
+        self.assertEqual(deleted['luna_app.Notification'], 1)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        kept.refresh_from_db()
+        self.assertIsNone(kept.last_actor_id)
+        assert_facets_match(self)
+
+    @override_settings(BACKGROUND_TASKS_SYNC=True, ADMIN_BACKGROUND_THRESHOLD=1)
+    def test_admin_deletes_accounts_in_batches(self):
+        admin = User.objects.create_superuser('rigel', password='x')
+        self.client.force_login(admin)
+        response = self.client.post('/admin/auth/user/', {
+            'action': 'delete_accounts', '_selected_action': [self.author.pk, self.fan.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ['Deleting 2 rows in the background.'])
+        # Deactivated, then purged at once by the inline background task
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['rigel'])
+        self.assertFalse(Content.objects.filter(pk=self.post.pk).exists())
+
+    def test_batches_page_by_key(self):
+        for i in range(4):
+            Comment.objects.create(user=self.fan, content=self.post, text=f'Comment {i}')
+        seen = []
+        with self.assertNumQueries(7):
+            for batch in in_batches(Comment.objects.all(), batch_size=2):
+                pks = list(batch.values_list('pk', flat=True))
+                seen.extend(pks)
+                # Rows handled in one batch are not revisited by the next
+                Comment.objects.filter(pk__in=pks).update(text='seen')
+        self.assertEqual(sorted(seen), sorted(Comment.objects.values_list('pk', flat=True)))
+
+
+@override_settings(BACKGROUND_TASKS_SYNC=True)
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('altair')
+        self.fans = [User.objects.create_user(name) for name in ('sirius', 'rigel', 'spica')]
+        self.post = Content.objects.create(author=self.author, content_type='photo', title='M42', category='nebula')
+
+    def test_repeat_actors_count_once(self):
+        for fan in (self.fans[0], self.fans[0], self.fans[1], self.fans[0]):
+            notifications.notify(self.author, fan, 'comment', self.post)
+        row = Notification.objects.get()
+        self.assertEqual(row.actor_count, 2)
+        self.assertEqual(row.last_actor, self.fans[0])
+        self.assertEqual(notifications.describe(row), 'sirius and 1 other commented on your photo "M42"')
+
+    def test_own_actions_are_not_notified(self):
+        notifications.notify(self.author, self.author, 'like', self.post)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_unread_count_follows_mark_read(self):
+        notifications.notify(self.author, self.fans[0], 'like', self.post)
+        notifications.notify(self.author, self.fans[1], 'comment', self.post)
+        self.assertEqual(notifications.unread_count(self.author), 2)
+        self.assertEqual(notifications.mark_read(self.author), 2)
+        self.assertEqual(notifications.unread_count(self.author), 0)
+
+        # A read row is not reopened; the next like starts a new one
+        notifications.notify(self.author, self.fans[2], 'like', self.post)
+        self.assertEqual(notifications.unread_count(self.author), 1)
+        self.assertEqual(Notification.objects.get(is_read=False).actor_count, 1)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.hour = analytics.floor_hour(timezone.now() - timedelta(days=2)).replace(hour=10)
+        self.author = User.objects.create_user('polaris')
+
+    def post(self, minutes, logged):
+        at = self.hour + timedelta(minutes=minutes)
+        content = Content.objects.create(author=self.author, content_type='photo', title='Sky', category='planet')
+        Content.objects.filter(pk=content.pk).update(created_at=at)
+        if logged:
+            ActivityEvent.objects.create(kind='post', category='planet', content_type='photo',
+                                         content_id=content.pk, created_at=at)
+
+    def counts(self, period):
+        return dict(ActivityRollup.objects.filter(period=period, kind='post').values_list('bucket', 'count'))
+
+    def test_backfill_and_log_share_the_hour_the_log_starts_in(self):
+        # Two posts before the log existed, then two logged ones
+        self.post(5, logged=False)
+        self.post(20, logged=False)
+        self.post(30, logged=True)
+        self.post(70, logged=True)
+
+        self.assertEqual(analytics.backfill(), 3)
+        self.assertEqual(self.counts('hour'), {self.hour: 3})
+
+        for _ in range(2):
+            analytics.roll_up()
+            self.assertEqual(self.counts('hour'), {self.hour: 3, self.hour + timedelta(hours=1): 1})
+            self.assertEqual(self.counts('day'), {self.hour.replace(hour=0): 4})
+
+        # Asking for an earlier start still leaves the backfilled part alone
+        analytics.roll_up(since=self.hour - timedelta(days=1))
+        self.assertEqual(self.counts('hour')[self.hour], 3)
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class EventFeedTests(TestCase):
+    def setUp(self):
+        self.event = CosmicEvent.objects.create(
+            title='Perseids', description='Peak, up to 100 an hour', event_type='meteor_shower',
+            event_date=timezone.now() + timedelta(days=3),
+        )
+
+    def test_current_etag_gets_304_without_queries(self):
+        response = self.client.get('/api/events/calendar.ics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'SUMMARY:Perseids', response.content)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/events/calendar.ics', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        self.event.title = 'Perseids (peak)'
+        self.event.save()
+        response = self.client.get('/api/events/calendar.ics', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_feeds_are_cached_per_type_filter(self):
+        month = f'{timezone.localtime(self.event.event_date):%Y-%m}'
+        response = self.client.get('/api/events/calendar.json', {'start': month, 'type': 'meteor_shower'})
+        self.assertEqual(len(response.json()['events']), 1)
+        other = self.client.get('/api/events/calendar.json', {'start': month, 'type': 'eclipse'})
+        self.assertEqual(other.json()['events'], [])
+        self.assertNotEqual(other['ETag'], response['ETag'])
+
+        response = self.client.get('/api/events/calendar.json', {'start': month, 'type': 'meteor_shower'},
+                                   HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lyra')
+        for i in range(5):
+            Content.objects.create(author=self.user, content_type='article', title=f'Post {i}',
+                                   category='other', description='A long night at the eyepiece. ' * 5)
+
+    def encoding(self, **headers):
+        response = self.client.get('/api/content/', HTTP_ACCEPT_ENCODING='gzip, br', **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get('Content-Encoding')
+
+    def test_brotli_only_without_credentials(self):
+        self.assertEqual(self.encoding(), 'br')
+        self.assertEqual(self.encoding(HTTP_AUTHORIZATION=f'Token {issue_token(self.user).key}'), 'gzip')
+        self.client.force_login(self.user)
+        self.assertEqual(self.encoding(), 'gzip')
+
+    def test_streaming_the_whole_list_needs_a_user(self):
+        self.assertIn(self.client.get('/api/content/', {'stream': '1'}).status_code, (401, 403))
+        self.client.force_login(self.user)
+        response = self.client.get('/api/content/', {'stream': '1'})
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 5)
+
+    async def test_streams_part_by_part_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/content/', {'stream': '1'})
+        self.assertTrue(response.is_async)
+        parts = [part async for part in response.streaming_content]
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(len(json.loads(b''.join(parts))), 5)
+
+
+class GenerationCacheTests(TestCase):
+    def test_generations_live_outside_the_per_worker_cache(self):
+        from django.core.cache import cache
+        from .caching import bump_content_generation, content_generation
+
+        generation = content_generation()
+        # Another worker's default cache knows nothing of this one's...
+        cache.clear()
+        # ...but reads the same generation, and sees every bump
+        self.assertEqual(content_generation(), generation)
+        bump_content_generation()
+        self.assertEqual(content_generation(), generation + 1)
+
+
+class RecommendIndexTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(RECOMMEND_INDEX_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.author = User.objects.create_user('hadar')
+        for title in ('Jupiter moons', 'Saturn rings', 'Orion nebula'):
+            Content.objects.create(author=self.author, content_type='article', title=title, category='planet')
+
+    def version(self):
+        store = recommend.VectorStore(settings.RECOMMEND_INDEX_DIR)
+        store.load()
+        return store.meta['version']
+
+    def test_refresh_without_changes_keeps_the_version(self):
+        recommend.build()
+        version = self.version()
+        self.assertEqual(recommend.refresh(), 0)
+        self.assertEqual(self.version(), version)
+
+    def test_previous_version_outlives_one_commit(self):
+        recommend.build()
+        first = self.version()
+        reader = recommend.VectorStore(settings.RECOMMEND_INDEX_DIR)
+        with open(reader.meta_path) as f:
+            stale = json.load(f)
+
+        recommend.build()
+        # A reader that read meta.json just before the commit still finds its files
+        self.assertTrue(os.path.exists(reader._path('vectors', first)))
+        recommend.build()
+        self.assertFalse(os.path.exists(reader._path('vectors', first)))
+
+        # One two commits behind reads meta.json again
+        with open(reader.meta_path) as f:
+            current = json.load(f)
+        with mock.patch.object(recommend.json, 'load', side_effect=[stale, current]):
+            self.assertTrue(reader.load())
+        self.assertEqual(reader.meta['version'], current['version'])
+
+
+class ArticleRenderingTests(TestCase):
+    def test_everything_is_escaped(self):
+        html = render_html('<script>alert(1)</script> & <b onclick="x">hi</b>')
+        self.assertNotIn('<script', html)
+        self.assertNotIn('<b ', html)
+        self.assertIn('&lt;script&gt;', html)
+        self.assertIn('&amp;', html)
+
+    def test_urls_become_nofollow_links(self):
+        html = render_html('See https://apod.nasa.gov/apod/ for more')
+        self.assertIn('<a href="https://apod.nasa.gov/apod/" rel="nofollow">', html)
+        html = render_html('https://x.com/"onmouseover="alert(1)')
+        self.assertNotIn('"onmouseover', html)
+
+    def test_emphasis_stays_out_of_links(self):
+        self.assertEqual(
+            render_html('http://x.com/**a** is **bold**, *not* this*'),
+            '<p><a href="http://x.com/**a**" rel="nofollow">http://x.com/**a**</a> is '
+            '<strong>bold</strong>, <em>not</em> this*</p>',
+        )
+
+    def test_blocks(self):
+        self.assertEqual(
+            render_html('# Setup\n\n- Dobsonian\n- *Red* light\n\nLine one\nline two'),
+            '<h2>Setup</h2>\n<ul><li>Dobsonian</li><li><em>Red</em> light</li></ul>\n'
+            '<p>Line one<br>line two</p>',
+        )
+        self.assertEqual(plain_text('# Setup\n- **Dobsonian** and *red* light'), 'Setup Dobsonian and red light')
@@ -0,0 +1,246 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+# Deep-zoom (DZI) tile pyramids for large photos. Level L of an image W x H
+# wide is ceil(W / 2**(max - L)) x ceil(H / 2**(max - L)) pixels, where max =
+# ceil(log2(max(W, H))) is full size and level 0 is 1 x 1. Each level is cut
+# into TILE_SIZE tiles overlapping their neighbours by TILE_OVERLAP pixels,
+# stored as tiles/<key>_files/<level>/<col>_<row>.jpg next to the
+# tiles/<key>.dzi descriptor. A viewer fetches only the tiles in view at the
+# zoom it needs instead of the whole original.
+#
+# The key is the image's blob digest, so every post of the same file shares
+# one pyramid and its tile URLs never change. Pyramids are built in a worker
+# process. With pyvips installed the image is decoded sequentially, a strip
+# at a time, so memory stays flat however big it is; the Pillow fallback
+# decodes the whole image and lets the JPEG decoder scale it down first if it
+# is over TILE_MAX_PIXELS. The imaging libraries are imported where they are
+# used: serving tiles and URLs for them needs neither.
+
+TILE_DIR = 'tiles'
+DZI_NS = 'http://schemas.microsoft.com/deepzoom/2008'
+
+_executor = None
+_lock = threading.Lock()
+
+
+def pyramid_key(image_name):
+    """The blob digest of a stored image (a hash of its name for pre-blob files)"""
+    from .storage import is_blob_name
+
+    if is_blob_name(image_name):
+        return os.path.splitext(os.path.basename(image_name))[0]
+    return hashlib.sha256(image_name.encode()).hexdigest()
+
+
+def tile_root():
+    return os.path.join(settings.MEDIA_ROOT, TILE_DIR)
+
+
+def dzi_url(image_name):
+    return f'{settings.MEDIA_URL}{TILE_DIR}/{pyramid_key(image_name)}.dzi'
+
+
+def needs_tiles(path):
+    """Whether an image is big enough to be worth tiling; reads only its header"""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return max(img.size) > settings.TILE_MIN_SIZE
+    except Image.DecompressionBombError:
+        # Over Pillow's pixel limit, so certainly large
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def dzi_xml(width, height, tile_size, overlap, fmt='jpg'):
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Image xmlns="{DZI_NS}" Format="{fmt}" Overlap="{overlap}" TileSize="{tile_size}">'
+        f'<Size Width="{width}" Height="{height}"/></Image>\n'
+    )
+
+
+def _save_level(img, level_dir, tile_size, overlap, quality):
+    os.makedirs(level_dir)
+    width, height = img.size
+    for row in range(math.ceil(height / tile_size)):
+        top = max(row * tile_size - overlap, 0)
+        bottom = min((row + 1) * tile_size + overlap, height)
+        for col in range(math.ceil(width / tile_size)):
+            left = max(col * tile_size - overlap, 0)
+            right = min((col + 1) * tile_size + overlap, width)
+            img.crop((left, top, right, bottom)).save(
+                os.path.join(level_dir, f'{col}_{row}.jpg'), 'JPEG', quality=quality
+            )
+
+
+def _build_with_pillow(src, base, tile_size, overlap, quality, max_pixels):
+    from PIL import Image
+
+    try:
+        img = Image.open(src)
+    except Image.DecompressionBombError as exc:
+        raise ValueError(f'{src} is too large to tile without pyvips') from exc
+    with img:
+        width, height = img.size
+        if width * height > max_pixels:
+            # JPEG decodes at 1/2, 1/4 or 1/8 scale for much less memory; the
+            # pyramid then tops out at that size
+            scale = math.sqrt(max_pixels / (width * height))
+            img.draft('RGB', (int(width * scale), int(height * scale)))
+            if img.size[0] * img.size[1] > max_pixels:
+                raise ValueError(f'{src} is too large to tile without pyvips')
+        level_img = img.convert('RGB')
+
+    width, height = level_img.size
+    levels = math.ceil(math.log2(max(width, height))) + 1
+    for level in range(levels - 1, -1, -1):
+        _save_level(level_img, os.path.join(f'{base}_files', str(level)), tile_size, overlap, quality)
+        if level:
+            size = (math.ceil(level_img.width / 2), math.ceil(level_img.height / 2))
+            level_img = level_img.resize(size, Image.Resampling.BOX)
+    with open(f'{base}.dzi', 'w') as f:
+        f.write(dzi_xml(width, height, tile_size, overlap))
+
+
+def _pyvips():
+    try:
+        import pyvips
+    except (ImportError, OSError):
+        return None
+    return pyvips
+
+
+def build_pyramid(src, root, key, tile_size, overlap, quality, max_pixels):
+    """
+    Write the tile pyramid for the image at src to root/<key>.dzi and
+    root/<key>_files/. Runs in a worker process, so it takes no Django state.
+    Returns False if the pyramid already existed.
+    """
+    if os.path.exists(os.path.join(root, f'{key}.dzi')):
+        return False
+    os.makedirs(root, exist_ok=True)
+    work = tempfile.mkdtemp(dir=root, prefix=f'.{key}.')
+    try:
+        base = os.path.join(work, key)
+        pyvips = _pyvips()
+        if pyvips is not None:
+            image = pyvips.Image.new_from_file(src, access='sequential')
+            image.dzsave(base, tile_size=tile_size, overlap=overlap, suffix=f'.jpg[Q={quality}]')
+        else:
+            _build_with_pillow(src, base, tile_size, overlap, quality, max_pixels)
+        # The descriptor goes last: once it exists the tiles are all in place
+        files = os.path.join(root, f'{key}_files')
+        if os.path.exists(files):
+            shutil.rmtree(files)
+        os.replace(f'{base}_files', files)
+        os.replace(f'{base}.dzi', os.path.join(root, f'{key}.dzi'))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return True
+
+
+def remove_pyramid(image_name):
+    root = tile_root()
+    key = pyramid_key(image_name)
+    dzi = os.path.join(root, f'{key}.dzi')
+    if os.path.exists(dzi):
+        os.remove(dzi)
+    shutil.rmtree(os.path.join(root, f'{key}_files'), ignore_errors=True)
+
+
+def _get_pool():
+    global _executor
+    with _lock:
+        if _executor is None and settings.TILE_WORKERS > 0:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.TILE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def generate(image_name, path):
+    """Build the pyramid for a stored image (in the tile pool) and flag every post using it"""
+    from .caching import bump_content_generation
+    from .models import Content
+
+    args = (path, tile_root(), pyramid_key(image_name), settings.TILE_SIZE,
+            settings.TILE_OVERLAP, settings.TILE_QUALITY, settings.TILE_MAX_PIXELS)
+    pool = _get_pool()
+    if pool is None:
+        build_pyramid(*args)
+    else:
+        pool.submit(build_pyramid, *args).result()
+    if Content.all_objects.filter(image=image_name, has_tiles=False).update(has_tiles=True):
+        bump_content_generation()
+
+
+def schedule_tiles(content):
+    """Tile a newly posted photo in the background if it is large"""
+    from .tasks import run_in_background
+
+    if not content.image or content.has_tiles:
+        return
+    path = content.image.path
+    if needs_tiles(path):
+        run_in_background(generate, content.image.name, path)
+
+
+class TileCache:
+    """Recently served tiles' bytes, least recently used evicted first"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            data = self._tiles.pop(path, None)
+            if data is not None:
+                self._tiles[path] = data
+            return data
+
+    def put(self, path, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._tiles.pop(path, None)
+            self.size += len(data) - (len(old) if old is not None else 0)
+            self._tiles[path] = data
+            while self.size > self.max_bytes:
+                evicted_path, evicted = self._tiles.popitem(last=False)
+                self.size -= len(evicted)
+
+
+_tile_cache = None
+
+
+def read_tile(path):
+    """A tile's bytes (or descriptor's), from the tile cache or disk; None if missing"""
+    global _tile_cache
+    if _tile_cache is None:
+        _tile_cache = TileCache(settings.TILE_CACHE_BYTES)
+    data = _tile_cache.get(path)
+    if data is None:
+        try:
+            with open(os.path.join(tile_root(), path), 'rb') as f:
+                data = f.read()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        _tile_cache.put(path, data)
+    return data
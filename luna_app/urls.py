@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    ContentViewSet, CommentViewSet, CosmicEventViewSet,
+    ContentViewSet, CommentViewSet, CosmicEventViewSet, NotificationViewSet,
     RegisterView, LoginView, LogoutView, UserProfileView,
-    ProfileUpdateView, AvatarUploadView, ChangePasswordView,
-    get_current_user
+    ProfileUpdateView, AvatarUploadView, ChangePasswordView, AccountDeleteView,
+    ExportView, AnalyticsView, CosmicEventAnalyticsView, get_current_user,
+    async_current_user, async_profile, dashboard, events_calendar, events_ics
 )
 # from .views import api_login, api_logout, api_register
 
@@ -12,6 +13,7 @@ router = DefaultRouter()
 router.register(r'content', ContentViewSet, basename='content')
 router.register(r'comments', CommentViewSet, basename='comment')
 router.register(r'events', CosmicEventViewSet, basename='event')
+router.register(r'notifications', NotificationViewSet, basename='notification')
 
 
 # urlpatterns = [
@@ -23,6 +25,9 @@ router.register(r'events', CosmicEventViewSet, basename='event')
 # ]
 
 urlpatterns = [
+    # Before the router, whose events/<pk>/ would take them
+    path('events/calendar.ics', events_ics, name='events_ics'),
+    path('events/calendar.json', events_calendar, name='events_calendar'),
     path('', include(router.urls)),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
@@ -31,5 +36,12 @@ urlpatterns = [
     path('profile/update/', ProfileUpdateView.as_view(), name='profile_update'),
     path('profile/avatar/', AvatarUploadView.as_view(), name='avatar_upload'),
     path('profile/change-password/', ChangePasswordView.as_view(), name='change_password'),
+    path('profile/delete/', AccountDeleteView.as_view(), name='account_delete'),
     path('current-user/', get_current_user, name='current_user'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('analytics/', AnalyticsView.as_view(), name='analytics'),
+    path('analytics/cosmic-events/', CosmicEventAnalyticsView.as_view(), name='analytics_cosmic_events'),
+    path('dashboard/', dashboard, name='dashboard'),
+    path('async/profile/', async_profile, name='async_profile'),
+    path('async/current-user/', async_current_user, name='async_current_user'),
 ]
\ No newline at end of file
@@ -1,72 +1,104 @@
 from rest_framework import viewsets, status, permissions, generics
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed, Throttled, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
+from django.contrib.auth import aauthenticate, alogin, authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from datetime import datetime, timedelta
+from functools import partial
+import asyncio
 import uuid
-from .models import Content, Like, Comment, CosmicEvent, UserProfile
+from asgiref.sync import sync_to_async
+from .models import ActivityEvent, Content, Like, Comment, CosmicEvent, UserProfile
 from .serializers import (
     ContentSerializer, CommentSerializer, LikeSerializer,
-    CosmicEventSerializer, RegisterSerializer, UserSerializer,
+    CosmicEventSerializer, NotificationSerializer, RegisterSerializer, UserSerializer,
     UserProfileSerializer, UserProfileUpdateSerializer
 )
-from django.http import JsonResponse
+from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
 import json
+import mimetypes
+import os
+import re
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout as auth_logout
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
+from .parsers import FastJSONParser, loads
+from .renderers import dumps, iter_json_array
 from django.shortcuts import render, redirect
 from rest_framework.permissions import IsAuthenticated
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_safe
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .authentication import CachedTokenAuthentication, issue_token, revoke_token
+from .caching import content_generation
+from .facets import facet_counts
+from . import analytics, eventfeeds, notifications, readpool
+from .tiles import read_tile, schedule_tiles
+from .purge import schedule_purge, soft_delete_comments, soft_delete_contents, soft_delete_user
+from .ratelimit import check_request, ratelimit, too_many_requests, username_key
+from .storage import BLOB_DIR, CHUNK_SIZE, media_storage
+from .hashing import (
+    HashingBusy, amake_password, check_password, make_password
+)
+
+def current_profile_data(user):
+    try:
+        profile = UserProfile.objects.get(user=user)
+        return UserProfileSerializer(profile).data
+    except UserProfile.DoesNotExist:
+        return {
+            'bio': '',
+            'location': '',
+            'profile_picture': None,
+            'join_date': None
+        }
 
 @api_view(['GET'])
 def get_current_user(request):
     """Get current user data"""
     if request.user.is_authenticated:
         user = request.user
-        try:
-            profile = UserProfile.objects.get(user=user)
-            profile_data = UserProfileSerializer(profile).data
-        except UserProfile.DoesNotExist:
-            profile_data = {
-                'bio': '',
-                'location': '',
-                'profile_picture': None,
-                'join_date': None
-            }
-        
         return Response({
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'date_joined': user.date_joined
-            },
-            'profile': profile_data
+            'user': user_data(user),
+            'profile': current_profile_data(user)
         })
     return Response({'error': 'Not authenticated'}, status=401)
 
+def hashing_busy_response(exc):
+    response = JsonResponse({'error': exc.detail}, status=429)
+    response['Retry-After'] = str(exc.wait)
+    return response
+
 @csrf_exempt
-def api_login(request):
+@ratelimit('login')
+async def api_login(request):
     if request.method == 'POST':
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             username = data.get('username')
             password = data.get('password')
             
-            user = authenticate(username=username, password=password)
+            wait = check_request('login_username', username_key(username))
+            if wait:
+                return too_many_requests(wait)
+            try:
+                user = await aauthenticate(request, username=username, password=password)
+            except HashingBusy as exc:
+                return hashing_busy_response(exc)
             if user is not None:
-                login(request, user)
+                await alogin(request, user)
                 return JsonResponse({
                     'success': True,
                     'user': {
@@ -88,35 +120,40 @@ def api_logout(request):
         return JsonResponse({'success': True})
 
 @csrf_exempt
-def api_register(request):
+@ratelimit('register')
+async def api_register(request):
     if request.method == 'POST':
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             username = data.get('username')
             email = data.get('email')
             password = data.get('password')
             first_name = data.get('first_name', '')
             
             # Check if user already exists
-            if User.objects.filter(username=username).exists():
+            if await User.objects.filter(username=username).aexists():
                 return JsonResponse({'error': 'Username already exists'}, status=400)
             
-            if User.objects.filter(email=email).exists():
+            if await User.objects.filter(email=email).aexists():
                 return JsonResponse({'error': 'Email already exists'}, status=400)
             
-            # Create user
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
+            # Create user, hashing the password off the event loop
+            user = User(
+                username=User.normalize_username(username),
+                email=User.objects.normalize_email(email),
                 first_name=first_name
             )
+            try:
+                user.password = await amake_password(password)
+            except HashingBusy as exc:
+                return hashing_busy_response(exc)
+            await user.asave()
             
             # Create user profile
-            UserProfile.objects.create(user=user)
+            await UserProfile.objects.acreate(user=user)
             
             # Auto login
-            login(request, user)
+            await alogin(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             
             return JsonResponse({
                 'success': True,
@@ -130,34 +167,166 @@ def api_register(request):
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
-class ContentViewSet(viewsets.ModelViewSet):
+def parse_moment(value, param):
+    """An aware datetime from an ISO date or datetime query parameter"""
+    try:
+        moment = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({param: 'Use an ISO date or datetime'})
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+class StreamingListMixin:
+    """
+    ?stream=1 returns the whole, unpaginated list as a streamed JSON array,
+    to signed-in users only
+    """
+    stream_chunk_size = 500
+    
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        if not request.user.is_authenticated:
+            self.permission_denied(request, message='Sign in to stream the full list.')
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            iter_json_array(self.serialized_batches(queryset)),
+            content_type='application/json'
+        )
+    
+    def serialized_batches(self, queryset):
+        batch = []
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            batch.append(obj)
+            if len(batch) == self.stream_chunk_size:
+                yield self.get_serializer(batch, many=True).data
+                batch = []
+        if batch:
+            yield self.get_serializer(batch, many=True).data
+
+def comment_posted(comment):
+    """Log a new comment and tell the post's author, and the parent comment's author about a reply"""
+    content = comment.content
+    analytics.record('comment', content, comment.user)
+    notifications.notify(content.author, comment.user, 'comment', content)
+    if comment.parent is not None and comment.parent.user_id != content.author_id:
+        notifications.notify(comment.parent.user, comment.user, 'reply', content)
+
+class ContentViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Content.objects.all()
     serializer_class = ContentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    throttle_scopes = {'create': 'upload', 'like': 'like', 'unlike': 'like', 'comment': 'comment'}
     
     def get_queryset(self):
-        """Override to filter by author if author parameter is provided"""
-        queryset = Content.objects.all()
-        author_id = self.request.query_params.get('author', None)
+        """Visible posts, narrowed by the filters in the query string"""
+        queryset = self.filter_by_params(Content.objects.visible_to(self.request.user))
+        return ContentSerializer.optimize_queryset(queryset, self.get_fieldset(), self.request.user)
+    
+    def filter_by_params(self, queryset):
+        """
+        ?author=, ?category= and ?content_type= (comma-separated for several),
+        ?ai_verified=true|false and ?created_after= / ?created_before= (ISO date
+        or datetime). Each pairs with a (field, -created_at) index on Content.
+        """
+        params = self.request.query_params
+        author_id = params.get('author', None)
         
         if author_id:
             queryset = queryset.filter(author_id=author_id)
         
+        for field, choices in (('category', Content.CATEGORIES), ('content_type', Content.CONTENT_TYPES)):
+            if params.get(field):
+                values = params[field].split(',')
+                unknown = set(values) - {value for value, label in choices}
+                if unknown:
+                    raise ValidationError({field: f"Unknown value(s): {', '.join(sorted(unknown))}"})
+                queryset = queryset.filter(**{f'{field}__in': values})
+        
+        verified = params.get('ai_verified')
+        if verified:
+            if verified not in ('true', 'false', '1', '0'):
+                raise ValidationError({'ai_verified': 'Use true or false'})
+            queryset = queryset.filter(ai_verified=verified in ('true', '1'))
+        
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: parse_moment(params[param], param)})
         return queryset
     
+    def get_fieldset(self):
+        """Fields the response will contain (?profile=, ?fields=, ?expand=)"""
+        if self.request.method not in permissions.SAFE_METHODS:
+            return ContentSerializer.Meta.fields
+        return ContentSerializer.requested_fields(self.request, self.get_profile())
+    
+    def get_profile(self):
+        """Lists default to the 'detail' profile: excerpts instead of article bodies"""
+        return self.request.query_params.get('profile') or ('detail' if self.action in ('list', 'feed') else None)
+    
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'profile': self.get_profile()}
+    
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        # numpy-backed, so imported on first use rather than when a worker starts
+        from .dedup import remember, screen_text
+        from .perceptual import schedule_check
+        
+        signature, duplicate = screen_text(serializer.validated_data.get('description'), 'description')
+        content = serializer.save(author=self.request.user, flagged=duplicate)
+        analytics.record('post', content, self.request.user)
+        remember(signature, content=content)
+        schedule_check(content)
+        schedule_tiles(content)
+    
+    def perform_destroy(self, instance):
+        # Hidden now; likes, comments and media are purged in the background
+        soft_delete_contents(Content.objects.filter(pk=instance.pk))
+        schedule_purge()
     
     @action(detail=False, methods=['get'])
     def feed(self, request):
         """Get feed of content ordered by creation date"""
-        contents = Content.objects.all().order_by('-created_at')
+        contents = self.get_queryset().order_by('-created_at')
         page = self.paginate_queryset(contents)
         if page is not None:
-            serializer = self.get_serializer(page, many=True, context={'request': request})
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = self.get_serializer(contents, many=True, context={'request': request})
+        serializer = self.get_serializer(contents, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Public post counts per category, content type and AI verification"""
+        return Response(facet_counts())
+    
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """Posts most like this one (?limit=, default 6), as cards unless ?profile= says otherwise"""
+        content = get_object_or_404(Content.objects.visible_to(request.user), pk=pk)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 6)), 50))
+        except ValueError:
+            limit = 6
+        from . import recommend
+        
+        # Ask for extra in case some are hidden or deleted since the last build
+        ranked = recommend.related(content, limit * 2)
+        
+        profile = request.query_params.get('profile', 'card')
+        fields = ContentSerializer.requested_fields(request, profile)
+        queryset = ContentSerializer.optimize_queryset(
+            Content.objects.visible_to(request.user).filter(pk__in=ranked), fields, request.user
+        )
+        by_id = {post.pk.hex: post for post in queryset}
+        posts = [by_id[key] for key in ranked if key in by_id][:limit]
+        serializer = ContentSerializer(posts, many=True, context={'request': request, 'profile': profile})
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -168,6 +337,8 @@ class ContentViewSet(viewsets.ModelViewSet):
             content=content
         )
         if created:
+            analytics.record('like', content, request.user)
+            notifications.notify(content.author, request.user, 'like', content)
             return Response({'status': 'liked'}, status=status.HTTP_201_CREATED)
         return Response({'status': 'already liked'}, status=status.HTTP_200_OK)
     
@@ -179,6 +350,8 @@ class ContentViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def comment(self, request, pk=None):
+        from .dedup import remember, screen_text
+        
         content = self.get_object()
         parent_id = request.data.get('parent_id')
         parent = None
@@ -189,24 +362,46 @@ class ContentViewSet(viewsets.ModelViewSet):
             except Comment.DoesNotExist:
                 pass
         
+        text = request.data.get('text', '')
+        signature, duplicate = screen_text(text)
         comment = Comment.objects.create(
             user=request.user,
             content=content,
             parent=parent,
-            text=request.data.get('text', '')
+            text=text,
+            flagged=duplicate
         )
+        remember(signature, comment=comment)
+        comment_posted(comment)
         
         serializer = CommentSerializer(comment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    throttle_scopes = {'create': 'comment'}
+    
+    def get_queryset(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            fields = CommentSerializer.Meta.fields
+        else:
+            fields = CommentSerializer.requested_fields(self.request)
+        return CommentSerializer.optimize_queryset(Comment.objects.all(), fields)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        from .dedup import remember, screen_text
+        
+        signature, duplicate = screen_text(serializer.validated_data.get('text'))
+        comment = serializer.save(user=self.request.user, flagged=duplicate)
+        remember(signature, comment=comment)
+        comment_posted(comment)
+    
+    def perform_destroy(self, instance):
+        soft_delete_comments([instance.pk])
+        schedule_purge()
     
     def destroy(self, request, *args, **kwargs):
         comment = self.get_object()
@@ -217,6 +412,33 @@ class CommentViewSet(viewsets.ModelViewSet):
             )
         return super().destroy(request, *args, **kwargs)
 
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """The caller's notifications, most recently active first"""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = notifications.inbox(self.request.user).select_related('last_actor', 'content')
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread': notifications.unread_count(request.user)})
+    
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """Mark the notifications in ids read, or all of them when ids is left out"""
+        ids = request.data.get('ids')
+        if ids is not None and not isinstance(ids, list):
+            return Response({'error': 'ids must be a list'}, status=400)
+        try:
+            changed = notifications.mark_read(request.user, ids)
+        except (ValueError, DjangoValidationError):
+            return Response({'error': 'ids must be notification ids'}, status=400)
+        return Response({'marked_read': changed, 'unread': notifications.unread_count(request.user)})
+
 # class RegisterView(APIView):
 #     permission_classes = [permissions.AllowAny]
     
@@ -233,6 +455,7 @@ class CommentViewSet(viewsets.ModelViewSet):
 #         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'register'
     
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -245,24 +468,33 @@ class RegisterView(APIView):
             
             # Auto login after registration
             login(request, user)
+            token = issue_token(user)
             return Response({
                 'user': UserSerializer(user).data,
+                'token': token.key,
                 'message': 'Registration successful'
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
     
     def post(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
         
-        user = authenticate(username=username, password=password)
+        wait = check_request('login_username', username_key(username))
+        if wait:
+            raise Throttled(wait)
+        # Verify in the hashing pool; raises HashingBusy (429) when saturated
+        user = authenticate(request, username=username, password=password)
         
         if user is not None:
             login(request, user)
+            token = issue_token(user)
             return Response({
                 'user': UserSerializer(user).data,
+                'token': token.key,
                 'message': 'Login successful'
             })
         return Response(
@@ -272,6 +504,9 @@ class LoginView(APIView):
 
 class LogoutView(APIView):
     def post(self, request):
+        # Token clients log out by revoking their token
+        if request.auth is not None:
+            revoke_token(request.user)
         logout(request)
         return Response({'message': 'Logout successful'})
 
@@ -304,46 +539,179 @@ class CosmicEventViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(today_events, many=True)
         return Response(serializer.data)
 
+def feed_response(request, feed, content_type):
+    """A cached calendar feed, or 304 Not Modified if the client already has it"""
+    body, etag, last_modified = feed
+    response = HttpResponse(body, content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.EVENT_FEED_MAX_AGE}'
+    timestamp = None
+    if last_modified is not None:
+        timestamp = int(last_modified.timestamp())
+        response['Last-Modified'] = http_date(timestamp)
+    return get_conditional_response(request, etag=etag, last_modified=timestamp, response=response)
+
+@require_safe
+def events_ics(request):
+    """Subscribable iCalendar feed of cosmic events, optionally only some ?type=meteor_shower,eclipse"""
+    try:
+        types = eventfeeds.parse_types(request.GET.get('type', ''))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    response = feed_response(request, eventfeeds.ics_feed(types), 'text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="luna-events.ics"'
+    return response
+
+@require_safe
+def events_calendar(request):
+    """Cosmic events by month, ?start=YYYY-MM to ?end=YYYY-MM inclusive (default this month), ?type="""
+    params = request.GET
+    try:
+        types = eventfeeds.parse_types(params.get('type', ''))
+        this_month = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        start = eventfeeds.parse_month(params['start']) if params.get('start') else this_month
+        end = eventfeeds.next_month(eventfeeds.parse_month(params['end']) if params.get('end') else start)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    if start >= end:
+        return JsonResponse({'error': 'start must not be after end'}, status=400)
+    if (end.year - start.year) * 12 + end.month - start.month > settings.EVENT_FEED_MAX_MONTHS:
+        return JsonResponse({'error': f'Ranges are limited to {settings.EVENT_FEED_MAX_MONTHS} months'}, status=400)
+    return feed_response(request, eventfeeds.month_feed(types, start, end), 'application/json')
+
+def user_data(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'date_joined': user.date_joined
+    }
+
+def profile_data(user):
+    # A plain read: this runs on the read pool, which must not write. Users
+    # without a profile row yet get the defaults it would be created with.
+    profile = UserProfile.objects.filter(user=user).first()
+    if profile is None:
+        return {'bio': None, 'location': None, 'profile_picture': None, 'join_date': user.date_joined}
+    return {
+        'bio': profile.bio,
+        'location': profile.location,
+        'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
+        'join_date': profile.join_date
+    }
+
+# Each /api/profile/ field and how to compute it. Post stats count posts, and
+# likes and comments on user's posts; only the fields asked for are computed.
+PROFILE_PARTS = {
+    'user': user_data,
+    'profile': profile_data,
+    'contents_count': lambda user: Content.objects.filter(author=user).count(),
+    'total_likes': lambda user: Like.objects.filter(content__author=user, content__deleted_at__isnull=True).count(),
+    'total_comments': lambda user: Comment.objects.filter(content__author=user, content__deleted_at__isnull=True).count(),
+}
+PROFILE_FIELDS = list(PROFILE_PARTS)
+
+def profile_payload(user, fields=None):
+    """Profile data and post stats for a user, as returned by /api/profile/"""
+    fields = fields or PROFILE_FIELDS
+    return {field: PROFILE_PARTS[field](user) for field in PROFILE_FIELDS if field in fields}
+
+async def aprofile_payload(user, fields=None):
+    """profile_payload() with its queries run concurrently on the read pool"""
+    fields = [field for field in PROFILE_FIELDS if field in (fields or PROFILE_FIELDS)]
+    values = await readpool.gather(*(partial(PROFILE_PARTS[field], user) for field in fields))
+    return dict(zip(fields, values))
+
+def upcoming_events(limit=10):
+    events = CosmicEvent.objects.filter(event_date__gte=timezone.now()).order_by('event_date')[:limit]
+    return CosmicEventSerializer(events, many=True).data
+
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        user = request.user
-        
-        # Get or create profile
-        profile, created = UserProfile.objects.get_or_create(user=user)
-        
-        # Get user's content ONLY
-        user_content = Content.objects.filter(author=user).order_by('-created_at')
-        
-        # Count likes and comments for user's posts
-        total_likes = Like.objects.filter(content__author=user).count()
-        total_comments = Comment.objects.filter(content__author=user).count()
-        
-        return Response({
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'date_joined': user.date_joined
-            },
-            'profile': {
-                'bio': profile.bio,
-                'location': profile.location,
-                'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
-                'join_date': profile.join_date
-            },
-            'contents_count': user_content.count(),
-            'total_likes': total_likes,
-            'total_comments': total_comments
-        })
+        fields = [f for f in request.query_params.get('fields', '').split(',') if f in PROFILE_FIELDS]
+        return Response(profile_payload(request.user, fields))
+
+# Async versions of the profile endpoints for the ASGI deployment (see
+# luna_project/asgi.py). DRF views are sync only, so these are plain Django
+# async views: they authenticate like DRF would and run their independent
+# queries concurrently on the read pool instead of one after another.
+
+DASHBOARD_EVENTS = 5
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+def not_authenticated():
+    return json_response({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+async def async_user(request):
+    """
+    The caller, from the session or an API token, or None. Sets request.user
+    so code later run on other threads (serializers) sees the same user.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        try:
+            result = await readpool.run(CachedTokenAuthentication().authenticate, request)
+        except AuthenticationFailed:
+            result = None
+        if result is None:
+            return None
+        user = result[0]
+    request.user = user
+    return user
+
+@require_safe
+async def async_current_user(request):
+    """get_current_user, async"""
+    user = await async_user(request)
+    if user is None:
+        return json_response({'error': 'Not authenticated'}, status=401)
+    return json_response({'user': user_data(user), 'profile': await readpool.run(current_profile_data, user)})
+
+@require_safe
+async def async_profile(request):
+    """UserProfileView.get, async"""
+    user = await async_user(request)
+    if user is None:
+        return not_authenticated()
+    fields = [f for f in request.GET.get('fields', '').split(',') if f in PROFILE_FIELDS]
+    return json_response(await aprofile_payload(user, fields))
+
+@require_safe
+async def dashboard(request):
+    """
+    What the signed-in home screen needs in one response: the user and
+    profile, post stats, the first page of their posts, upcoming cosmic
+    events and the unread notification count
+    """
+    user = await async_user(request)
+    if user is None:
+        return not_authenticated()
+    posts = Content.objects.filter(author=user).order_by('-created_at')
+    (data, recent_posts, events, unread) = await asyncio.gather(
+        aprofile_payload(user),
+        readpool.run(first_page, request, posts, 'card'),
+        readpool.run(upcoming_events, DASHBOARD_EVENTS),
+        readpool.run(notifications.unread_count, user),
+    )
+    return json_response({
+        'user': data['user'],
+        'profile': data['profile'],
+        'stats': {field: data[field] for field in ['contents_count', 'total_likes', 'total_comments']},
+        'recent_posts': recent_posts,
+        'upcoming_events': events,
+        'unread_notifications': unread,
+    })
 
         
 class ProfileUpdateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = [JSONParser]
+    parser_classes = [FastJSONParser]
     
     def put(self, request):
         user = request.user
@@ -374,6 +742,7 @@ class ProfileUpdateView(APIView):
 
 class AvatarUploadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'upload'
     parser_classes = [MultiPartParser, FormParser]
     
     def post(self, request):
@@ -405,6 +774,7 @@ class AvatarUploadView(APIView):
 
 class ChangePasswordView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'login'
     
     def post(self, request):
         user = request.user
@@ -422,17 +792,119 @@ class ChangePasswordView(APIView):
             return Response({'error': 'Password must be at least 8 characters'}, status=400)
         
         # Check current password
-        if not user.check_password(current_password):
+        if not check_password(current_password, user.password):
             return Response({'error': 'Current password is incorrect'}, status=400)
         
-        # Set new password
-        user.set_password(new_password)
+        # Set new password; _password makes save() run the validators'
+        # password_changed() hooks, as set_password() would
+        user.password = make_password(new_password)
+        user._password = new_password
         user.save()
         
         # Update session to prevent logout
         update_session_auth_hash(request, user)
         
-        return Response({'message': 'Password changed successfully'})
+        # Rotate the API token so old tokens stop working
+        revoke_token(user)
+        token = issue_token(user)
+        
+        return Response({'message': 'Password changed successfully', 'token': token.key})
+
+class AccountDeleteView(APIView):
+    """Delete the caller's account. It disappears at once; its rows are purged in the background."""
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'login'
+    
+    def post(self, request):
+        user = request.user
+        if not check_password(request.data.get('password') or '', user.password):
+            return Response({'error': 'Password is incorrect'}, status=400)
+        
+        soft_delete_user(user)
+        logout(request)
+        schedule_purge()
+        return Response({'message': 'Account deleted'})
+
+class AnalyticsView(APIView):
+    """
+    Posts, likes or comments (?kind=) per hour or day (?period=) between
+    ?start= and ?end= (ISO dates, default the last 30 days), optionally for
+    some ?category= values and split by category with ?group=category.
+    Answered from the rollups, never the content tables.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    max_hours = 24 * 92
+    
+    def get(self, request):
+        params = request.query_params
+        kind = params.get('kind', 'post')
+        period = params.get('period', 'day')
+        if kind not in dict(ActivityEvent.KINDS):
+            return Response({'error': 'kind must be post, like or comment'}, status=400)
+        if period not in ('hour', 'day'):
+            return Response({'error': 'period must be hour or day'}, status=400)
+        
+        end = parse_moment(params['end'], 'end') if params.get('end') else timezone.now()
+        start = parse_moment(params['start'], 'start') if params.get('start') else end - timedelta(days=30)
+        if start >= end:
+            return Response({'error': 'start must be before end'}, status=400)
+        if period == 'hour' and end - start > timedelta(hours=self.max_hours):
+            return Response({'error': f'Hourly ranges are limited to {self.max_hours // 24} days'}, status=400)
+        
+        categories = [c for c in params.get('category', '').split(',') if c]
+        by_category = params.get('group') == 'category'
+        return Response({
+            'kind': kind,
+            'period': period,
+            'start': start,
+            'end': end,
+            'series': analytics.series(kind, period, start, end, categories, by_category),
+        })
+
+class CosmicEventAnalyticsView(APIView):
+    """Activity within ?days= (default 3) of each cosmic event between ?start= and ?end=, against the window before"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        params = request.query_params
+        end = parse_moment(params['end'], 'end') if params.get('end') else timezone.now()
+        start = parse_moment(params['start'], 'start') if params.get('start') else end - timedelta(days=365)
+        try:
+            days = max(1, min(int(params.get('days', 3)), 30))
+        except ValueError:
+            return Response({'error': 'days must be a number'}, status=400)
+        return Response(analytics.cosmic_event_impact(start, end, days))
+
+class ExportView(APIView):
+    """
+    Stream the caller's content, comments, likes and media manifest as NDJSON
+    (?output=ndjson) or a zip archive (?output=zip, add &media=1 for the files).
+    Staff can export the whole site with ?scope=site.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        from .export import iter_ndjson, iter_zip
+        
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'zip'):
+            return Response({'error': 'output must be ndjson or zip'}, status=400)
+        
+        user = request.user
+        label = user.username
+        if request.query_params.get('scope') == 'site':
+            if not user.is_staff:
+                return Response({'error': 'Only staff can export the whole site'}, status=403)
+            user, label = None, 'site'
+        
+        filename = f"luna-export-{label}-{timezone.now():%Y%m%d}.{output}"
+        if output == 'zip':
+            include_media = request.query_params.get('media') in ('1', 'true')
+            response = StreamingHttpResponse(iter_zip(user, include_media), content_type='application/zip')
+        else:
+            response = StreamingHttpResponse(iter_ndjson(user), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
 
 # Mock AI Verification for astrophotos
@@ -458,27 +930,140 @@ def verify_astro_photo(category, location, timestamp):
     
     return verification_data
 
+def first_page(request, queryset, profile):
+    """Serialize the first API page of a content queryset for inlining into a page"""
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    fields = ContentSerializer.requested_fields(None, profile)
+    queryset = ContentSerializer.optimize_queryset(queryset, fields, request.user)
+    contents = list(queryset[:page_size + 1])
+    context = {'request': request, 'profile': profile}
+    return {
+        'results': ContentSerializer(contents[:page_size], many=True, context=context).data,
+        'has_next': len(contents) > page_size,
+    }
+
+def community_view(request):
+    """Render the community page with the current user and first feed page inlined"""
+    context = {'generation': content_generation()}
+    if request.user.is_authenticated:
+        # Callables are only evaluated when the cached fragment misses
+        context['initial_user'] = lambda: profile_payload(request.user, ['user'])
+        context['initial_feed'] = lambda: first_page(request, Content.objects.visible_to(request.user).order_by('-created_at'), 'detail')
+    return render(request, 'luna_app/community.html', context)
+
 @login_required
-def profile_view(request):
-    """Render the user profile page"""
-    user = request.user
-    profile, created = UserProfile.objects.get_or_create(user=user)
-    
-    # Get user's content
-    user_content = Content.objects.filter(author=user).order_by('-created_at')
-    
+async def profile_view(request):
+    """Render the user profile page with profile data and first posts page inlined"""
+    user = await request.auser()
+    request.user = user
+    generation = content_generation()
+    posts = Content.objects.filter(author=user).order_by('-created_at')
     context = {
-        'user': user,
-        'profile': profile,
-        'contents': user_content,
-        'contents_count': user_content.count(),
-        'total_likes': Like.objects.filter(user=user).count(),
-        'total_comments': Comment.objects.filter(user=user).count(),
+        'generation': generation,
+        'initial_profile': lambda: profile_payload(user),
+        'initial_posts': lambda: first_page(request, posts, 'card'),
     }
-    
-    return render(request, 'profile.html', context)  # Just 'profile.html'
+    # The inlined data is only rendered when the cached fragment misses;
+    # then compute it up front, concurrently, rather than in the template
+    if await cache.aget(make_template_fragment_key('profile_initial_data', [generation, user.pk])) is None:
+        context['initial_profile'], context['initial_posts'] = await asyncio.gather(
+            aprofile_payload(user), readpool.run(first_page, request, posts, 'card')
+        )
+    return await sync_to_async(render)(request, 'luna_app/profile.html', context)
 
 def custom_logout(request):
     """Simple logout view that works with GET requests"""
     auth_logout(request)
-    return redirect('/')
\ No newline at end of file
+    return redirect('/')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def _read_range(f, length):
+    try:
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+def _not_modified(request, etag):
+    """Whether If-None-Match lists etag, compared weakly as RFC 9110 requires"""
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etags == ['*'] or etag in {tag.removeprefix('W/') for tag in etags}
+
+@require_safe
+def serve_blob(request, path):
+    """Serve a content-addressed media blob with a strong ETag and Range support"""
+    storage = media_storage()
+    full_path = storage.path(f'{BLOB_DIR}/{path}')
+    if not os.path.isfile(full_path):
+        raise Http404('Media not found')
+    
+    # The file name is the SHA-256 of its bytes, so it never changes
+    etag = '"%s"' % os.path.splitext(os.path.basename(path))[0]
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+        'Accept-Ranges': 'bytes',
+    }
+    
+    if _not_modified(request, etag):
+        return HttpResponse(status=304, headers=headers)
+    
+    size = os.path.getsize(full_path)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    range_header = request.headers.get('Range', '')
+    if_range = request.headers.get('If-Range')
+    match = RANGE_RE.match(range_header.strip())
+    if match and match[1] and match[2] and int(match[2]) < int(match[1]):
+        # Not a valid range at all (RFC 9110 14.1.1): ignored, not refused
+        match = None
+    
+    if match and (if_range is None or if_range == etag):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            # Suffix range: the final N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            start, end = 0, -1
+        if start > end or start >= size:
+            headers['Content-Range'] = f'bytes */{size}'
+            return HttpResponse(status=416, headers=headers)
+        
+        f = open(full_path, 'rb')
+        f.seek(start)
+        response = StreamingHttpResponse(
+            _read_range(f, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+@require_safe
+def serve_tile(request, path):
+    """Serve a deep-zoom descriptor or tile. Tile paths are keyed by image digest, so they never change."""
+    data = read_tile(path)
+    if data is None:
+        raise Http404('Tile not found')
+    
+    etag = '"%s"' % path.replace('/', '-')
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+    }
+    if _not_modified(request, etag):
+        return HttpResponse(status=304, headers=headers)
+    content_type = 'application/xml' if path.endswith('.dzi') else 'image/jpeg'
+    return HttpResponse(data, content_type=content_type, headers=headers)
@@ -0,0 +1,120 @@
+import io
+import logging
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver, resolve
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+# Work a fresh process would otherwise do on its first requests: building
+# the URL resolver, compiling templates into the cached loader, introspecting
+# models for the serializers, loading the near-duplicate text index, and
+# running the hot pages once through the middleware stack.
+# luna_project/wsgi.py calls warm_up() as it is imported, so it is done
+# before the server hands the process any traffic. Under gunicorn
+# with preload_app (gunicorn.conf.py) that happens once, in the master, and
+# every forked worker starts with it done; connect() then opens each
+# worker's own database connections.
+
+
+def _timed(steps, name, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        # A failed warm-up only costs the first requests their speed
+        logger.exception('Warm-up step %s failed', name)
+    steps.append((name, time.perf_counter() - start))
+
+
+def _prime_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - populates the resolver
+    for path in settings.WARMUP_URLS:
+        resolve(path.split('?')[0])
+
+
+def _prime_templates():
+    for name in settings.WARMUP_TEMPLATES:
+        get_template(name)
+
+
+def _prime_serializers():
+    from . import serializers
+
+    for value in vars(serializers).values():
+        if isinstance(value, type) and issubclass(value, BaseSerializer) and value.__module__ == serializers.__name__:
+            value().fields  # noqa: B018 - builds the fields from the model
+
+
+def _prime_duplicate_index():
+    from . import dedup
+
+    dedup.get_index()
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def request(handler, path):
+    """GET path through a WSGI handler, as an anonymous client. Returns the status code."""
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'HTTP_HOST': _host(), 'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': io.BytesIO(),
+    }
+    if settings.SECURE_SSL_REDIRECT:
+        environ['wsgi.url_scheme'] = 'https'
+    setup_testing_defaults(environ)
+    status = []
+    response = handler(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return int(status[0].split()[0])
+
+
+def _prime_requests(handler):
+    for path in settings.WARMUP_URLS:
+        code = request(handler, path)
+        if code >= 400:
+            logger.warning('Warm-up request to %s returned %s', path, code)
+
+
+def warm_up(handler=None):
+    """
+    Prime this process before it serves traffic. Returns [(step, seconds)].
+    Database connections opened on the way are closed again, as a process
+    about to fork must not share them.
+    """
+    steps = []
+    if not settings.WARMUP_ENABLED:
+        return steps
+    _timed(steps, 'urls', _prime_urls)
+    _timed(steps, 'templates', _prime_templates)
+    _timed(steps, 'serializers', _prime_serializers)
+    _timed(steps, 'duplicate index', _prime_duplicate_index)
+    if handler is not None:
+        _timed(steps, 'requests', lambda: _prime_requests(handler))
+    connections.close_all()
+    logger.info('Warmed up in %.0fms (%s)', sum(seconds for _, seconds in steps) * 1000,
+                ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in steps))
+    return steps
+
+
+def connect():
+    """Open this process's database connections ahead of its first request"""
+    for alias in connections:
+        connections[alias].ensure_connection()
@@ -3,6 +3,20 @@ ASGI config for luna_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The procfile serves the app over WSGI with gunicorn. To serve it over ASGI
+instead, so async views (/api/dashboard/, /api/async/..., the profile page)
+run on the event loop rather than one request per worker thread, run:
+
+    uvicorn luna_project.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Sync views still work under ASGI; Django runs them on a thread. The
+bench_dashboard command compares the two paths. Persistent database
+connections are turned off here (LUNA_ASGI, see settings.DATABASES): they
+belong to threads, and sync code for each request runs on a thread of its
+own. Streaming responses (exports, ?stream=1 lists, media) are sent part by
+part through AsyncStreamingMiddleware, so they stay in constant memory here
+too.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -12,5 +26,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'luna_project.settings')
+os.environ['LUNA_ASGI'] = '1'
 
 application = get_asgi_application()
+
+from luna_app.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -45,7 +45,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     # 'fontawesomefree',
-    # 'rest_framework.authtoken',
+    'rest_framework.authtoken',
     # 'dj_rest_auth',
     # Local apps
     'luna_app',
@@ -53,6 +53,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'luna_app.middleware.StaticFilesMiddleware',
+    'luna_app.middleware.CompressionMiddleware',
+    'luna_app.middleware.AsyncStreamingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,7 +73,6 @@ TEMPLATES = [
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),
             ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -78,6 +80,15 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process and kept; warm-up fills
+            # this cache before the first request (runserver still reloads
+            # them when they change)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -88,10 +99,26 @@ WSGI_APPLICATION = 'luna_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+SERVING_ASGI = config('LUNA_ASGI', default=False, cast=bool)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Background writers (notifications, analytics, purges) share the file
+        # with requests. IMMEDIATE takes the write lock when a transaction
+        # starts, so writers queue for up to timeout seconds instead of
+        # failing with "database is locked" when a read lock can't be upgraded.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Keep connections across requests (checked before reuse) so a worker
+        # connects once, at warm-up, rather than on every request. Not under
+        # ASGI (asgi.py sets LUNA_ASGI): connections belong to threads, and
+        # each request's sync code may run on a new one, so they would pile up.
+        'CONN_MAX_AGE': 0 if SERVING_ASGI else config('DB_CONN_MAX_AGE', default=300, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -114,6 +141,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs in a bounded process pool (0 workers hashes inline).
+# Requests beyond the queue depth get a 429 with Retry-After.
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
+PASSWORD_HASHING_QUEUE_DEPTH = config('PASSWORD_HASHING_QUEUE_DEPTH', default=32, cast=int)
+PASSWORD_HASHING_RETRY_AFTER = config('PASSWORD_HASHING_RETRY_AFTER', default=2, cast=int)
+
+# The model backend, checking passwords in that pool
+AUTHENTICATION_BACKENDS = ['luna_app.backends.PoolHashingBackend']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -134,6 +170,20 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic fingerprints every asset (style.<hash>.css) and writes gzip and
+# brotli variants next to it; WhiteNoise serves them in-process, negotiating
+# the encoding per request and marking hashed files immutable.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Fall back to unhashed names when collectstatic has not been run (local dev, tests)
+WHITENOISE_MANIFEST_STRICT = False
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -154,15 +204,171 @@ CORS_ALLOWED_ORIGINS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'luna_app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # orjson-backed JSON (stdlib fallback when orjson is not installed)
+    'DEFAULT_RENDERER_CLASSES': [
+        'luna_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'luna_app.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Token-bucket rate limits for views that declare a throttle scope
+    'DEFAULT_THROTTLE_CLASSES': [
+        'luna_app.ratelimit.BucketThrottle',
+    ],
+    # Proxies in front of the app (the platform's one load balancer). Client
+    # addresses for rate limits are read that many entries from the right of
+    # X-Forwarded-For; set 0 when clients connect directly.
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+# Caches
+# The default cache is per process. Pages and data in it are keyed by
+# generation counters (see luna_app/caching.py) kept in the 'shared' cache,
+# files every worker on the host reads, so a change invalidates them in all
+# workers at once. With several hosts, point 'shared' at Redis or memcached.
+# The 'tokens' cache maps API tokens to their users, in files every worker
+# on the host shares, so evictions on revoke or user change reach them all.
+# TOKEN_CACHE_DIR holds pickled users: keep it private to the app.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'luna-default',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('SHARED_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'shared')),
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('TOKEN_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'tokens')),
+        'TIMEOUT': config('TOKEN_CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('TOKEN_CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    },
+}
+TOKEN_CACHE_ALIAS = 'tokens'
+GENERATION_CACHE_ALIAS = 'shared'
+
+# Background tasks (bulk admin actions etc.) run on a small thread pool.
+# BACKGROUND_TASKS_SYNC runs them inline instead.
+BACKGROUND_WORKERS = config('BACKGROUND_WORKERS', default=2, cast=int)
+BACKGROUND_TASKS_SYNC = config('BACKGROUND_TASKS_SYNC', default=False, cast=bool)
+
+# Async views (the dashboard, async profile endpoints) run their independent
+# queries concurrently on a pool of READ_POOL_WORKERS threads, each with its
+# own database connection
+READ_POOL_WORKERS = config('READ_POOL_WORKERS', default=8, cast=int)
+
+# Importing luna_project.wsgi warms the process up before it serves: URL
+# resolver, WARMUP_TEMPLATES compiled, serializers built, and WARMUP_URLS
+# requested once each (see luna_app/warmup.py)
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool)
+WARMUP_URLS = ['/', '/community/', '/api/content/feed/']
+WARMUP_TEMPLATES = [
+    'luna_app/index.html',
+    'luna_app/community.html',
+    'luna_app/profile.html',
+]
+
+# Admin bulk actions over more rows than this run in the background
+ADMIN_BACKGROUND_THRESHOLD = config('ADMIN_BACKGROUND_THRESHOLD', default=500, cast=int)
+
+# Deleted accounts, posts and comments are hidden at once and hard-deleted
+# PURGE_AFTER_HOURS later (0: right away, in the background; otherwise by the
+# purge_deleted command), PURGE_BATCH_SIZE rows per transaction with
+# PURGE_BATCH_PAUSE seconds between transactions
+PURGE_AFTER_HOURS = config('PURGE_AFTER_HOURS', default=0, cast=float)
+PURGE_BATCH_SIZE = config('PURGE_BATCH_SIZE', default=200, cast=int)
+PURGE_BATCH_PAUSE = config('PURGE_BATCH_PAUSE', default=0.05, cast=float)
+
+# Notifications are buffered per worker and written in batches: a flush runs
+# NOTIFICATION_FLUSH_SECONDS after the first buffered event, or once
+# NOTIFICATION_BATCH_SIZE are waiting. Likes and comments on a post within
+# NOTIFICATION_COALESCE_MINUTES of each other share one unread notification.
+# The send_digests command emails users a summary of their unread ones.
+NOTIFICATION_FLUSH_SECONDS = config('NOTIFICATION_FLUSH_SECONDS', default=2, cast=float)
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=200, cast=int)
+NOTIFICATION_COALESCE_MINUTES = config('NOTIFICATION_COALESCE_MINUTES', default=60, cast=int)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='Luna <noreply@luna.local>')
+
+# Activity analytics: posts, likes and comments are logged in batches
+# (after ANALYTICS_FLUSH_SECONDS or ANALYTICS_BATCH_SIZE events) and rolled
+# up into hourly and daily counts at most every ANALYTICS_ROLLUP_SECONDS per
+# worker. The rollup_activity command does the same from cron and backfills
+# the time before the log existed. Rollup writes are serialized (see
+# analytics._lock_rollups), so workers and cron may overlap.
+ANALYTICS_ENABLED = config('ANALYTICS_ENABLED', default=True, cast=bool)
+ANALYTICS_FLUSH_SECONDS = config('ANALYTICS_FLUSH_SECONDS', default=5, cast=float)
+ANALYTICS_BATCH_SIZE = config('ANALYTICS_BATCH_SIZE', default=500, cast=int)
+ANALYTICS_ROLLUP_SECONDS = config('ANALYTICS_ROLLUP_SECONDS', default=300, cast=float)
+
+# Calendar feeds of cosmic events (/api/events/calendar.ics and .json) are
+# cached per worker for up to EVENT_FEED_TIMEOUT seconds, and rebuilt at once
+# in every worker when an event changes. Clients may reuse a copy for
+# EVENT_FEED_MAX_AGE seconds before revalidating (a 304 if nothing changed).
+# The ICS feed includes events from EVENT_FEED_PAST_DAYS ago on; the JSON one
+# spans at most EVENT_FEED_MAX_MONTHS months.
+EVENT_FEED_TIMEOUT = config('EVENT_FEED_TIMEOUT', default=300, cast=int)
+EVENT_FEED_MAX_AGE = config('EVENT_FEED_MAX_AGE', default=60, cast=int)
+EVENT_FEED_PAST_DAYS = config('EVENT_FEED_PAST_DAYS', default=90, cast=int)
+EVENT_FEED_MAX_MONTHS = config('EVENT_FEED_MAX_MONTHS', default=12, cast=int)
+
+# Rate limiting: token buckets per user (or client IP) and scope, as
+# "requests/period" with period s, m, h or d. Buckets live in each worker's
+# memory; set RATELIMIT_CACHE to a cache shared by all workers (e.g. a Redis
+# or file-based cache) to enforce the limits across gunicorn workers too.
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+RATELIMIT_CACHE = config('RATELIMIT_CACHE', default='') or None
+RATELIMIT_RATES = {
+    'login': config('RATELIMIT_LOGIN', default='10/m'),
+    # Attempts on one username, whatever address they come from
+    'login_username': config('RATELIMIT_LOGIN_USERNAME', default='30/h'),
+    'register': config('RATELIMIT_REGISTER', default='5/h'),
+    'comment': config('RATELIMIT_COMMENT', default='20/m'),
+    'like': config('RATELIMIT_LIKE', default='60/m'),
+    'upload': config('RATELIMIT_UPLOAD', default='20/h'),
+}
+
+# Near-duplicate comments/descriptions (MinHash similarity at or above the
+# threshold): 'flag' saves them with Comment.flagged set, 'reject' refuses them
+DUPLICATE_TEXT_ACTION = config('DUPLICATE_TEXT_ACTION', default='flag')
+DUPLICATE_TEXT_THRESHOLD = config('DUPLICATE_TEXT_THRESHOLD', default=0.8, cast=float)
+
+# Photos whose perceptual hash is within this many bits (of 64) of an earlier
+# post's are recorded as duplicates of it
+DUPLICATE_IMAGE_DISTANCE = config('DUPLICATE_IMAGE_DISTANCE', default=8, cast=int)
+
+# Deep-zoom tiles: photos longer than TILE_MIN_SIZE pixels on a side get a
+# DZI tile pyramid, built in TILE_WORKERS processes (0: on the background
+# thread). pyvips, when installed, streams the decode; otherwise Pillow
+# decodes up to TILE_MAX_PIXELS (JPEGs over it are decoded scaled down).
+# TILE_CACHE_BYTES of recently served tiles are kept in memory per worker.
+TILE_MIN_SIZE = config('TILE_MIN_SIZE', default=4096, cast=int)
+TILE_SIZE = config('TILE_SIZE', default=254, cast=int)
+TILE_OVERLAP = config('TILE_OVERLAP', default=1, cast=int)
+TILE_QUALITY = config('TILE_QUALITY', default=85, cast=int)
+TILE_WORKERS = config('TILE_WORKERS', default=1, cast=int)
+TILE_MAX_PIXELS = config('TILE_MAX_PIXELS', default=100_000_000, cast=int)
+TILE_CACHE_BYTES = config('TILE_CACHE_BYTES', default=32 * 1024 * 1024, cast=int)
+
+# "More like this" vectors (build_recommendations writes them here)
+RECOMMEND_INDEX_DIR = config('RECOMMEND_INDEX_DIR', default=os.path.join(BASE_DIR, 'recommend_index'))
+
+# Response compression: brotli level for dynamic responses (gzip otherwise)
+BROTLI_QUALITY = config('BROTLI_QUALITY', default=4, cast=int)
+
 # Authentication
 LOGIN_REDIRECT_URL = '/community/'
 LOGOUT_REDIRECT_URL = '/'
@@ -15,15 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from django.contrib.auth.decorators import login_required
 from django.contrib.auth import views as auth_views
-from luna_app.views import custom_logout
-
-ProfileView = login_required(TemplateView.as_view(template_name='luna_app/profile.html'))
+from luna_app.views import community_view, custom_logout, profile_view, serve_blob, serve_tile
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,7 +28,7 @@ urlpatterns = [
     
     # Frontend routes
     path('', TemplateView.as_view(template_name='luna_app/index.html'), name='index'),
-    path('community/', TemplateView.as_view(template_name='luna_app/community.html'), name='community'),
+    path('community/', community_view, name='community'),
     path('auth/login/', TemplateView.as_view(template_name='luna_app/auth/login.html'), name='login'),
     path('auth/logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
     path('auth/signup/', TemplateView.as_view(template_name='luna_app/auth/signup.html'), name='signup'),
@@ -40,8 +37,20 @@ urlpatterns = [
     path('app/edit-photo/', TemplateView.as_view(template_name='luna_app/app/edit-photo.html'), name='edit-photo'),
     path('app/edit-article/', TemplateView.as_view(template_name='luna_app/app/edit-article.html'), name='edit-article'),
     path('app/edit-content/', TemplateView.as_view(template_name='luna_app/app/edit-content.html'), name='edit-content'),
-    path('profile/', ProfileView, name='profile'),
+    path('profile/', profile_view, name='profile'),
     path('auth/logout/', custom_logout, name='logout'),
+    
+    # Content-addressed media blobs (served in production too)
+    re_path(
+        r'^%sblobs/(?P<path>[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_blob, name='media-blob'
+    ),
+    # Deep-zoom tile pyramids of large photos
+    re_path(
+        r'^%stiles/(?P<path>[0-9a-f]{64}(\.dzi|_files/\d+/\d+_\d+\.jpg))$' % settings.MEDIA_URL.lstrip('/'),
+        serve_tile, name='media-tile'
+    ),
+    path('viewer/', TemplateView.as_view(template_name='luna_app/viewer.html'), name='viewer'),
 ]
 
 # Serve static and media files in development
@@ -3,6 +3,9 @@ WSGI config for luna_project project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+The process is warmed up as this module is imported, before the server
+hands it a request (see luna_app/warmup.py and gunicorn.conf.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 """
@@ -14,3 +17,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'luna_project.settings')
 
 application = get_wsgi_application()
+
+from luna_app.warmup import warm_up  # noqa: E402
+
+warm_up(application)
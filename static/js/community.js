@@ -0,0 +1,500 @@
+// API Configuration
+const API_BASE = '/api';
+let currentUser = null;
+
+// DOM Elements
+const notificationBanner = document.getElementById('notificationBanner');
+const contentFeed = document.getElementById('contentFeed');
+const publishButtons = document.getElementById('publishButtons');
+const userAvatarToggle = document.getElementById('userAvatarToggle');
+const userDropdown = document.getElementById('userDropdown');
+const eventsToggle = document.getElementById('eventsToggle');
+const eventsDropdown = document.getElementById('eventsDropdown');
+
+// ==================== Utility Functions ====================
+
+// Large photos open in the deep-zoom viewer, which loads only the visible tiles
+function openImage(image, deepZoom) {
+  if (deepZoom) {
+    const query = new URLSearchParams({ dzi: deepZoom, src: image });
+    window.open(`/viewer/?${query}`, '_blank');
+  } else {
+    window.open(image, '_blank');
+  }
+}
+
+function showNotification(message, type = 'info', duration = 3000) {
+  notificationBanner.textContent = message;
+  notificationBanner.style.display = 'block';
+  notificationBanner.style.background = type === 'error' ? 'var(--error)' : 
+                                       type === 'success' ? 'var(--success)' : 
+                                       type === 'warning' ? 'var(--warning)' : 
+                                       'linear-gradient(135deg, var(--accent), var(--secondary))';
+
+  setTimeout(() => {
+    notificationBanner.style.display = 'none';
+  }, duration);
+}
+
+function getCsrfToken() {
+  const name = 'csrftoken';
+  let cookieValue = null;
+  if (document.cookie && document.cookie !== '') {
+    const cookies = document.cookie.split(';');
+    for (let i = 0; i < cookies.length; i++) {
+      const cookie = cookies[i].trim();
+      if (cookie.substring(0, name.length + 1) === (name + '=')) {
+        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+        break;
+      }
+    }
+  }
+  return cookieValue;
+}
+
+function formatDate(dateString) {
+  const date = new Date(dateString);
+  const now = new Date();
+  const diffMs = now - date;
+  const diffMins = Math.floor(diffMs / 60000);
+  const diffHours = Math.floor(diffMs / 3600000);
+  const diffDays = Math.floor(diffMs / 86400000);
+
+  if (diffMins < 1) return 'just now';
+  if (diffMins < 60) return `${diffMins}m ago`;
+  if (diffHours < 24) return `${diffHours}h ago`;
+  if (diffDays < 7) return `${diffDays}d ago`;
+
+  return date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+}
+
+function getUserInitials(username) {
+  return username ? username.charAt(0).toUpperCase() : '?';
+}
+
+function readInitialData(id) {
+  // Data the server rendered into the page, saving an API round-trip
+  const element = document.getElementById(id);
+  return element ? JSON.parse(element.textContent) : null;
+}
+
+function escapeHtml(text) {
+  if (!text) return '';
+  const div = document.createElement('div');
+  div.textContent = text;
+  return div.innerHTML;
+}
+
+// ==================== User Management ====================
+
+async function getCurrentUser() {
+  try {
+    const response = await fetch(`${API_BASE}/profile/?fields=user`, {
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      const data = await response.json();
+      currentUser = data.user;
+      updateUserUI();
+      return currentUser;
+    }
+    return null;
+  } catch (error) {
+    console.error('Error fetching user:', error);
+    return null;
+  }
+}
+
+function updateUserUI() {
+  if (currentUser) {
+    userAvatarToggle.innerHTML = getUserInitials(currentUser.username);
+    userAvatarToggle.title = currentUser.username;
+    publishButtons.style.display = 'flex';
+  } else {
+    userAvatarToggle.innerHTML = '<i class="fas fa-user"></i>';
+    publishButtons.style.display = 'none';
+    showNotification('Please sign in to view the community', 'warning');
+    contentFeed.innerHTML = `
+      <div class="empty-state">
+        <i class="fas fa-users-slash"></i>
+        <h3>Community Access Required</h3>
+        <p>Please sign in to explore the cosmos with our community</p>
+        <a href="/auth/login/" class="publish-btn btn-photo" style="margin-top: 20px;">
+          <i class="fas fa-sign-in-alt"></i> Sign In
+        </a>
+      </div>
+    `;
+  }
+}
+
+async function logout() {
+  try {
+    const csrfToken = getCsrfToken();
+    const response = await fetch('/auth/logout/', {
+      method: 'POST',
+      headers: {
+        'X-CSRFToken': csrfToken,
+        'Content-Type': 'application/json'
+      },
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      window.location.href = '/auth/login/';
+    } else {
+      showNotification('Logout failed', 'error');
+    }
+  } catch (error) {
+    console.error('Logout error:', error);
+    showNotification('Error during logout', 'error');
+  }
+}
+
+// ==================== Content Management ====================
+
+async function loadContent() {
+  try {
+    contentFeed.innerHTML = `
+      <div class="loading-state">
+        <i class="fas fa-spinner"></i>
+        <h3>Loading cosmic discoveries...</h3>
+        <p>Fetching the latest astronomical content</p>
+      </div>
+    `;
+
+    const response = await fetch(`${API_BASE}/content/feed/?profile=detail`, {
+      credentials: 'include'
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+
+    const data = await response.json();
+    showContents(data.results || data);
+  } catch (error) {
+    console.error('Error loading content:', error);
+    contentFeed.innerHTML = `
+      <div class="empty-state">
+        <i class="fas fa-exclamation-triangle"></i>
+        <h3>Error Loading Content</h3>
+        <p>Please try again later or check your connection</p>
+        <button onclick="loadContent()" class="publish-btn btn-secondary" style="margin-top: 20px;">
+          <i class="fas fa-sync-alt"></i> Retry
+        </button>
+      </div>
+    `;
+  }
+}
+
+function showContents(contents) {
+  if (!contents || contents.length === 0) {
+    contentFeed.innerHTML = `
+      <div class="empty-state">
+        <i class="fas fa-star"></i>
+        <h3>No discoveries yet</h3>
+        <p>Be the first to share your astronomical findings!</p>
+        ${currentUser ? `
+          <div class="publish-buttons" style="margin-top: 30px;">
+            <a href="/app/upload-photo/" class="publish-btn btn-photo">
+              <i class="fas fa-camera"></i> Share Your First Photo
+            </a>
+          </div>
+        ` : ''}
+      </div>
+    `;
+    return;
+  }
+
+  renderContent(contents);
+}
+
+function renderContent(contents) {
+  let html = '';
+
+  contents.forEach(content => {
+    const isOwner = currentUser && currentUser.id === content.author.id;
+    const hasImage = content.image && content.image !== 'null';
+    const isVerified = content.ai_verified !== false;
+
+    html += `
+      <div class="post" data-content-id="${content.id}">
+        <div class="post-header">
+          <div class="author-info">
+            <div class="author-avatar">
+              ${getUserInitials(content.author.username)}
+            </div>
+            <div class="author-details">
+              <h4>${escapeHtml(content.author.username)}</h4>
+              <div class="post-meta">
+                <span>${formatDate(content.created_at)}</span>
+                <span> • ${content.content_type}</span>
+              </div>
+            </div>
+          </div>
+          ${isOwner ? `
+            <div class="post-actions">
+              <button onclick="deletePost('${content.id}')" class="action-btn delete-btn">
+                <i class="fas fa-trash"></i> Delete
+              </button>
+            </div>
+          ` : ''}
+        </div>
+
+        ${hasImage ? `
+          <img src="${content.image}" alt="${escapeHtml(content.title)}" class="post-image" 
+               onclick="openImage('${content.image}', '${content.deep_zoom || ''}')" style="cursor: pointer;">
+        ` : ''}
+
+        <div class="post-content">
+          <div style="display: flex; align-items: center; margin-bottom: 16px;">
+            <span class="post-category">
+              <i class="fas fa-tag"></i> ${escapeHtml(content.category || 'Uncategorized')}
+            </span>
+            ${content.ai_verified ? `
+              <span class="ai-badge">
+                <i class="fas fa-robot"></i> AI Verified
+              </span>
+            ` : ''}
+          </div>
+
+          <h3 class="post-title">${escapeHtml(content.title)}</h3>
+
+          ${content.description ? `
+            <p class="post-description">${escapeHtml(content.description)}</p>
+          ` : ''}
+
+          ${content.excerpt ? `
+            <p class="post-description">${escapeHtml(content.excerpt)}</p>
+            <p style="color: var(--accent); font-size: 14px;">
+              <i class="far fa-clock"></i> ${content.reading_time} min read
+            </p>
+          ` : ''}
+
+          ${content.location ? `
+            <p style="color: var(--accent); font-size: 14px; margin-top: 16px;">
+              <i class="fas fa-map-marker-alt"></i> ${escapeHtml(content.location)}
+            </p>
+          ` : ''}
+        </div>
+
+        <div class="post-footer">
+          <button onclick="likeContent('${content.id}')" class="like-btn ${content.is_liked ? 'liked' : ''}">
+            <i class="${content.is_liked ? 'fas' : 'far'} fa-heart"></i>
+            <span>${content.likes_count || 0} Likes</span>
+          </button>
+          <span class="post-type">
+            <i class="fas fa-${content.content_type === 'photo' ? 'camera' : 'file-alt'}"></i>
+            ${content.content_type === 'photo' ? 'Photo' : 'Article'}
+          </span>
+        </div>
+
+        <div class="comments-section">
+          <h4 class="comments-header">
+            <i class="far fa-comment"></i> Comments (${content.comments_count || 0})
+          </h4>
+
+          <div id="comments-${content.id}">
+            <!-- Comments will be loaded on demand -->
+            <div style="text-align: center; padding: 20px;">
+              <button onclick="loadComments('${content.id}')" class="action-btn edit-btn">
+                <i class="fas fa-comments"></i> Load Comments
+              </button>
+            </div>
+          </div>
+
+          ${currentUser ? `
+            <div class="add-comment">
+              <input type="text" 
+                     id="comment-input-${content.id}" 
+                     placeholder="Add a comment..." 
+                     onkeypress="if(event.key === 'Enter') addComment('${content.id}', this.value)">
+              <button onclick="addComment('${content.id}', document.getElementById('comment-input-${content.id}').value)">
+                Post
+              </button>
+            </div>
+          ` : ''}
+        </div>
+      </div>
+    `;
+  });
+
+  contentFeed.innerHTML = html;
+}
+
+async function deletePost(contentId) {
+  if (!confirm('Are you sure you want to delete this post? This action cannot be undone.')) {
+    return;
+  }
+
+  try {
+    const csrfToken = getCsrfToken();
+    const response = await fetch(`${API_BASE}/content/${contentId}/`, {
+      method: 'DELETE',
+      headers: {
+        'X-CSRFToken': csrfToken,
+      },
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      showNotification('Post deleted successfully!', 'success');
+      loadContent();
+    } else if (response.status === 401) {
+      showNotification('Please log in to delete posts', 'warning');
+    } else if (response.status === 403) {
+      showNotification('You can only delete your own posts', 'error');
+    } else {
+      showNotification('Failed to delete post', 'error');
+    }
+  } catch (error) {
+    console.error('Error deleting post:', error);
+    showNotification('Network error', 'error');
+  }
+}
+
+async function likeContent(contentId) {
+  if (!currentUser) {
+    showNotification('Please log in to like posts', 'warning');
+    return;
+  }
+
+  try {
+    const csrfToken = getCsrfToken();
+    const response = await fetch(`${API_BASE}/content/${contentId}/like/`, {
+      method: 'POST',
+      headers: {
+        'X-CSRFToken': csrfToken,
+      },
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      loadContent();
+    } else if (response.status === 401) {
+      showNotification('Please log in to like posts', 'warning');
+    }
+  } catch (error) {
+    console.error('Error liking content:', error);
+  }
+}
+
+async function addComment(contentId, commentText) {
+  if (!currentUser) {
+    showNotification('Please log in to comment', 'warning');
+    return;
+  }
+
+  if (!commentText || !commentText.trim()) {
+    showNotification('Please enter a comment', 'warning');
+    return;
+  }
+
+  try {
+    const csrfToken = getCsrfToken();
+    const response = await fetch(`${API_BASE}/content/${contentId}/comment/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': csrfToken,
+      },
+      credentials: 'include',
+      body: JSON.stringify({ text: commentText.trim() })
+    });
+
+    if (response.ok) {
+      showNotification('Comment added!', 'success');
+      document.getElementById(`comment-input-${contentId}`).value = '';
+      loadContent();
+    } else if (response.status === 401) {
+      showNotification('Please log in to comment', 'warning');
+    }
+  } catch (error) {
+    console.error('Error adding comment:', error);
+    showNotification('Failed to add comment', 'error');
+  }
+}
+
+async function loadComments(contentId) {
+  try {
+    const response = await fetch(`${API_BASE}/content/${contentId}/?fields=id&expand=comments`);
+    const content = await response.json();
+
+    const commentsContainer = document.getElementById(`comments-${contentId}`);
+    commentsContainer.innerHTML = '';
+
+    if (content.comments && content.comments.length > 0) {
+      content.comments.forEach(comment => {
+        const commentElement = document.createElement('div');
+        commentElement.className = 'comment';
+        commentElement.innerHTML = `
+          <div class="comment-author">${escapeHtml(comment.user.username)}</div>
+          <div class="comment-text">${escapeHtml(comment.text)}</div>
+          <div class="comment-actions">
+            <small>${formatDate(comment.created_at)}</small>
+          </div>
+        `;
+        commentsContainer.appendChild(commentElement);
+      });
+    } else {
+      commentsContainer.innerHTML = '<p style="color: var(--text-light); text-align: center; padding: 20px;">No comments yet. Be the first!</p>';
+    }
+  } catch (error) {
+    console.error('Error loading comments:', error);
+  }
+}
+
+// ==================== Event Handlers ====================
+
+// User dropdown toggle
+userAvatarToggle.addEventListener('click', () => {
+  userDropdown.classList.toggle('active');
+});
+
+// Events dropdown toggle
+eventsToggle.addEventListener('click', (e) => {
+  e.preventDefault();
+  eventsDropdown.classList.toggle('active');
+});
+
+// Close dropdowns when clicking outside
+document.addEventListener('click', (e) => {
+  if (!e.target.closest('.user-avatar')) {
+    userDropdown.classList.remove('active');
+  }
+  if (!e.target.closest('.events-nav')) {
+    eventsDropdown.classList.remove('active');
+  }
+});
+
+// ==================== Initialization ====================
+
+async function init() {
+  const initialUser = readInitialData('initial-user');
+  const initialFeed = readInitialData('initial-feed');
+
+  if (initialUser && initialFeed) {
+    currentUser = initialUser.user;
+    updateUserUI();
+    showContents(initialFeed.results);
+  } else {
+    // Load user data
+    await getCurrentUser();
+
+    // Load content
+    if (currentUser) {
+      await loadContent();
+    }
+  }
+
+  // Auto-refresh content every 30 seconds
+  setInterval(async () => {
+    if (currentUser && document.visibilityState === 'visible') {
+      await loadContent();
+    }
+  }, 30000);
+}
+
+// Start the application
+document.addEventListener('DOMContentLoaded', init);
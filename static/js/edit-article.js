@@ -0,0 +1,87 @@
+// التحقق من تسجيل الدخول
+const currentUser = JSON.parse(localStorage.getItem('lunaCurrentUser'));
+if (!currentUser) {
+  window.location.href = '../auth/login.html';
+} else {
+  document.getElementById('authLink').textContent = 'Log Out';
+  document.getElementById('authLink').href = '#';
+  document.getElementById('authLink').onclick = () => {
+    localStorage.removeItem('lunaCurrentUser');
+    window.location.href = '../index.html';
+  };
+}
+
+// جلب معرف المقال من الرابط
+const urlParams = new URLSearchParams(window.location.search);
+const contentId = urlParams.get('id');
+
+if (!contentId) {
+  alert('No article selected.');
+  window.location.href = `/app/edit-content/?id=${contentId}`;
+}
+
+// دالة للحصول على المحتوى
+function getContent() {
+  return JSON.parse(localStorage.getItem('lunaContent') || '[]');
+}
+
+// دالة لحفظ المحتوى
+function saveContent(content) {
+  localStorage.setItem('lunaContent', JSON.stringify(content));
+}
+
+// عرض بيانات المقال
+function renderArticle() {
+  const content = getContent();
+  const item = content.find(c => c.id === contentId);
+
+  if (!item) {
+    alert('Article not found.');
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+  }
+
+  // التحقق مما إذا كان المستخدم هو صاحب المقال
+  if (item.userId !== currentUser.id) {
+    alert('You can only edit your own articles.');
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+  }
+
+  // ملء النموذج بالبيانات الحالية
+  document.getElementById('title').value = item.title;
+  document.getElementById('location').value = item.location || '';
+  document.getElementById('category').value = item.category;
+  document.getElementById('content').value = item.content;
+}
+
+// حفظ التعديلات
+document.getElementById('editForm').addEventListener('submit', function(e) {
+  e.preventDefault();
+
+  const title = document.getElementById('title').value.trim();
+  const location = document.getElementById('location').value.trim() || null;
+  const category = document.getElementById('category').value;
+  const contentText = document.getElementById('content').value;
+
+  if (!title || !category || !contentText) {
+    alert('Please fill in all required fields.');
+    return;
+  }
+
+  const content = getContent();
+  const item = content.find(c => c.id === contentId);
+
+  if (item) {
+    // تحديث البيانات
+    item.title = title;
+    item.location = location;
+    item.category = category;
+    item.content = contentText;
+
+    saveContent(content);
+    alert('Article updated successfully! 🌠');
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+  }
+});
+
+// تحميل البيانات عند بدء التشغيل
+document.addEventListener('DOMContentLoaded', renderArticle);
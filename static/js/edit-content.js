@@ -0,0 +1,214 @@
+const currentUser = JSON.parse(localStorage.getItem('lunaCurrentUser'));
+if (!currentUser) {
+  window.location.href = '../auth/login.html';
+} else {
+  document.getElementById('authLink').textContent = 'Log Out';
+  document.getElementById('authLink').href = '#';
+  document.getElementById('authLink').onclick = () => {
+    localStorage.removeItem('lunaCurrentUser');
+    window.location.href = '../index.html';
+  };
+}
+
+const urlParams = new URLSearchParams(window.location.search);
+const contentId = urlParams.get('id');
+if (!contentId) {
+  alert('No content ID provided.');
+  window.location.href = `/app/edit-content/?id=${contentId}`;
+}
+
+function getContent() {
+  return JSON.parse(localStorage.getItem('lunaContent') || '[]');
+}
+
+function saveContent(content) {
+  localStorage.setItem('lunaContent', JSON.stringify(content));
+}
+
+// === نفس دالة التحقق الفلكي ===
+function verifyAstroPhoto(category, location, timestamp) {
+  if (!location || !category || !timestamp) {
+    return { verified: false, confidence: 0, reason: "Missing data" };
+  }
+
+  const date = new Date(timestamp);
+  const eclipseDates = [
+    { start: new Date(2025, 2, 29), end: new Date(2025, 2, 29) },
+    { start: new Date(2025, 8, 7), end: new Date(2025, 8, 7) }
+  ];
+  const isEclipseDay = eclipseDates.some(e => date >= e.start && date <= e.end);
+
+  let baseConfidence = 0.5;
+  let verified = false;
+  let reason = "General astrophotography";
+
+  if (category === 'eclipse') {
+    if (isEclipseDay) {
+      baseConfidence = 0.92;
+      verified = true;
+      reason = "Eclipse confirmed for this date";
+    } else {
+      baseConfidence = 0.1;
+      verified = false;
+      reason = "No eclipse on this date";
+    }
+  }
+  else if (category === 'moon') {
+    baseConfidence = 0.85;
+    verified = true;
+    reason = "Moon is generally visible";
+  }
+  else if (category === 'planet') {
+    baseConfidence = 0.75;
+    verified = true;
+    reason = "Planet visibility assumed";
+  }
+  else if (['galaxy', 'nebula', 'stars'].includes(category)) {
+    baseConfidence = 0.8;
+    verified = true;
+    reason = "Deep-sky object visibility assumed";
+  }
+
+  if (/[اأإبتثجحخدذرزسشصضطظعغفقكلمنهوي]/.test(location)) {
+    baseConfidence = Math.min(0.95, baseConfidence + 0.05);
+  }
+
+  const daysOld = (new Date() - date) / (1000 * 60 * 60 * 24);
+  if (daysOld <= 7) {
+    baseConfidence = Math.min(0.95, baseConfidence + 0.07);
+  }
+
+  const randomness = (Math.random() * 0.1) - 0.05;
+  const finalConfidence = Math.min(0.99, Math.max(0.1, baseConfidence + randomness));
+  const finalVerified = finalConfidence > 0.6;
+
+  return {
+    verified: finalVerified,
+    confidence: finalConfidence,
+    reason: reason
+  };
+}
+
+function renderPost() {
+  const content = getContent();
+  const item = content.find(c => c.id === contentId);
+
+  if (!item) {
+    alert('Content not found.');
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+    return;
+  }
+
+  if (item.userId !== currentUser.id) {
+    alert('You can only edit your own posts.');
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+    return;
+  }
+
+  const typeBadge = document.getElementById('typeBadge');
+  const pageTitle = document.getElementById('pageTitle');
+  if (item.type === 'photo') {
+    typeBadge.textContent = 'Astrophotography';
+    pageTitle.textContent = 'Edit Your Photo';
+
+    document.getElementById('imageSection').style.display = 'block';
+    document.getElementById('locationGroup').style.display = 'block';
+    document.getElementById('categoryGroup').style.display = 'block';
+    document.getElementById('descriptionGroup').style.display = 'block';
+    document.getElementById('contentGroup').style.display = 'none';
+
+    document.getElementById('previewImg').src = item.imageUrl || '';
+    document.getElementById('location').value = item.location || '';
+    document.getElementById('category').value = item.category || '';
+    document.getElementById('description').value = item.description || '';
+  } else {
+    typeBadge.textContent = 'Article';
+    pageTitle.textContent = 'Edit Your Article';
+
+    document.getElementById('imageSection').style.display = 'none';
+    document.getElementById('locationGroup').style.display = 'none';
+    document.getElementById('categoryGroup').style.display = 'none';
+    document.getElementById('descriptionGroup').style.display = 'none';
+    document.getElementById('contentGroup').style.display = 'block';
+
+    document.getElementById('content').value = item.content || '';
+  }
+
+  document.getElementById('title').value = item.title || '';
+
+  document.getElementById('photoInput').addEventListener('change', function() {
+    const file = this.files[0];
+    if (file) {
+      const reader = new FileReader();
+      reader.onload = e => {
+        document.getElementById('previewImg').src = e.target.result;
+      };
+      reader.readAsDataURL(file);
+    }
+  });
+
+  document.getElementById('uploadArea').addEventListener('click', () => {
+    document.getElementById('photoInput').click();
+  });
+}
+
+document.getElementById('cancelBtn').addEventListener('click', () => {
+  if (confirm('Discard changes?')) {
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+  }
+});
+
+document.getElementById('editForm').addEventListener('submit', function(e) {
+  e.preventDefault();
+
+  const title = document.getElementById('title').value.trim();
+  if (!title) {
+    alert('Title is required.');
+    return;
+  }
+
+  const content = getContent();
+  const item = content.find(c => c.id === contentId);
+  if (!item) return;
+
+  item.title = title;
+
+  if (item.type === 'photo') {
+    const location = document.getElementById('location').value.trim() || null;
+    const category = document.getElementById('category').value || 'other';
+    const description = document.getElementById('description').value.trim() || null;
+
+    item.location = location;
+    item.category = category;
+    item.description = description;
+
+    // ✅ تحديث التحقق عبر الذكاء الاصطناعي عند التعديل
+    const aiResult = verifyAstroPhoto(category, location, item.timestamp);
+    item.aiVerified = aiResult.verified;
+    item.aiConfidence = aiResult.confidence;
+    item.aiReason = aiResult.reason;
+
+    const file = document.getElementById('photoInput').files[0];
+    if (file) {
+      const reader = new FileReader();
+      reader.onload = function(e) {
+        item.imageUrl = e.target.result;
+        saveContent(content);
+        alert('Photo updated successfully! 🌠\nAI verification updated.');
+        window.location.href = `/app/edit-content/?id=${contentId}`;
+      };
+      reader.readAsDataURL(file);
+    } else {
+      saveContent(content);
+      alert('Changes saved! 🌠\nAI verification updated.');
+      window.location.href = `/app/edit-content/?id=${contentId}`;
+    }
+  } else {
+    item.content = document.getElementById('content').value.trim() || '';
+    saveContent(content);
+    alert('Article updated successfully! ✍️');
+    window.location.href = `/app/edit-content/?id=${contentId}`;
+  }
+});
+
+document.addEventListener('DOMContentLoaded', renderPost);
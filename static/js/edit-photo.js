@@ -0,0 +1,175 @@
+// Get content ID from URL
+const urlParams = new URLSearchParams(window.location.search);
+const contentId = urlParams.get('id');
+
+if (!contentId) {
+  alert('لم يتم تحديد منشور.');
+  window.location.href = '/community/';
+}
+
+// Check if user is authenticated
+async function checkAuth() {
+  try {
+    const response = await fetch('/api/profile/', {
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      const user = await response.json();
+      document.getElementById('authLink').textContent = 'تسجيل الخروج';
+      document.getElementById('authLink').href = '#';
+      document.getElementById('authLink').onclick = async () => {
+        await fetch('/api/logout/', {
+          method: 'POST',
+          credentials: 'include'
+        });
+        window.location.href = '/';
+      };
+      return user;
+    } else {
+      // Not authenticated, redirect to login
+      window.location.href = '/auth/login/';
+      return null;
+    }
+  } catch (error) {
+    console.error('Auth check error:', error);
+    window.location.href = '/auth/login/';
+    return null;
+  }
+}
+
+// Load post data
+async function loadPost() {
+  try {
+    const response = await fetch(`/api/content/${contentId}/`, {
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      const post = await response.json();
+
+      // Check if user owns this post
+      const user = await checkAuth();
+      if (user && user.user && user.user.id !== post.author.id) {
+        alert('يمكنك تعديل منشوراتك الخاصة فقط.');
+        window.location.href = '/community/';
+        return;
+      }
+
+      // Fill form with post data
+      document.getElementById('title').value = post.title || '';
+      document.getElementById('location').value = post.location || '';
+      document.getElementById('category').value = post.category || '';
+      document.getElementById('description').value = post.description || '';
+
+      const previewImg = document.getElementById('previewImg');
+      if (post.image) {
+        previewImg.src = post.image;
+      } else if (post.image_url) {
+        previewImg.src = post.image_url;
+      } else {
+        previewImg.src = 'https://via.placeholder.com/600x400/f0e6ff/2c1e5a?text=Astrophoto';
+      }
+
+      return post;
+    } else {
+      alert('المنشور غير موجود.');
+      window.location.href = '/community/';
+      return null;
+    }
+  } catch (error) {
+    console.error('Error loading post:', error);
+    alert('خطأ في تحميل البيانات.');
+    window.location.href = '/community/';
+    return null;
+  }
+}
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', async () => {
+  await checkAuth();
+  const post = await loadPost();
+
+  if (!post) return;
+
+  // File input events
+  document.getElementById('photoInput').addEventListener('change', function() {
+    const file = this.files[0];
+    if (file) {
+      const reader = new FileReader();
+      reader.onload = function(e) {
+        document.getElementById('previewImg').src = e.target.result;
+      };
+      reader.readAsDataURL(file);
+    }
+  });
+
+  // Upload area click
+  document.getElementById('uploadArea').addEventListener('click', () => {
+    document.getElementById('photoInput').click();
+  });
+
+  // Keyboard support
+  document.getElementById('uploadArea').addEventListener('keydown', (e) => {
+    if (e.key === 'Enter' || e.key === ' ') {
+      e.preventDefault();
+      document.getElementById('photoInput').click();
+    }
+  });
+
+  // Cancel button
+  document.getElementById('cancelBtn').addEventListener('click', () => {
+    if (confirm('هل أنت متأكد من إلغاء التعديلات؟')) {
+      window.location.href = '/community/';
+    }
+  });
+
+  // Form submission
+  document.getElementById('editForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const title = document.getElementById('title').value.trim();
+    const location = document.getElementById('location').value.trim() || null;
+    const category = document.getElementById('category').value;
+    const description = document.getElementById('description').value.trim() || null;
+
+    if (!title || !category) {
+      alert('يرجى تعبئة الحقول المطلوبة.');
+      return;
+    }
+
+    const file = document.getElementById('photoInput').files[0];
+    const formData = new FormData();
+
+    formData.append('title', title);
+    formData.append('location', location || '');
+    formData.append('category', category);
+    formData.append('description', description || '');
+
+    if (file) {
+      formData.append('image', file);
+    }
+
+    try {
+      const response = await fetch(`/api/content/${contentId}/`, {
+        method: 'PATCH',
+        headers: {
+          'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+        },
+        credentials: 'include',
+        body: formData
+      });
+
+      if (response.ok) {
+        alert('تم تحديث الصورة بنجاح! 🌠');
+        window.location.href = '/community/';
+      } else {
+        const error = await response.json();
+        alert('خطأ: ' + (error.detail || 'فشل تحديث الصورة'));
+      }
+    } catch (error) {
+      console.error('Error updating photo:', error);
+      alert('خطأ في الشبكة. يرجى المحاولة مرة أخرى.');
+    }
+  });
+});
@@ -0,0 +1,96 @@
+// نظام الأحداث الفلكية
+let cosmicEvents = [];
+
+function monthParam(date) {
+  return `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
+}
+
+function escapeHtml(text) {
+  if (!text) return '';
+  const div = document.createElement('div');
+  div.textContent = text;
+  return div.innerHTML;
+}
+
+async function fetchEvents() {
+  const now = new Date();
+  const end = new Date(now.getFullYear(), now.getMonth() + 2, 1);
+
+  try {
+    // This month and the next two; cached server-side and revalidated with ETags
+    const response = await fetch(`/api/events/calendar.json?start=${monthParam(now)}&end=${monthParam(end)}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    const data = await response.json();
+    cosmicEvents = data.events.map(event => ({
+      id: event.id,
+      title: event.title,
+      description: event.description,
+      date: new Date(event.event_date),
+      type: event.event_type
+    }));
+  } catch (error) {
+    console.error('Error loading events:', error);
+    cosmicEvents = [];
+  }
+
+  cosmicEvents = cosmicEvents.filter(event => event.date >= now);
+  renderEventsDropdown();
+  checkUpcomingEvents();
+}
+
+function renderEventsDropdown() {
+  const dropdown = document.getElementById('eventsDropdown');
+  const subscribe = `
+    <a class="event-item" href="webcal://${location.host}/api/events/calendar.ics" style="display:block; text-decoration:none;">
+      <div class="event-title">Subscribe in your calendar</div>
+      <div class="event-description">All cosmic events, kept up to date</div>
+    </a>
+  `;
+
+  if (cosmicEvents.length === 0) {
+    dropdown.innerHTML = '<div class="event-item" style="padding:1rem; text-align:center; color:#5a4b8a;">No upcoming events</div>' + subscribe;
+    return;
+  }
+
+  dropdown.innerHTML = cosmicEvents.map(event => `
+    <div class="event-item">
+      <div class="event-title">${escapeHtml(event.title)}</div>
+      <div class="event-date">${event.date.toLocaleDateString()}</div>
+      <div class="event-description">${escapeHtml(event.description)}</div>
+    </div>
+  `).join('') + subscribe;
+}
+
+function checkUpcomingEvents() {
+  const now = new Date();
+  const tomorrow = new Date(now);
+  tomorrow.setDate(tomorrow.getDate() + 1);
+
+  const upcoming = cosmicEvents.find(event => 
+    event.date.toDateString() === tomorrow.toDateString()
+  );
+
+  const notificationBanner = document.getElementById('notificationBanner');
+  if (upcoming) {
+    notificationBanner.textContent = `🔭 Tomorrow: ${upcoming.title}!`;
+    notificationBanner.style.display = 'block';
+  }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  fetchEvents();
+
+  const toggle = document.getElementById('eventsToggle');
+  const dropdown = document.getElementById('eventsDropdown');
+
+  toggle.addEventListener('click', (e) => {
+    e.preventDefault();
+    dropdown.classList.toggle('active');
+  });
+
+  document.addEventListener('click', (e) => {
+    if (!e.target.closest('.events-nav')) {
+      dropdown.classList.remove('active');
+    }
+  });
+});
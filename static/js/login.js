@@ -0,0 +1,48 @@
+// ✅ زر إظهار/إخفاء كلمة المرور (يعمل 100%)
+document.getElementById('togglePassword').addEventListener('click', function() {
+  const passwordField = document.getElementById('password');
+  const type = passwordField.getAttribute('type') === 'password' ? 'text' : 'password';
+  passwordField.setAttribute('type', type);
+  this.textContent = type === 'password' ? '(ꈍ.ꈍ)' : '(╹▽╹)';
+});
+
+// تسجيل الدخول مع Django API
+document.getElementById('loginForm').addEventListener('submit', async function(e) {
+  e.preventDefault();
+
+  const username = document.getElementById('username').value.trim();
+  const password = document.getElementById('password').value;
+  const errorMessage = document.getElementById('errorMessage');
+
+  // Hide previous errors
+  errorMessage.style.display = 'none';
+
+  try {
+    const response = await fetch('/api/login/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+      },
+      body: JSON.stringify({
+        username: username,
+        password: password
+      })
+    });
+
+    const data = await response.json();
+
+    if (response.ok) {
+      // Login successful - redirect to community page
+      window.location.href = '/community/';
+    } else {
+      // Show error message
+      errorMessage.textContent = data.error || 'Invalid username or password';
+      errorMessage.style.display = 'block';
+    }
+  } catch (error) {
+    errorMessage.textContent = 'Network error. Please try again.';
+    errorMessage.style.display = 'block';
+    console.error('Login error:', error);
+  }
+});
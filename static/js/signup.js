@@ -0,0 +1,76 @@
+// ✅ زر إظهار/إخفاء كلمة المرور
+document.getElementById('togglePassword').addEventListener('click', function() {
+  const passwordField = document.getElementById('password');
+  const type = passwordField.getAttribute('type') === 'password' ? 'text' : 'password';
+  passwordField.setAttribute('type', type);
+  this.textContent = type === 'password' ? '(ꈍ.ꈍ)' : '(╹▽╹)';
+});
+
+// إنشاء حساب مع Django API
+document.getElementById('signupForm').addEventListener('submit', async function(e) {
+  e.preventDefault();
+
+  const username = document.getElementById('username').value.trim();
+  const first_name = document.getElementById('first_name').value.trim();
+  const email = document.getElementById('email').value.trim();
+  const password = document.getElementById('password').value;
+  const errorMessage = document.getElementById('errorMessage');
+
+  // Hide previous errors
+  errorMessage.style.display = 'none';
+
+  // Basic validation
+  if (!username || !first_name || !email || password.length < 6) {
+    errorMessage.textContent = 'Please fill in all fields correctly. Password must be at least 6 characters.';
+    errorMessage.style.display = 'block';
+    return;
+  }
+
+  try {
+    const response = await fetch('/api/register/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+      },
+      body: JSON.stringify({
+        username: username,
+        first_name: first_name,
+        email: email,
+        password: password
+      })
+    });
+
+    const data = await response.json();
+
+    if (response.ok) {
+      // Registration successful - auto login
+      const loginResponse = await fetch('/api/login/', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+        },
+        body: JSON.stringify({
+          username: username,
+          password: password
+        })
+      });
+
+      if (loginResponse.ok) {
+        window.location.href = '/community/';
+      } else {
+        // Auto login failed, redirect to login page
+        window.location.href = '/auth/login/';
+      }
+    } else {
+      // Show error message
+      errorMessage.textContent = data.error || data.username?.[0] || data.email?.[0] || 'Registration failed';
+      errorMessage.style.display = 'block';
+    }
+  } catch (error) {
+    errorMessage.textContent = 'Network error. Please try again.';
+    errorMessage.style.display = 'block';
+    console.error('Registration error:', error);
+  }
+});
@@ -0,0 +1,199 @@
+// Check if user is authenticated
+async function checkAuth() {
+  try {
+    const response = await fetch('/api/profile/', {
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      const user = await response.json();
+      document.getElementById('authLink').textContent = 'Log Out';
+      document.getElementById('authLink').href = '#';
+      document.getElementById('authLink').onclick = async () => {
+        await fetch('/api/logout/', {
+          method: 'POST',
+          credentials: 'include'
+        });
+        window.location.href = '/';
+      };
+      return user;
+    } else {
+      // Not authenticated, redirect to login
+      window.location.href = '/auth/login/';
+      return null;
+    }
+  } catch (error) {
+    console.error('Auth check error:', error);
+    window.location.href = '/auth/login/';
+    return null;
+  }
+}
+
+// File management
+let imageFiles = [];
+
+function updatePreviews() {
+  const previewGrid = document.getElementById('previewGrid');
+  const fileInfo = document.getElementById('fileInfo');
+  previewGrid.innerHTML = '';
+  imageFiles = [];
+
+  const files = document.getElementById('photoInput').files;
+  if (files.length === 0) {
+    fileInfo.textContent = '';
+    return;
+  }
+
+  const filesArray = Array.from(files).slice(0, 10);
+  imageFiles = filesArray;
+  fileInfo.textContent = `${filesArray.length} image${filesArray.length > 1 ? 's' : ''} selected`;
+
+  filesArray.forEach((file, index) => {
+    const reader = new FileReader();
+    reader.onload = (e) => {
+      const previewItem = document.createElement('div');
+      previewItem.className = 'preview-item';
+      previewItem.innerHTML = `
+        <img src="${e.target.result}" class="preview-img" alt="Preview ${index + 1}" />
+        <button class="remove-btn" data-index="${index}">×</button>
+      `;
+      previewGrid.appendChild(previewItem);
+
+      previewItem.querySelector('.remove-btn').addEventListener('click', (ev) => {
+        ev.stopPropagation();
+        const idx = parseInt(ev.target.getAttribute('data-index'));
+
+        // Create new FileList without the removed file
+        const dt = new DataTransfer();
+        for (let i = 0; i < imageFiles.length; i++) {
+          if (i !== idx) {
+            dt.items.add(imageFiles[i]);
+          }
+        }
+
+        document.getElementById('photoInput').files = dt.files;
+        updatePreviews();
+      });
+    };
+    reader.readAsDataURL(file);
+  });
+}
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', async () => {
+  await checkAuth();
+
+  // File input events
+  document.getElementById('photoInput').addEventListener('change', updatePreviews);
+
+  const uploadArea = document.getElementById('uploadArea');
+  uploadArea.addEventListener('click', () => {
+    document.getElementById('photoInput').click();
+  });
+
+  // Drag and drop
+  ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
+    uploadArea.addEventListener(eventName, preventDefaults, false);
+  });
+
+  function preventDefaults(e) {
+    e.preventDefault();
+    e.stopPropagation();
+  }
+
+  ['dragenter', 'dragover'].forEach(eventName => {
+    uploadArea.addEventListener(eventName, highlight, false);
+  });
+
+  ['dragleave', 'drop'].forEach(eventName => {
+    uploadArea.addEventListener(eventName, unhighlight, false);
+  });
+
+  function highlight() {
+    uploadArea.style.borderColor = '#6b46c1';
+    uploadArea.style.backgroundColor = '#f0e6ff';
+  }
+
+  function unhighlight() {
+    uploadArea.style.borderColor = '#a78bfa';
+    uploadArea.style.backgroundColor = '#f9f7fd';
+  }
+
+  uploadArea.addEventListener('drop', handleDrop, false);
+
+  function handleDrop(e) {
+    const dt = e.dataTransfer;
+    const files = dt.files;
+    document.getElementById('photoInput').files = files;
+    updatePreviews();
+  }
+
+  // Cancel button
+  document.getElementById('cancelBtn').addEventListener('click', () => {
+    if (confirm('Discard all selected photos?')) {
+      window.location.href = '/community/';
+    }
+  });
+
+  // Form submission
+  document.getElementById('uploadForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    if (imageFiles.length === 0) {
+      alert('Please select at least one image.');
+      return;
+    }
+
+    const title = document.getElementById('title').value.trim();
+    const location = document.getElementById('location').value.trim() || null;
+    const category = document.getElementById('category').value;
+    const description = document.getElementById('description').value.trim() || null;
+
+    if (!title || !category) {
+      alert('Title and Category are required.');
+      return;
+    }
+
+    const publishBtn = document.getElementById('publishBtn');
+    publishBtn.disabled = true;
+    publishBtn.textContent = 'Publishing...';
+
+    try {
+      // For multiple files, we need to send them one by one or use FormData
+      const formData = new FormData();
+      formData.append('title', title);
+      formData.append('location', location || '');
+      formData.append('category', category);
+      formData.append('description', description || '');
+      formData.append('content_type', 'photo');
+
+      // Add all images
+      for (let i = 0; i < imageFiles.length; i++) {
+        formData.append('image', imageFiles[i]);
+      }
+
+      const response = await fetch('/api/content/', {
+        method: 'POST',
+        headers: {
+          'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+        },
+        credentials: 'include',
+        body: formData
+      });
+
+      if (response.ok) {
+        alert(`✅ ${imageFiles.length} photo${imageFiles.length > 1 ? 's' : ''} published!`);
+        window.location.href = '/community/';
+      } else {
+        const error = await response.json();
+        alert('Error: ' + (error.detail || 'Failed to publish photos'));
+      }
+    } catch (error) {
+      console.error('Error uploading photos:', error);
+      alert('Network error. Please try again.');
+    } finally {
+      publishBtn.disabled = false;
+      publishBtn.textContent = 'Publish All Photos';
+    }
+  });
+});
@@ -0,0 +1,35 @@
+// Deep-zoom viewer: /viewer/?dzi=<descriptor>&src=<original>
+// OpenSeadragon fetches only the tiles in view, at the zoom level shown.
+const params = new URLSearchParams(window.location.search);
+const dzi = params.get('dzi');
+const src = params.get('src');
+const originalLink = document.getElementById('originalLink');
+
+// Only our own media, never an arbitrary URL from the query string
+function isLocal(url) {
+  if (!url) return false;
+  const parsed = new URL(url, window.location.origin);
+  return parsed.origin === window.location.origin && parsed.pathname.startsWith('/media/');
+}
+
+if (isLocal(src)) {
+  originalLink.href = src;
+} else {
+  originalLink.style.display = 'none';
+}
+
+if (isLocal(dzi)) {
+  OpenSeadragon({
+    id: 'viewer',
+    prefixUrl: 'https://cdnjs.cloudflare.com/ajax/libs/openseadragon/4.1.0/images/',
+    tileSources: dzi,
+    showNavigator: true,
+    maxZoomPixelRatio: 2
+  });
+} else if (isLocal(src)) {
+  OpenSeadragon({
+    id: 'viewer',
+    prefixUrl: 'https://cdnjs.cloudflare.com/ajax/libs/openseadragon/4.1.0/images/',
+    tileSources: { type: 'image', url: src }
+  });
+}
@@ -0,0 +1,80 @@
+// Check if user is authenticated
+async function checkAuth() {
+  try {
+    const response = await fetch('/api/profile/', {
+      credentials: 'include'
+    });
+
+    if (response.ok) {
+      const user = await response.json();
+      document.getElementById('authLink').textContent = 'Log Out';
+      document.getElementById('authLink').href = '#';
+      document.getElementById('authLink').onclick = async () => {
+        await fetch('/api/logout/', {
+          method: 'POST',
+          credentials: 'include'
+        });
+        window.location.href = '/';
+      };
+      return user;
+    } else {
+      // Not authenticated, redirect to login
+      window.location.href = '/auth/login/';
+      return null;
+    }
+  } catch (error) {
+    console.error('Auth check error:', error);
+    window.location.href = '/auth/login/';
+    return null;
+  }
+}
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', async () => {
+  await checkAuth();
+
+  // Handle form submission
+  document.getElementById('articleForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const title = document.getElementById('title').value;
+    const location = document.getElementById('location').value || null;
+    const category = document.getElementById('category').value;
+    const content = document.getElementById('content').value;
+
+    if (!title || !category || !content) {
+      alert('Please fill in all required fields.');
+      return;
+    }
+
+    try {
+      const response = await fetch('/api/content/', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+        },
+        credentials: 'include',
+        body: JSON.stringify({
+          content_type: 'article',
+          title: title,
+          location: location,
+          category: category,
+          content: content,
+          description: null
+        })
+      });
+
+      if (response.ok) {
+        alert('Article published successfully! 🌠');
+        window.location.href = '/community/';
+      } else {
+        const error = await response.json();
+        alert('Error: ' + (error.detail || 'Failed to publish article'));
+      }
+    } catch (error) {
+      console.error('Error publishing article:', error);
+      alert('Network error. Please try again.');
+    }
+  });
+});